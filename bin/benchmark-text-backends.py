@@ -0,0 +1,123 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root is on sys.path when the script is run directly.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.fingerprint import shingle_hashes
+from utils.pdf_content import DEFAULT_TEXT_BACKEND, available_text_backends, close_document, open_document
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "samples"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare PDF text backends on a corpus: pages/sec and agreement with the baseline."
+    )
+    parser.add_argument(
+        "--corpus",
+        default=str(DEFAULT_CORPUS),
+        help=f"Directory of sample PDFs (default: {DEFAULT_CORPUS})",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=None,
+        help="Backends to compare (default: every installed backend)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_TEXT_BACKEND,
+        help=f"Backend the others are compared against (default: {DEFAULT_TEXT_BACKEND})",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Pages read per PDF (default: all; the renamer itself reads at most 3)",
+    )
+    return parser.parse_args()
+
+
+def extract_corpus(backend: str, pdfs: list[Path], max_pages: int | None = None) -> tuple[dict, float, int]:
+    """Read every page of every PDF with one backend.
+
+    :return: ({(pdf, page_index): text}, seconds spent, number of failed PDFs)
+    """
+    texts: dict[tuple[Path, int], str] = {}
+    failures = 0
+    started = time.perf_counter()
+    for pdf in pdfs:
+        try:
+            document = open_document(pdf, backend)
+            try:
+                pages = document.pages
+                for index in range(len(pages) if max_pages is None else min(len(pages), max_pages)):
+                    texts[(pdf, index)] = pages[index].extract_text() or ""
+            finally:
+                close_document(document)
+        except Exception as e:
+            print(f"  {backend}: failed on {pdf.name}: {e}", file=sys.stderr)
+            failures += 1
+    return texts, time.perf_counter() - started, failures
+
+
+def agreement(text_a: str, text_b: str) -> float:
+    """Jaccard similarity of the word sets of two extractions (1.0 when both are empty)."""
+    words_a = shingle_hashes(text_a.splitlines(), size=1)
+    words_b = shingle_hashes(text_b.splitlines(), size=1)
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def compare(backends: list[str], pdfs: list[Path], baseline: str, max_pages: int | None = None) -> list[dict]:
+    """Benchmark each backend and score its agreement with the baseline, page by page."""
+    results = {name: extract_corpus(name, pdfs, max_pages) for name in dict.fromkeys([baseline, *backends])}
+    baseline_texts = results[baseline][0]
+    rows = []
+    for name in backends:
+        texts, seconds, failures = results[name]
+        scores = {key: agreement(baseline_texts[key], text) for key, text in texts.items() if key in baseline_texts}
+        worst = min(scores, key=scores.get) if scores else None
+        rows.append({
+            "backend": name,
+            "pages": len(texts),
+            "seconds": seconds,
+            "pages_per_second": len(texts) / seconds if seconds else 0.0,
+            "mean_agreement": statistics.fmean(scores.values()) if scores else 0.0,
+            "min_agreement": scores[worst] if worst else 0.0,
+            "worst_page": f"{worst[0].name} p{worst[1] + 1}" if worst else "",
+            "failures": failures,
+        })
+    return rows
+
+
+def main() -> None:
+    args = parse_args()
+    corpus = Path(args.corpus)
+    pdfs = sorted(corpus.glob("*.pdf"))
+    if not pdfs:
+        sys.exit(f"error: no PDFs in {corpus}")
+    installed = available_text_backends()
+    backends = args.backends or installed
+    missing = [name for name in [args.baseline, *backends] if name not in installed]
+    if missing:
+        sys.exit(f"error: backend(s) not installed: {', '.join(missing)}")
+
+    rows = compare(backends, pdfs, args.baseline, args.max_pages)
+    print(f"{len(pdfs)} PDFs from {corpus}; agreement is word-set Jaccard against {args.baseline}\n")
+    print(f"{'backend':<10} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'mean agr':>9} {'min agr':>8}  worst page")
+    for row in rows:
+        print(
+            f"{row['backend']:<10} {row['pages']:>6} {row['seconds']:>8.2f} {row['pages_per_second']:>8.1f} "
+            f"{row['mean_agreement']:>9.3f} {row['min_agreement']:>8.3f}  {row['worst_page']}"
+            + (f"  ({row['failures']} failed)" if row["failures"] else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
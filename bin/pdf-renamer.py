@@ -1,22 +1,76 @@
+from __future__ import annotations
+
 import argparse
+import copy
 import logging
 import json
 import sys
-import tqdm
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 # Ensure the project root is on sys.path when the script is run directly.
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from utils.api import DEFAULT_WORKERS, TEXT_BACKEND_NAMES, extract_from_pdf
+from utils.concurrency import limiters
+from utils.destinations import DestinationIndex
+from utils.duplicates import bytes_digest, find_exact_duplicates
 from utils.file_name import make_filename_safe
-from utils.pdf_content import extract_from_pdf
+from utils.logging_setup import DEBUG_BURST, configure_logging
+from utils.manifest import Manifest
+from utils import memprofile
+from utils.memprofile import SNAPSHOT_EVERY, MemoryProfiler, report_path_for
+from utils.fingerprint import NEAR_DUPLICATE_THRESHOLD, NearDuplicateIndex
+from utils.local_summary import DEFAULT_SUMMARY_MODE, SUMMARY_MODES, textrank_available
+from utils.long_summary import CHUNK_TOKENS, DEFAULT_SUMMARY_TOKENS, ChunkCache
+from utils.isolation import (
+    PARSE_MEMORY_LIMIT, PARSE_TIMEOUT_SECONDS, STATUS_OK, IsolatedParseError, IsolatedParser,
+)
+from utils.metadata_store import MetadataStore
+from utils.ndjson import EMIT_FORMATS, NdjsonWriter
+from utils.plan_apply import RenameJournal, apply_plan, rollback_journal
+from utils.prefetch import PREFETCH_BYTES, Prefetcher
+from utils.scheduler import ORDERS, CostModel, Scheduler, load_checkpoint, save_checkpoint
+from utils.sharding import merge_plans, parse_shard, select_shard, shard_path
+from utils.server import DEFAULT_PORT, MAX_PENDING, ExtractionService, serve
+from utils.view import LINK_KINDS, VIEW_LAYOUTS, View
+from utils.watcher import SETTLE_SECONDS, watch_directory
+
+# --apply, --rollback, --search and --help start without the extraction stack;
+# see utils.api for the lazy extract_from_pdf the extracting modes call.
+if TYPE_CHECKING:
+    from llms.extractors import OllamaExtractors
 
 DEFAULT_PDF_ROOT_PATH = "/home/scott/ownCloud/Documents/Articles and Papers/"
 DEFAULT_LOG_PATH = "process.log"
 DEFAULT_PLAN_FILE = "./rename_plan.json"
+DEFAULT_JOURNAL_FILE = "./rename_journal.jsonl"
+DEFAULT_METADATA_DB = "./metadata.db"
+DEFAULT_CHECKPOINT_FILE = "./rename_checkpoint.json"
+DUPLICATES_DIR_NAME = "duplicates"
+STATUS_DUPLICATE = "DUPLICATE"      # byte-identical copy, moved to DUPLICATES_DIR_NAME (or not linked)
+STATUS_UNCHANGED = "UNCHANGED"      # already under its clean name (or its view link is in place)
+STATUS_LINKED = "LINK"              # linked into --view
+STATUS_ERROR = "ERROR"
 FORMAT = "[%(asctime)s | %(name)s | %(levelname)s | %(filename)s:%(funcName)s():%(lineno)d] %(message)s"
 
 
+def shard_arg(text: str) -> tuple[int, int]:
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def cascade_arg(text: str) -> tuple[str, list[str]]:
+    task, _, models = text.partition("=")
+    models = [model.strip() for model in models.split(",") if model.strip()]
+    if not task or not models:
+        raise argparse.ArgumentTypeError(f"expected TASK=MODEL[,MODEL...], got {text!r}")
+    return task.strip(), models
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Rename PDF files based on their extracted or synthesized title."
@@ -33,15 +87,22 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--log-level",
-        default="DEBUG",
+        default="INFO",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-        help="Logging level (default: DEBUG)",
+        help="Logging level (default: INFO). DEBUG records are sampled per call site after the first "
+             f"{DEBUG_BURST}.",
     )
     parser.add_argument(
         "--plan-file",
         default=DEFAULT_PLAN_FILE,
         help=f"Path to the rename plan JSON file used by --dry-run and --apply (default: {DEFAULT_PLAN_FILE})",
     )
+    parser.add_argument(
+        "--journal-file",
+        default=DEFAULT_JOURNAL_FILE,
+        help=f"Append-only journal of renames written by --apply, the default rename mode and --watch, "
+             f"and read by --rollback (default: {DEFAULT_JOURNAL_FILE})",
+    )
     parser.add_argument(
         "--json",
         metavar="PATH",
@@ -49,6 +110,231 @@ def parse_args() -> argparse.Namespace:
         help="Write a metadata JSON file per PDF to this directory (created if absent). "
              "Can be combined with the default rename mode.",
     )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        default=None,
+        help="Write metadata for every renamed PDF into this SQLite database (with full-text "
+             f"index) instead of one JSON file each. Also the database read by --search "
+             f"(default for --search: {DEFAULT_METADATA_DB}).",
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help=f"Move byte-identical copies of a PDF into a '{DUPLICATES_DIR_NAME}' subdirectory of "
+             "--pdf-root instead of renaming them alongside the original.",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        action="store_true",
+        help="Fingerprint each document's text and reuse the title and authors of an earlier "
+             "near-duplicate (e.g. arXiv v1/v2) instead of calling the LLM; clusters are reported.",
+    )
+    parser.add_argument(
+        "--near-duplicate-threshold",
+        type=float,
+        default=NEAR_DUPLICATE_THRESHOLD,
+        help=f"Minimum estimated text similarity (0-1) for --near-duplicates "
+             f"(default: {NEAR_DUPLICATE_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=SETTLE_SECONDS,
+        help=f"With --watch, how long a new file must stop changing before it is processed "
+             f"(default: {SETTLE_SECONDS})",
+    )
+    parser.add_argument(
+        "--text-backend",
+        choices=TEXT_BACKEND_NAMES,
+        default=None,
+        help="Library used to read page text: pypdf (default), pypdfium2 (fast, optional install) "
+             "or pdfminer (layout analysis, optional install)",
+    )
+    parser.add_argument(
+        "--view",
+        metavar="DIR",
+        default=None,
+        help="Leave the PDFs where they are and build DIR as a directory of links to them under "
+             "their clean names (default and --watch modes). Re-runs only change the links that changed.",
+    )
+    parser.add_argument(
+        "--view-layout",
+        choices=VIEW_LAYOUTS,
+        default="flat",
+        help="With --view, group links by extracted year, first-author surname, or both (default: flat)",
+    )
+    parser.add_argument(
+        "--view-link",
+        choices=LINK_KINDS,
+        default="symbolic",
+        help="With --view, the kind of link to create; hard links need DIR on the same filesystem "
+             "(default: symbolic)",
+    )
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        default=None,
+        help="Record size, mtime, inode, hash and extracted metadata of every processed file here, "
+             "and skip files that are unchanged since the previous run.",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        type=shard_arg,
+        default=None,
+        help="With --dry-run, plan only shard I of N (1-based). Files are assigned by a hash of their "
+             "size and leading bytes, so every machine agrees on the split and identical copies stay "
+             "together. The plan, checkpoint and manifest paths get a .shard-I-of-N suffix; combine "
+             "the shard plans with --merge-plans.",
+    )
+    parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        default="name",
+        help="Processing order: name (default), cheapest (least estimated work first; completes the "
+             "most files within --time-budget) or newest (most recently modified first)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        default=None,
+        help="Stop before starting a file that would not finish within this many seconds (by its "
+             "estimated cost), saving the remaining files to --checkpoint for --resume",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=DEFAULT_CHECKPOINT_FILE,
+        help=f"Where a --time-budget run records the files it did not reach (default: {DEFAULT_CHECKPOINT_FILE})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Process only the files left over in --checkpoint by an earlier --time-budget run "
+             "(with --dry-run, the new entries are added to the existing --plan-file)",
+    )
+    parser.add_argument(
+        "--parse-timeout",
+        type=float,
+        default=PARSE_TIMEOUT_SECONDS,
+        help=f"Seconds a PDF may take to parse before its worker process is killed and the file is "
+             f"recorded as TIMEOUT (default: {PARSE_TIMEOUT_SECONDS:g})",
+    )
+    parser.add_argument(
+        "--parse-memory-mb",
+        type=int,
+        default=PARSE_MEMORY_LIMIT // (1024 * 1024),
+        help=f"Address-space limit for the parse worker process; a PDF that exceeds it is recorded as "
+             f"OOM (default: {PARSE_MEMORY_LIMIT // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--no-isolation",
+        action="store_true",
+        help="Parse PDFs in this process instead of a supervised worker (no timeout or memory limit)",
+    )
+    parser.add_argument(
+        "--ollama-host",
+        default=None,
+        help="Ollama server URL (default: OllamaExtractors.HOST in llms/extractors.py)",
+    )
+    parser.add_argument(
+        "--cascade",
+        metavar="TASK=MODEL,MODEL",
+        type=cascade_arg,
+        action="append",
+        default=[],
+        help="Models to try in order for TASK (title, authors or summary), e.g. "
+             "title=qwen3.5:4b,qwen3.5:latest. A later model is asked only when the earlier answer fails "
+             "validation or looks implausible. Repeat for each task; the default is one model per task.",
+    )
+    parser.add_argument(
+        "--summary-mode",
+        choices=SUMMARY_MODES,
+        default=DEFAULT_SUMMARY_MODE,
+        help="llm: summarize every document with the summary model (default). local: use the "
+             "document's own abstract, else a TextRank extract, and the LLM only when both fail "
+             "(TextRank needs 'pip install numpy').",
+    )
+    parser.add_argument(
+        "--long-summaries",
+        action="store_true",
+        help="Summarize the whole document (up to --summary-tokens) instead of its first few pages: "
+             "the text is cut into chunks that are summarized concurrently and reduced to one abstract",
+    )
+    parser.add_argument(
+        "--summary-tokens",
+        type=int,
+        metavar="N",
+        default=DEFAULT_SUMMARY_TOKENS,
+        help=f"With --long-summaries, estimated tokens of document text one summary reads and sends to "
+             f"the chunk calls; pages are sampled evenly across the document to fit it "
+             f"(default: {DEFAULT_SUMMARY_TOKENS})",
+    )
+    parser.add_argument(
+        "--chunk-cache",
+        metavar="PATH",
+        default=None,
+        help="With --long-summaries, keep chunk summaries in this JSON file so re-runs and "
+             "near-identical documents reuse them (default: in memory for the run)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"With --serve, the local port to listen on (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"With --serve, documents extracted concurrently (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=MAX_PENDING,
+        help=f"With --serve, requests admitted at once before new ones get HTTP 503 (default: {MAX_PENDING})",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        metavar="N",
+        default=0,
+        help="Read up to N upcoming PDFs into memory in the background while the current one is "
+             "processed, so parsing does not wait on slow (network) storage (default: 0, off)",
+    )
+    parser.add_argument(
+        "--prefetch-mb",
+        type=int,
+        metavar="MB",
+        default=PREFETCH_BYTES // (1024 * 1024),
+        help=f"With --prefetch, total size of the read-ahead buffers; larger files are only hinted to "
+             f"the page cache (default: {PREFETCH_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--memprofile",
+        action="store_true",
+        help="Trace Python memory allocations (slow): per-document and per-stage peaks go to "
+             "<log>.memprofile.jsonl, top allocation sites every --memprofile-every documents and a "
+             "warning on steady growth to <log>.memprofile.txt. With parse isolation (the default) "
+             "the reading stage runs in a worker process; add --no-isolation to trace it.",
+    )
+    parser.add_argument(
+        "--memprofile-every",
+        type=int,
+        metavar="N",
+        default=SNAPSHOT_EVERY,
+        help=f"With --memprofile, documents between allocation-site dumps (default: {SNAPSHOT_EVERY})",
+    )
+    parser.add_argument(
+        "--emit",
+        choices=EMIT_FORMATS,
+        default="text",
+        help="text: print human-readable progress (default). ndjson: write one JSON record per document "
+             "to stdout as soon as it is done (status, destination, metadata, timings), flushed per "
+             "record for piping into other tools; the human-readable output goes to stderr.",
+    )
     mode = parser.add_mutually_exclusive_group()
     mode.add_argument(
         "--dry-run",
@@ -66,47 +352,637 @@ def parse_args() -> argparse.Namespace:
             "Does not re-run LLM extraction."
         ),
     )
-    return parser.parse_args()
+    mode.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Undo the renames recorded in --journal-file, newest first.",
+    )
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rename new PDFs in --pdf-root as they arrive (inotify, with a "
+             "polling fallback). Accepts the same output options as the default mode.",
+    )
+    mode.add_argument(
+        "--search",
+        metavar="QUERY",
+        default=None,
+        help="Full-text search titles, authors and summaries in the --sqlite database.",
+    )
+    mode.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve metadata extraction over HTTP on 127.0.0.1:--port (POST /extract with a PDF "
+             "upload or a JSON {\"path\": ...}; GET /health). Files are not renamed.",
+    )
+    mode.add_argument(
+        "--merge-plans",
+        metavar="PLAN",
+        nargs="+",
+        default=None,
+        help="Combine shard plans written by --dry-run --shard into --plan-file, resolving "
+             "destination collisions between shards.",
+    )
+    args = parser.parse_args()
+    if args.shard and not args.dry_run:
+        parser.error("--shard requires --dry-run (renaming in place is not coordinated across machines)")
+    if args.view and (args.dry_run or args.apply or args.rollback or args.search is not None or args.serve
+                      or args.merge_plans):
+        parser.error("--view only applies to the default rename mode and --watch")
+    # Both record files as they are renamed; the other modes rename nothing (or, for --dry-run, not yet)
+    if args.sqlite and (args.dry_run or args.apply or args.rollback or args.serve or args.merge_plans):
+        parser.error("--sqlite only applies to the default rename mode, --watch and --search")
+    if args.json and (args.dry_run or args.apply or args.rollback or args.search is not None or args.serve
+                      or args.merge_plans):
+        parser.error("--json only applies to the default rename mode and --watch")
+    if args.memprofile and (args.apply or args.rollback or args.search is not None or args.serve
+                            or args.merge_plans):
+        parser.error("--memprofile only applies to the default rename mode, --dry-run and --watch")
+    if args.prefetch and (args.apply or args.rollback or args.watch or args.search is not None or args.serve
+                          or args.merge_plans):
+        parser.error("--prefetch only applies to the default rename mode and --dry-run")
+    if args.time_budget is not None and (args.apply or args.rollback or args.watch or args.search is not None
+                                         or args.serve or args.merge_plans):
+        parser.error("--time-budget only applies to the default rename mode and --dry-run")
+    if args.prefetch < 0 or args.prefetch_mb < 1:
+        parser.error("--prefetch must not be negative and --prefetch-mb must be at least 1")
+    if args.emit == "ndjson" and (args.apply or args.rollback or args.search is not None or args.serve
+                                  or args.merge_plans):
+        parser.error("--emit ndjson only applies to the default rename mode, --dry-run and --watch")
+    if args.summary_tokens < CHUNK_TOKENS:
+        parser.error(f"--summary-tokens must be at least {CHUNK_TOKENS}")
+    if args.memprofile_every < 1:
+        parser.error("--memprofile-every must be at least 1")
+    if args.view and Path(args.view).resolve() == Path(args.pdf_root).resolve():
+        parser.error("--view must be a different directory from --pdf-root")
+    return args
 
 
-def run_dry_run(pdf_root: Path, plan_file: Path) -> int:
-    """Run LLM extraction over all PDFs, print proposed renames, and save the plan."""
-    logging.info(f"Dry run — reading PDFs from {pdf_root}")
-    plan: list[dict] = []
+def make_extractor(
+    host: str | None = None,
+    cascades: list[tuple[str, list[str]]] | None = None,
+    summary_mode: str = DEFAULT_SUMMARY_MODE,
+    chunk_cache: ChunkCache | None = None,
+) -> OllamaExtractors:
+    """Create an OllamaExtractors client, importing the LLM stack on first use.
 
-    pdfs = list(pdf_root.glob("*.pdf"))
-    for filename in tqdm.tqdm(pdfs):
-        try:
-            logging.info(f"Processing {filename}")
-            title, authors, date, summary = extract_from_pdf(filename)
+    Exits with a usage error if a --cascade names an unknown task, or if
+    --summary-mode local is asked for without NumPy.
+    """
+    if summary_mode == "local" and not textrank_available():
+        sys.exit("error: --summary-mode local requires 'pip install numpy'")
+    from llms.extractors import OllamaExtractors
+
+    try:
+        return OllamaExtractors(host, dict(cascades or []), summary_mode, chunk_cache)
+    except ValueError as e:
+        sys.exit(f"error: --cascade: {e}")
+
+
+def progress(total: float) -> object:
+    """Create a tqdm bar measured in estimated seconds of work, so its ETA is cost-weighted."""
+    import tqdm
+
+    return tqdm.tqdm(
+        total=total,
+        bar_format="{l_bar}{bar}| {n:.0f}/{total:.0f} est. s [{elapsed}<{remaining}]",
+    )
+
+
+def check_text_backend(name: str | None) -> None:
+    """Exit with a usage error if the text backend is not installed (argparse checks the name)."""
+    if name is None:
+        return
+    from utils.pdf_content import available_text_backends
+
+    if name not in available_text_backends():
+        sys.exit(f"error: --text-backend {name} is not installed")
+
+
+def find_duplicates(pdfs: list[Path], known: dict[Path, str] | None = None) -> dict[Path, Path]:
+    """Report byte-identical PDFs and map each extra copy to the first file of its group.
+
+    Files with a digest in known are compared by it without being read.
+    """
+    duplicate_of: dict[Path, Path] = {}
+    for group in find_exact_duplicates(pdfs, known):
+        print(f"  DUPLICATES  {group[0].name}: {', '.join(p.name for p in group[1:])}")
+        for duplicate in group[1:]:
+            duplicate_of[duplicate] = group[0]
+    return duplicate_of
+
+
+def report_manifest(manifest: Manifest | None) -> None:
+    """Save the manifest and print how many files it let the run skip."""
+    if manifest is None:
+        return
+    manifest.save()
+    print(
+        f"  MANIFEST  {manifest.hits} unchanged (stat), {manifest.rehashed} unchanged (hash), "
+        f"{manifest.misses} new or changed"
+    )
+
+
+def report_extraction() -> None:
+    """Log the run's aggregated clean_text and page-reading counts."""
+    from utils.pdf_content import log_extraction_summary
+
+    log_extraction_summary()
+
+
+def report_memory(profiler: MemoryProfiler | None) -> None:
+    """Print where the memory profile went and whether retained memory kept growing."""
+    if profiler is None:
+        return
+    growth = f"steady growth flagged {profiler.growth_flagged} times" if profiler.growth_flagged else "no steady growth"
+    print(f"  MEMORY  {profiler.documents} documents profiled, {growth} (report: {profiler.report_path})")
+
+
+def report_concurrency() -> None:
+    """Print each Ollama host's adaptive concurrency limit as the run left it."""
+    for host, limiter in limiters().items():
+        stats = limiter.snapshot()
+        if not stats["calls"]:
+            continue
+        print(
+            f"  CONCURRENCY  {host}: limit {stats['limit']:g} (peak {stats['peak_in_flight']} in flight, "
+            f"{stats['calls']} calls, {stats['errors']} errors, {stats['backoffs']} backoffs)"
+        )
+
+
+def report_cascades(extractor: OllamaExtractors) -> None:
+    """Print how often each model cascade had to escalate."""
+    for task, counts in extractor.cascade_report().items():
+        documents = counts["documents"]
+        rate = counts["escalated"] / documents if documents else 0.0
+        stops = ", ".join(f"{model} {n}" for model, n in counts["stopped_at"].items())
+        print(f"  CASCADE  {task}: {counts['escalated']}/{documents} escalated ({rate:.0%}); answered by {stops}")
+
+
+def report_summaries(extractor: OllamaExtractors) -> None:
+    """With --summary-mode local, print how many summaries needed no LLM call."""
+    if extractor.summary_mode != "local":
+        return
+    counts = extractor.summary_counters
+    print(
+        f"  SUMMARIES  {counts['abstract']} from the document's abstract, {counts['textrank']} by TextRank, "
+        f"{counts['llm']} by the LLM"
+    )
+
+
+def report_long_summaries(extractor: OllamaExtractors) -> None:
+    """Print how many documents were summarized by map-reduce and what it cost."""
+    counts = extractor.long_summary_counters
+    if not counts["documents"]:
+        return
+    print(
+        f"  LONG SUMMARIES  {counts['documents']} documents from {counts['chunks']} chunks "
+        f"({counts['cached']} cached, {counts['dropped']} left out by --summary-tokens), "
+        f"about {counts['tokens']} input tokens"
+    )
+
+
+def report_prefetch(prefetcher: Prefetcher | None) -> None:
+    """Print how much file reading the prefetcher took off the critical path."""
+    if prefetcher is None:
+        return
+    stats = prefetcher.snapshot()
+    print(
+        f"  PREFETCH  {stats['hits']} files read ahead, {stats['misses']} read on demand, "
+        f"{stats['hinted']} hinted; {stats['saved_seconds']:.1f}s of reading overlapped, "
+        f"{stats['wait_seconds']:.1f}s waited on {stats['waits']} reads in progress"
+    )
+
+
+def report_isolation(isolation: IsolatedParser | None) -> None:
+    """Print how many files the parse worker gave up on."""
+    if isolation is None or not (isolation.timeouts or isolation.out_of_memory or isolation.crashed):
+        return
+    print(
+        f"  ISOLATION  {isolation.timeouts} timed out, {isolation.out_of_memory} out of memory, "
+        f"{isolation.crashed} crashed"
+    )
+
+
+def report_near_duplicates(near_duplicates: NearDuplicateIndex | None) -> None:
+    """Print the near-duplicate clusters found during the run."""
+    if near_duplicates is None:
+        return
+    for cluster in near_duplicates.clusters():
+        print(f"  NEAR-DUPLICATES  {cluster[0].name}: {', '.join(p.name for p in cluster[1:])}")
+
+
+def resume_pending(pdfs: list[Path], checkpoint: Path, mode: str, pdf_root: Path, scheduler: Scheduler) -> list[Path]:
+    """Restrict pdfs to the files a checkpoint left pending and restore its learned timings."""
+    try:
+        state = load_checkpoint(checkpoint, mode, pdf_root)
+    except (OSError, ValueError) as e:
+        sys.exit(f"error: cannot --resume: {e}")
+    scheduler.model = CostModel(state["timings"])
+    pending = set(state["pending"])
+    print(f"Resuming: {len(pending)} files left by the previous run")
+    return [pdf for pdf in pdfs if pdf in pending]
+
+
+def run_batch(session: RenameSession, pdfs: list[Path], scheduler: Scheduler, step) -> list[Path]:
+    """Call step(path) for each PDF in scheduler order until done or out of time budget.
+
+    :return: Files not started because the time budget ran out
+    """
+    jobs = scheduler.plan(pdfs, session.duplicate_of, skip=session.needs_no_read)
+    bar = progress(sum(job.cost for job in jobs))
+    if session.prefetcher:
+        session.prefetcher.start([job.path for job in jobs], skip=session.needs_no_read)
+    try:
+        for index, job in enumerate(jobs):
+            if not scheduler.fits(job):
+                return [job.path for job in jobs[index:]]
+            with memprofile.document(job.path):
+                step(job.path)
+            scheduler.observe(job, session.last_stats)
+            bar.update(job.cost)
+    finally:
+        bar.close()
+        if session.prefetcher:
+            session.prefetcher.close()
+    return []
+
+
+def finish_batch(
+    pending: list[Path], checkpoint: Path | None, mode: str, pdf_root: Path, scheduler: Scheduler, resumed: bool
+) -> None:
+    """Save a checkpoint for files left by the time budget, or drop the one a completed resume used."""
+    if pending and checkpoint is not None:
+        save_checkpoint(checkpoint, mode, pdf_root, pending, scheduler.model)
+        print(
+            f"\nTime budget of {scheduler.time_budget:g}s reached after {scheduler.elapsed:.0f}s: "
+            f"{len(pending)} files not started. Continue with --resume (checkpoint: {checkpoint})"
+        )
+    elif resumed and checkpoint is not None and checkpoint.exists():
+        checkpoint.unlink()
+
+
+class RenameSession:
+    """Per-run state for planning or performing renames.
+
+    Holds everything that should stay warm between files: the destination
+    index, duplicate bookkeeping, the near-duplicate index, the manifest, the
+    output backends and a single OllamaExtractors client. Used by run_dry_run
+    and run_full for a batch and by run_watch for files that arrive over time.
+    With a View, process() links each file into the view instead of renaming it.
+    With a Prefetcher, files are parsed from bytes it read ahead. With an
+    NdjsonWriter, a record is written for each file as soon as it is done.
+    With a RenameJournal, every rename is journaled for --rollback.
+    """
+
+    def __init__(
+        self,
+        pdf_root: Path,
+        output_dir: Path | None = None,
+        dedupe: bool = False,
+        near_duplicates: NearDuplicateIndex | None = None,
+        store: MetadataStore | None = None,
+        extractor: OllamaExtractors | None = None,
+        manifest: Manifest | None = None,
+        text_backend: str | None = None,
+        isolation: IsolatedParser | None = None,
+        view: View | None = None,
+        prefetcher: Prefetcher | None = None,
+        summary_tokens: int | None = None,
+        emitter: NdjsonWriter | None = None,
+        journal: RenameJournal | None = None,
+    ) -> None:
+        self.pdf_root = pdf_root
+        self.output_dir = output_dir
+        self.dedupe = dedupe
+        self.near_duplicates = near_duplicates
+        self.store = store
+        self.extractor = extractor
+        self.manifest = manifest
+        self.text_backend = text_backend
+        self.isolation = isolation
+        self.view = view
+        self.prefetcher = prefetcher
+        self.summary_tokens = summary_tokens
+        self.emitter = emitter
+        self.journal = journal
+        self.destinations = DestinationIndex()
+        self.duplicate_of: dict[Path, Path] = {}
+        self.extracted: dict = {}
+        self.last_stats: dict = {}
+        self.produced: set[Path] = set()
+        self.unchanged: set[Path] = set()
+        self.renamed, self.skipped, self.errors = 0, 0, 0
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+    def find_duplicates(self, pdfs: list[Path]) -> None:
+        """Find byte-identical copies, comparing files the manifest knows are unchanged by their stored hash."""
+        known = {}
+        if self.manifest:
+            for pdf in pdfs:
+                digest = self.manifest.current_digest(pdf)
+                if digest:
+                    known[pdf] = digest
+        self.duplicate_of = find_duplicates(pdfs, known)
+        self.extracted = dict.fromkeys(self.duplicate_of.values())
+
+    def resume(self, entries: list[dict]) -> None:
+        """Pick up planned entries from an earlier, budget-limited part of this dry run.
+
+        Their destinations are reserved, and their metadata is reused for any
+        byte-identical copies that are still pending. Call after find_duplicates.
+        """
+        for entry in entries:
+            if entry.get("status", STATUS_OK) != STATUS_OK:
+                continue
+            source, destination = Path(entry["source"]), Path(entry["destination"])
+            if destination != source:
+                self.destinations.release(source)
+                self.destinations.reserve(destination)
+            if source in self.extracted:
+                self.extracted[source] = (entry["title"], entry["authors"], entry["date"], entry["summary"])
+
+    def needs_no_read(self, filename: Path) -> bool:
+        """True if extract() will reuse earlier results for filename without reading it."""
+        return filename in self.duplicate_of or bool(self.manifest and self.manifest.is_current(filename))
+
+    def extract(self, filename: Path) -> tuple:
+        """Extract metadata for filename, reusing earlier results when possible.
+
+        An unchanged file recorded in the manifest, or a byte-identical copy of
+        a file already extracted in this run, skips extraction entirely.
+
+        :return: Tuple of (title_dict, authors_dict, date_dict or None, summary_dict)
+        """
+        self.last_stats = {}
+        cached = self.manifest.lookup(filename) if self.manifest else None
+        canonical = self.duplicate_of.get(filename)
+        data = None
+        if cached is not None:
+            logging.info(f"{filename} unchanged since last run; reusing manifest entry")
+            self.unchanged.add(filename)
+            result = cached
+        elif canonical is not None:
+            if self.extracted.get(canonical) is None:
+                raise RuntimeError(f"identical to {canonical.name}, which could not be processed")
+            logging.info(f"{filename} is identical to {canonical}; reusing its metadata")
+            result = copy.deepcopy(self.extracted[canonical])
+        else:
+            data = self.prefetcher.take(filename) if self.prefetcher else None
+            title, authors, date, summary = extract_from_pdf(
+                filename, near_duplicates=self.near_duplicates, extractor=self.extractor,
+                text_backend=self.text_backend, isolation=self.isolation, stats=self.last_stats, data=data,
+                summary_tokens=self.summary_tokens,
+            )
             if not title["title"]:
                 logging.info("Falling back to file title.")
                 title["title"] = make_filename_safe(filename.stem)
+            result = (title, authors, date, summary)
+
+        if filename in self.extracted:
+            self.extracted[filename] = copy.deepcopy(result)
+        if self.manifest and cached is None:
+            self.manifest.record(filename, result, bytes_digest(data) if data is not None else None)
+        return result
+
+    def _entry(self, filename: Path, destination: Path, status: str, title, authors, date, summary) -> dict:
+        """A rename plan entry; also the shape of the NDJSON record for a file that was placed."""
+        entry = {
+            "source": str(filename),
+            "destination": str(destination),
+            "status": status,
+            "title": title,
+            "authors": authors,
+            "date": date,
+            "summary": summary,
+        }
+        if filename in self.duplicate_of:
+            entry["duplicate_of"] = str(self.duplicate_of[filename])
+        match = self.near_duplicates.match_of(filename) if self.near_duplicates is not None else None
+        if match is not None:
+            other, similarity = match
+            entry["near_duplicate_of"] = str(other)
+            entry["similarity"] = round(similarity, 3)
+        return entry
+
+    def _emit(self, record: dict, started: float) -> None:
+        """Write record to the NDJSON stream with the file's wall time and extraction stats."""
+        if self.emitter is None:
+            return
+        stats = {key: round(value, 3) if isinstance(value, float) else value for key, value in self.last_stats.items()}
+        self.emitter.write({**record, "seconds": round(time.perf_counter() - started, 3), "stats": stats})
+
+    def plan(self, filename: Path) -> dict | None:
+        """Extract metadata for one PDF and return its rename plan entry.
+
+        A file the parse worker gave up on gets an entry with its failure status
+        (TIMEOUT, OOM or CRASHED) and no destination; other errors return None.
+        """
+        started = time.perf_counter()
+        try:
+            logging.info(f"Processing {filename}")
+            title, authors, date, summary = self.extract(filename)
             clean_stem = make_filename_safe(title["title"])
-            destination = filename.parent / (clean_stem + ".pdf")
+            canonical = self.duplicate_of.get(filename)
+            directory = self.pdf_root / DUPLICATES_DIR_NAME if self.dedupe and canonical else None
+            destination = self.destinations.claim(filename, clean_stem, authors, date, directory=directory)
 
-            print(f"{filename.name}  →  {destination.name}")
-            plan.append({
+            print(f"{filename.name}  →  {destination.relative_to(self.pdf_root)}")
+            entry = self._entry(filename, destination, STATUS_OK, title, authors, date, summary)
+            self._emit(entry, started)
+            return entry
+        except IsolatedParseError as e:
+            logging.error(f"Gave up parsing {filename}: {e}")
+            print(f"  {e.status}  {filename.name}: {e}")
+            self.errors += 1
+            entry = {"source": str(filename), "status": e.status, "error": str(e)}
+            self._emit(entry, started)
+            return entry
+        except Exception as e:
+            logging.error(f"Failed to process {filename}: {e}", exc_info=True)
+            print(f"  ERROR  {filename.name}: {e}")
+            self.errors += 1
+            self._emit({"source": str(filename), "status": STATUS_ERROR, "error": str(e)}, started)
+            return None
+
+    def _record(self, filename: Path, destination: Path, title, authors, date, summary) -> None:
+        """Write the --json and --sqlite outputs for a file placed at destination."""
+        if self.output_dir:
+            record = {
+                "title": title,
+                "authors": authors,
+                "date": date,
+                "summary": summary,
                 "source": str(filename),
-                "destination": str(destination),
+                "destination": destination.stem + ".pdf",
+            }
+            with open(self.output_dir / (destination.stem + ".json"), "w") as f:
+                json.dump(record, f, indent=2)
+            logging.info(f"Wrote metadata to {self.output_dir / (destination.stem + '.json')}")
+
+        if self.store:
+            self.store.add({
                 "title": title,
                 "authors": authors,
                 "date": date,
                 "summary": summary,
+                "source": str(filename),
+                "destination": str(destination),
             })
+
+    def link(self, filename: Path, title, authors, date, summary) -> tuple[str, Path]:
+        """Link filename into the view under its clean name, leaving it in place.
+
+        :return: (status, link path); a duplicate that is not linked keeps filename as its path
+        """
+        if self.dedupe and filename in self.duplicate_of:
+            logging.info(f"Not linking duplicate {filename} of {self.duplicate_of[filename]}")
+            print(f"  DUPLICATE  {filename.name}  (not linked)")
+            self.skipped += 1
+            return STATUS_DUPLICATE, filename
+        link, changed = self.view.place(filename, make_filename_safe(title["title"]), authors, date)
+        if not changed:
+            logging.info(f"View link already in place, skipping: {link}")
+            self.skipped += 1
+            return STATUS_UNCHANGED, link
+        self._record(filename, link, title, authors, date, summary)
+        logging.info(f"Linked {filename} → {link}")
+        print(f"  LINK  {filename.name}  →  {link.relative_to(self.view.root)}")
+        self.renamed += 1
+        return STATUS_LINKED, link
+
+    def rename(self, filename: Path, title, authors, date, summary) -> tuple[str, Path]:
+        """Rename filename to its clean name (a duplicate into DUPLICATES_DIR_NAME with dedupe).
+
+        :return: (status, new path)
+        """
+        clean_stem = make_filename_safe(title["title"])
+
+        if self.dedupe and filename in self.duplicate_of:
+            duplicates_dir = self.pdf_root / DUPLICATES_DIR_NAME
+            duplicates_dir.mkdir(exist_ok=True)
+            destination = self.destinations.move(filename, clean_stem, authors, date, directory=duplicates_dir)
+            if self.journal:
+                self.journal.record(filename, destination)
+            if self.manifest:
+                self.manifest.move(filename, destination)
+            logging.info(f"Moved duplicate {filename} → {destination}")
+            print(f"  DUPLICATE  {filename.name}  →  {destination.relative_to(self.pdf_root)}")
+            self.skipped += 1
+            return STATUS_DUPLICATE, destination
+
+        # The destination is only final once the no-clobber rename succeeded, so record after it
+        destination = self.destinations.move(filename, clean_stem, authors, date)
+
+        if filename in self.unchanged and destination == filename:
+            logging.info(f"Already processed, skipping: {filename}")
+            self.skipped += 1
+            return STATUS_UNCHANGED, destination
+        if self.journal and destination != filename:
+            self.journal.record(filename, destination)
+
+        self._record(filename, destination, title, authors, date, summary)
+        self.produced.add(destination)
+        if self.manifest:
+            self.manifest.move(filename, destination)
+        logging.info(f"Renamed {filename} → {destination}")
+        print(f"  OK  {filename.name}  →  {destination.name}")
+        self.renamed += 1
+        return STATUS_OK, destination
+
+    def process(self, filename: Path) -> None:
+        """Extract metadata for one PDF and rename it (or link it into the view), recording the outcome."""
+        started = time.perf_counter()
+        try:
+            logging.info(f"Processing {filename}")
+            title, authors, date, summary = self.extract(filename)
+            place = self.link if self.view is not None else self.rename
+            status, destination = place(filename, title, authors, date, summary)
+            self._emit(self._entry(filename, destination, status, title, authors, date, summary), started)
+        except IsolatedParseError as e:
+            logging.error(f"Gave up parsing {filename}: {e}")
+            print(f"  {e.status}  {filename.name}: {e}")
+            self.errors += 1
+            self._emit({"source": str(filename), "status": e.status, "error": str(e)}, started)
         except Exception as e:
             logging.error(f"Failed to process {filename}: {e}", exc_info=True)
             print(f"  ERROR  {filename.name}: {e}")
+            self.errors += 1
+            self._emit({"source": str(filename), "status": STATUS_ERROR, "error": str(e)}, started)
+
+
+def run_dry_run(
+    pdf_root: Path,
+    plan_file: Path,
+    dedupe: bool = False,
+    near_duplicates: NearDuplicateIndex | None = None,
+    extractor: OllamaExtractors | None = None,
+    manifest: Manifest | None = None,
+    text_backend: str | None = None,
+    isolation: IsolatedParser | None = None,
+    scheduler: Scheduler | None = None,
+    checkpoint: Path | None = None,
+    resume: bool = False,
+    shard: tuple[int, int] | None = None,
+    prefetcher: Prefetcher | None = None,
+    summary_tokens: int | None = None,
+    emitter: NdjsonWriter | None = None,
+) -> int:
+    """Run LLM extraction over all PDFs, print proposed renames, and save the plan.
+
+    Files whose parsing timed out or ran out of memory are kept in the plan
+    with that status so they show up in review; --apply skips them. With a
+    time budget the plan holds the files reached so far and the rest are saved
+    to checkpoint; resume adds them to the same plan. With shard (i, N) only
+    that shard's files are planned (see utils.sharding). A prefetcher reads
+    upcoming files ahead of the one being extracted. With summary_tokens, long
+    documents are summarized as a whole by map-reduce. An emitter gets each
+    plan entry (or error) as soon as its file is done.
+    """
+    logging.info(f"Dry run — reading PDFs from {pdf_root}")
+    plan: list[dict] = []
+    scheduler = scheduler or Scheduler()
+    session = RenameSession(
+        pdf_root, dedupe=dedupe, near_duplicates=near_duplicates, extractor=extractor, manifest=manifest,
+        text_backend=text_backend, isolation=isolation, prefetcher=prefetcher, summary_tokens=summary_tokens,
+        emitter=emitter,
+    )
+
+    pdfs = sorted(pdf_root.glob("*.pdf"))
+    if shard:
+        pdfs = select_shard(pdfs, *shard)
+    session.find_duplicates(pdfs)
+    if resume:
+        pdfs = resume_pending(pdfs, checkpoint, "dry-run", pdf_root, scheduler)
+        if plan_file.exists():
+            with open(plan_file) as f:
+                plan = json.load(f)
+        session.resume(plan)
+
+    def step(filename: Path) -> None:
+        entry = session.plan(filename)
+        if entry is not None:
+            plan.append(entry)
+
+    pending = run_batch(session, pdfs, scheduler, step)
 
+    report_near_duplicates(near_duplicates)
+    report_manifest(manifest)
+    report_isolation(isolation)
     plan_file.parent.mkdir(parents=True, exist_ok=True)
     with open(plan_file, "w") as f:
         json.dump(plan, f, indent=2)
-    print(f"\nPlan saved to {plan_file}  ({len(plan)} files)")
+    print(
+        f"\nPlan saved to {plan_file}  ({len(plan)} files, {len(session.duplicate_of)} duplicates, "
+        f"{session.destinations.collisions} renamed to avoid collisions)"
+    )
+    finish_batch(pending, checkpoint, "dry-run", pdf_root, scheduler, resume)
     return len(plan)
 
 
-def run_apply(plan_file: Path) -> None:
-    """Read the rename plan and perform the file renames."""
+def run_apply(plan_file: Path, journal_file: Path = Path(DEFAULT_JOURNAL_FILE)) -> None:
+    """Read the rename plan and perform the file renames, journaling each one."""
     if not plan_file.exists():
         print(f"Error: plan file not found: {plan_file}")
         sys.exit(1)
@@ -115,99 +991,259 @@ def run_apply(plan_file: Path) -> None:
         plan: list[dict] = json.load(f)
 
     logging.info(f"Applying rename plan from {plan_file} ({len(plan)} entries)")
-    renamed, skipped = 0, 0
+    renamed, skipped = apply_plan(plan, journal_file)
+    print(f"\nDone — {renamed} renamed, {skipped} skipped (journal: {journal_file})")
 
-    for entry in plan:
-        source = Path(entry["source"])
-        destination = Path(entry["destination"])
 
-        if not source.exists():
-            logging.warning(f"Source not found, skipping: {source}")
-            print(f"  SKIP (not found)  {source.name}")
-            skipped += 1
-            continue
+def run_rollback(journal_file: Path) -> None:
+    """Undo the renames recorded in the journal."""
+    if not journal_file.exists():
+        print(f"Error: journal file not found: {journal_file}")
+        sys.exit(1)
 
-        if destination.exists() and destination != source:
-            logging.warning(f"Destination already exists, skipping: {destination}")
-            print(f"  SKIP (exists)     {source.name}  →  {destination.name}")
-            skipped += 1
-            continue
+    restored, skipped = rollback_journal(journal_file)
+    print(f"\nDone — {restored} restored, {skipped} skipped")
 
-        source.rename(destination)
-        logging.info(f"Renamed {source} → {destination}")
-        print(f"  OK  {source.name}  →  {destination.name}")
-        renamed += 1
 
-    print(f"\nDone — {renamed} renamed, {skipped} skipped")
+def run_merge_plans(plan_files: list[Path], plan_file: Path) -> int:
+    """Merge shard plans into plan_file and return the number of entries."""
+    plans = []
+    for path in plan_files:
+        if not path.exists():
+            print(f"Error: plan file not found: {path}")
+            sys.exit(1)
+        with open(path) as f:
+            plans.append(json.load(f))
 
+    merged = merge_plans(plans)
+    planned = {entry["source"]: entry.get("destination") for plan in reversed(plans) for entry in plan}
+    moved = sum(1 for entry in merged if entry.get("destination") != planned[entry["source"]])
+    plan_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(plan_file, "w") as f:
+        json.dump(merged, f, indent=2)
+    print(f"Merged {len(plan_files)} plans into {plan_file}  ({len(merged)} files, {moved} destinations changed)")
+    return len(merged)
 
-def run_full(pdf_root: Path, output_dir: Path | None = None) -> tuple[int, int]:
-    """Run LLM extraction and rename each PDF in place.
+
+def run_search(db_path: Path, query: str) -> None:
+    """Print the best matches for query from the metadata database."""
+    if not db_path.exists():
+        print(f"Error: metadata database not found: {db_path}")
+        sys.exit(1)
+
+    with MetadataStore(db_path) as store:
+        results = store.search(query)
+    for result in results:
+        print(f"{result['rank']:8.2f}  {Path(result['destination']).name}")
+        print(f"          {result['title']['title']}  —  {result['authors']['authors']}")
+    print(f"\n{len(results)} matches")
+
+
+def run_full(
+    pdf_root: Path,
+    output_dir: Path | None = None,
+    dedupe: bool = False,
+    near_duplicates: NearDuplicateIndex | None = None,
+    store: MetadataStore | None = None,
+    extractor: OllamaExtractors | None = None,
+    manifest: Manifest | None = None,
+    text_backend: str | None = None,
+    isolation: IsolatedParser | None = None,
+    scheduler: Scheduler | None = None,
+    checkpoint: Path | None = None,
+    resume: bool = False,
+    view: View | None = None,
+    prefetcher: Prefetcher | None = None,
+    summary_tokens: int | None = None,
+    emitter: NdjsonWriter | None = None,
+    journal: RenameJournal | None = None,
+) -> tuple[int, int]:
+    """Run LLM extraction and rename each PDF in place (or link it into a view).
 
     :param pdf_root: Directory containing PDF files to process.
     :param output_dir: Optional directory to write one metadata JSON file per PDF.
                        Created automatically if it does not exist.
+    :param dedupe: Move byte-identical copies into the duplicates subdirectory
+                   (counted as skipped) instead of renaming them.
+    :param near_duplicates: Optional index used to reuse metadata across near-duplicates.
+    :param store: Optional SQLite metadata store receiving one record per renamed PDF.
+    :param extractor: Optional OllamaExtractors shared by every file.
+    :param manifest: Optional manifest used to skip files unchanged since the last run.
+    :param text_backend: Optional text backend name (see utils.pdf_content.TEXT_BACKENDS).
+    :param isolation: Optional IsolatedParser; files it gives up on are counted as errors.
+    :param scheduler: Processing order and optional time budget (default: by name, no budget).
+    :param checkpoint: Where files left by the time budget are recorded.
+    :param resume: Process only the files left pending in checkpoint.
+    :param view: Optional View; files are linked into it instead of renamed, and links
+                 of files no longer in pdf_root are removed.
+    :param prefetcher: Optional Prefetcher that reads upcoming files ahead of the one being processed.
+    :param summary_tokens: Summarize long documents as a whole by map-reduce within this token budget.
+    :param emitter: Optional NdjsonWriter receiving one record per file as soon as it is done.
+    :param journal: Optional RenameJournal recording each rename for --rollback.
     """
     logging.info(f"Reading PDFs from {pdf_root}")
-    if output_dir:
-        output_dir.mkdir(parents=True, exist_ok=True)
-    renamed, skipped, errors = 0, 0, 0
+    session = RenameSession(
+        pdf_root, output_dir, dedupe, near_duplicates, store, extractor, manifest, text_backend, isolation, view,
+        prefetcher, summary_tokens, emitter, journal,
+    )
 
-    for filename in tqdm.tqdm(list(pdf_root.glob("*.pdf"))):
-        try:
-            logging.info(f"Processing {filename}")
-            title, authors, date, summary = extract_from_pdf(filename)
-            if not title["title"]:
-                logging.info("Falling back to file title.")
-                title["title"] = make_filename_safe(filename.stem)
-            clean_stem = make_filename_safe(title["title"])
-            destination = filename.parent / (clean_stem + ".pdf")
+    scheduler = scheduler or Scheduler()
+    pdfs = all_pdfs = sorted(pdf_root.glob("*.pdf"))
+    if resume:
+        pdfs = resume_pending(pdfs, checkpoint, "full", pdf_root, scheduler)
+    session.find_duplicates(pdfs)
+    try:
+        pending = run_batch(session, pdfs, scheduler, session.process)
+    finally:
+        if view:
+            view.prune(all_pdfs)
+            view.save()
 
-            if destination.exists() and destination != filename:
-                logging.warning(f"Destination already exists, skipping: {destination}")
-                print(f"  SKIP (exists)  {filename.name}  →  {destination.name}")
-                skipped += 1
-                continue
+    report_near_duplicates(near_duplicates)
+    report_manifest(manifest)
+    report_isolation(isolation)
+    if view:
+        print(
+            f"\nDone — {view.linked} linked, {view.unchanged} already in place, {view.removed} removed, "
+            f"{session.errors} errors (view: {view.root})"
+        )
+    else:
+        print(
+            f"\nDone — {session.renamed} renamed, {session.skipped} skipped, {session.errors} errors, "
+            f"{session.destinations.collisions} renamed to avoid collisions"
+        )
+    finish_batch(pending, checkpoint, "full", pdf_root, scheduler, resume)
+    return session.renamed, session.skipped
 
-            if output_dir:
-                record = {
-                    "title": title,
-                    "authors": authors,
-                    "date": date,
-                    "summary": summary,
-                    "source": str(filename),
-                    "destination": clean_stem + ".pdf",
-                }
-                with open(output_dir / (clean_stem + ".json"), "w") as f:
-                    json.dump(record, f, indent=2)
-                logging.info(f"Wrote metadata to {output_dir / (clean_stem + '.json')}")
-
-            filename.rename(destination)
-            logging.info(f"Renamed {filename} → {destination}")
-            print(f"  OK  {filename.name}  →  {destination.name}")
-            renamed += 1
-        except Exception as e:
-            logging.error(f"Failed to process {filename}: {e}", exc_info=True)
-            print(f"  ERROR  {filename.name}: {e}")
-            errors += 1
 
-    print(f"\nDone — {renamed} renamed, {skipped} skipped, {errors} errors")
-    return renamed, skipped
+def run_watch(session: RenameSession, settle_seconds: float = SETTLE_SECONDS, stop=None) -> None:
+    """Rename PDFs (or link them into the session's view) as they land in pdf_root until interrupted.
+
+    Files already present at startup are left for a batch run; files this
+    session has just renamed are ignored when their rename event arrives.
+    Every arriving name is reserved in the destination index, which listed
+    pdf_root only once, so a later file with the same title (or a file that
+    failed) is never claimed as a destination.
+    """
+    def on_ready(path: Path) -> None:
+        if path in session.produced:
+            return
+        session.destinations.reserve(path)
+        with memprofile.document(path):
+            session.process(path)
+        if session.store:
+            session.store.commit()
+        if session.view:
+            session.view.save()
+
+    print(f"Watching {session.pdf_root} for new PDFs (Ctrl-C to stop)")
+    try:
+        watch_directory(session.pdf_root, on_ready, settle_seconds=settle_seconds, stop=stop)
+    except KeyboardInterrupt:
+        pass
+    report_near_duplicates(session.near_duplicates)
+    report_manifest(session.manifest)
+    report_isolation(session.isolation)
+    print(f"\nDone — {session.renamed} renamed, {session.skipped} skipped, {session.errors} errors")
 
 
 if __name__ == "__main__":
     args = parse_args()
 
-    logging.basicConfig(
-        format=FORMAT,
-        filename=args.log_path,
-        level=getattr(logging, args.log_level),
-    )
+    configure_logging(Path(args.log_path), getattr(logging, args.log_level), FORMAT)
 
     if args.apply:
-        run_apply(Path(args.plan_file))
-    elif args.dry_run:
-        run_dry_run(Path(args.pdf_root), Path(args.plan_file))
+        run_apply(Path(args.plan_file), Path(args.journal_file))
+    elif args.rollback:
+        run_rollback(Path(args.journal_file))
+    elif args.merge_plans:
+        run_merge_plans([Path(p) for p in args.merge_plans], Path(args.plan_file))
+    elif args.search is not None:
+        run_search(Path(args.sqlite or DEFAULT_METADATA_DB), args.search)
+    elif args.serve:
+        check_text_backend(args.text_backend)
+        chunk_cache = ChunkCache(Path(args.chunk_cache) if args.chunk_cache else None)
+        summary_tokens = args.summary_tokens if args.long_summaries else None
+        service = ExtractionService(
+            make_extractor(args.ollama_host, args.cascade, args.summary_mode, chunk_cache), args.workers,
+            args.max_pending, text_backend=args.text_backend, summary_tokens=summary_tokens,
+        )
+        try:
+            serve(service, port=args.port)
+        finally:
+            chunk_cache.save()
+            report_cascades(service.extractor)
+            report_summaries(service.extractor)
+            report_long_summaries(service.extractor)
+            report_concurrency()
     else:
-        output_dir = Path(args.json) if args.json else None
-        run_full(Path(args.pdf_root), output_dir)
+        check_text_backend(args.text_backend)
+        emitter = None
+        if args.emit == "ndjson":
+            # Records own stdout; everything printed for people goes to stderr
+            emitter = NdjsonWriter(sys.stdout)
+            sys.stdout = sys.stderr
+        near_duplicates = NearDuplicateIndex(args.near_duplicate_threshold) if args.near_duplicates else None
+        chunk_cache = ChunkCache(Path(args.chunk_cache) if args.chunk_cache else None)
+        summary_tokens = args.summary_tokens if args.long_summaries else None
+        extractor = make_extractor(args.ollama_host, args.cascade, args.summary_mode, chunk_cache)
+        plan_file, checkpoint = Path(args.plan_file), Path(args.checkpoint)
+        manifest_path = Path(args.manifest) if args.manifest else None
+        if args.shard:
+            plan_file, checkpoint = shard_path(plan_file, *args.shard), shard_path(checkpoint, *args.shard)
+            manifest_path = manifest_path and shard_path(manifest_path, *args.shard)
+        manifest = Manifest(manifest_path) if manifest_path else None
+        isolation = None if args.no_isolation else IsolatedParser(
+            args.parse_timeout, args.parse_memory_mb * 1024 * 1024
+        )
+        scheduler = Scheduler(args.order, args.time_budget)
+        prefetcher = Prefetcher(args.prefetch, args.prefetch_mb * 1024 * 1024) if args.prefetch else None
+        profiler = None
+        if args.memprofile:
+            profiler = MemoryProfiler(report_path_for(Path(args.log_path)), args.memprofile_every)
+            profiler.start()
+        try:
+            if args.dry_run:
+                run_dry_run(
+                    Path(args.pdf_root), plan_file, args.dedupe, near_duplicates, extractor, manifest,
+                    args.text_backend, isolation, scheduler, checkpoint, args.resume, args.shard, prefetcher,
+                    summary_tokens, emitter,
+                )
+            else:
+                output_dir = Path(args.json) if args.json else None
+                store = MetadataStore(Path(args.sqlite)) if args.sqlite else None
+                # A view only links files, so there is nothing to roll back
+                journal = None if args.view else RenameJournal(Path(args.journal_file))
+                try:
+                    view = View(Path(args.view), args.view_layout, args.view_link) if args.view else None
+                    if args.watch:
+                        session = RenameSession(
+                            Path(args.pdf_root), output_dir, args.dedupe, near_duplicates, store, extractor,
+                            manifest, args.text_backend, isolation, view, summary_tokens=summary_tokens,
+                            emitter=emitter, journal=journal,
+                        )
+                        run_watch(session, args.settle_seconds)
+                    else:
+                        run_full(
+                            Path(args.pdf_root), output_dir, args.dedupe, near_duplicates, store, extractor,
+                            manifest, args.text_backend, isolation, scheduler, checkpoint, args.resume, view,
+                            prefetcher, summary_tokens, emitter, journal,
+                        )
+                finally:
+                    if store:
+                        store.close()
+                    if journal:
+                        journal.close()
+        finally:
+            if isolation:
+                isolation.close()
+            if profiler:
+                profiler.stop()
+            chunk_cache.save()
+        report_memory(profiler)
+        report_prefetch(prefetcher)
+        report_extraction()
+        report_cascades(extractor)
+        report_summaries(extractor)
+        report_long_summaries(extractor)
+        report_concurrency()
@@ -1,7 +1,29 @@
 import logging
 import re
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable
 import ollama
 from pydantic import BaseModel, ValidationError
+from utils.concurrency import limiter_for
+from utils.local_summary import DEFAULT_SUMMARY_MODE, SUMMARY_MODES, local_summary
+from utils.long_summary import LONG_SUMMARY_WORKERS, ChunkCache, chunk_text, estimate_tokens, map_reduce, select_chunks
+
+RAW_RESPONSE_LOG_CHARS = 500   # DEBUG logs show at most this much of each raw LLM response
+CASCADE_TASKS = ("title", "authors", "summary")
+
+# Plausibility checks that decide whether a cascade escalates to its next model
+MIN_TITLE_LETTER_RATIO = 0.5   # share of a title's non-space characters that must be letters
+MAX_TITLE_WORDS = 40           # longer "titles" are usually the abstract or a whole text block
+MAX_AUTHOR_NAME_WORDS = 6
+MIN_SUMMARY_CHARS = 40
+# Venue and running-header text that small models return in place of the title
+_VENUE = re.compile(
+    r"^(journal of|proceedings of|transactions on|annals of|letters in|advances in|"
+    r"(\d{1,4}(st|nd|rd|th)\s+)?(international|annual)\s+(conference|workshop|symposium)|"
+    r"(ieee|acm|siam|springer|elsevier)\b|arxiv\b|preprint\b|vol(ume)?\.?\s*\d)",
+    re.IGNORECASE,
+)
 
 
 class Title(BaseModel):
@@ -17,6 +39,40 @@ class Summary(BaseModel):
     summary: str
 
 
+def implausible_title(result: Title) -> str | None:
+    """Return why title looks wrong (empty, mostly non-letters, a venue name, too long), or None."""
+    title = result.title.strip()
+    if not title:
+        return "empty title"
+    characters = [c for c in title if not c.isspace()]
+    if sum(c.isalpha() for c in characters) < MIN_TITLE_LETTER_RATIO * len(characters):
+        return "title is mostly non-letters"
+    if _VENUE.match(title):
+        return "title looks like a journal or venue name"
+    if len(title.split()) > MAX_TITLE_WORDS:
+        return "title is too long"
+    return None
+
+
+def implausible_authors(result: Authors) -> str | None:
+    """Return why the author list looks wrong (empty, names without letters or with digits), or None."""
+    if not result.authors_list:
+        return "no authors"
+    for name in result.authors_list:
+        if not any(c.isalpha() for c in name) or any(c.isdigit() or c == "@" for c in name):
+            return f"implausible author name {name!r}"
+        if len(name.split()) > MAX_AUTHOR_NAME_WORDS:
+            return f"author name too long: {name!r}"
+    return None
+
+
+def implausible_summary(result: Summary) -> str | None:
+    """Return why the summary looks wrong (empty or a fragment), or None."""
+    if len(result.summary.strip()) < MIN_SUMMARY_CHARS:
+        return "summary is empty or too short"
+    return None
+
+
 class OllamaExtractors:
     # Text analysis tasks: structured extraction from already-decoded text
     TITLE_MODEL = "qwen3.5:latest"
@@ -48,6 +104,22 @@ class OllamaExtractors:
         "provide you with a text document, and your task is to create a 1-2 paragraph "
         "abstract. Format the result as json with key 'summary'."
     )
+    # Long documents: summaries of consecutive parts, merged and reduced to one abstract
+    CHUNK_SUMMARY_PROMPT = (
+        "You are summarizing one part of a longer document. The user will provide the text of "
+        "that part. Summarize its main points, findings and any conclusions in 3-5 sentences, "
+        "without introductory phrases. Format the result as json with key 'summary'."
+    )
+    MERGE_SUMMARY_PROMPT = (
+        "The user will provide summaries of consecutive parts of one document, in order. "
+        "Combine them into a single summary of those parts in 5-8 sentences, keeping the most "
+        "important points. Format the result as json with key 'summary'."
+    )
+    REDUCE_SUMMARY_PROMPT = (
+        "The user will provide summaries of consecutive parts of one document, in order. "
+        "Write a 1-2 paragraph abstract of the whole document from them. "
+        "Format the result as json with key 'summary'."
+    )
     # OCR fallback: used only when PyPDF cannot extract text (scanned/image-based PDFs)
     OCR_MODEL = "deepseek-ocr:latest"
     OCR_MODEL_PROMPT = (
@@ -56,9 +128,63 @@ class OllamaExtractors:
     )
     HOST = "http://192.168.1.90:11434"
 
-    def __init__(self) -> None:
-        self.client = ollama.Client(host=self.HOST)
-        logging.info(f"Using ollama client against host at {self.HOST}")
+    def __init__(
+        self,
+        host: str | None = None,
+        cascades: dict[str, list[str]] | None = None,
+        summary_mode: str = DEFAULT_SUMMARY_MODE,
+        chunk_cache: ChunkCache | None = None,
+    ) -> None:
+        """
+        :param host: Ollama server URL (default: HOST)
+        :param cascades: Models to try in order per task ("title", "authors", "summary"),
+                         typically a small fast model then a larger one. The next model
+                         is asked only when an answer fails validation or looks implausible.
+                         Tasks not given use their single *_MODEL.
+        :param summary_mode: "llm" (always summarize with the summary cascade) or "local"
+                             (use the document's abstract or a TextRank extract, and the
+                             LLM only when neither is found)
+        :param chunk_cache: Cache of chunk summaries for summarize_long (default: a new
+                            in-memory one)
+        :raises ValueError: unknown task, empty model list or unknown summary mode
+        """
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"unknown summary mode {summary_mode!r}; choose from {', '.join(SUMMARY_MODES)}")
+        self.summary_mode = summary_mode
+        self.host = host or self.HOST
+        self.client = ollama.Client(host=self.host)
+        # Shared by every client of this host, so concurrent callers adapt together
+        self.limiter = limiter_for(self.host)
+        self.cascades = {"title": [self.TITLE_MODEL], "authors": [self.AUTHORS_MODEL], "summary": [self.SUMMARY_MODEL]}
+        for task, models in (cascades or {}).items():
+            if task not in CASCADE_TASKS:
+                raise ValueError(f"unknown cascade task {task!r}; choose from {', '.join(CASCADE_TASKS)}")
+            if not models:
+                raise ValueError(f"cascade for {task} has no models")
+            self.cascades[task] = list(models)
+        # Per task: documents asked, documents escalated, and the model each cascade stopped at
+        self.cascade_counters: Counter = Counter()
+        # Summaries by method: "abstract", "textrank" or "llm"
+        self.summary_counters: Counter = Counter()
+        self.chunk_cache = chunk_cache if chunk_cache is not None else ChunkCache()
+        # Long-document summaries: documents, chunks summarized, chunks dropped by the
+        # token budget, chunks answered from the cache, and estimated input tokens sent
+        self.long_summary_counters: Counter = Counter()
+        self._counters_lock = threading.Lock()
+        logging.info(f"Using ollama client against host at {self.host}")
+
+    def _chat(self, **kwargs) -> dict:
+        """client.chat under the host's adaptive concurrency limit.
+
+        The prompt size (message characters plus image bytes) is passed along, so
+        a long prompt is timed against earlier prompts of similar length.
+        """
+        size = sum(
+            len(message.get("content", "")) + sum(len(image) for image in message.get("images", ()))
+            for message in kwargs["messages"]
+        )
+        with self.limiter.slot(kwargs["model"], size):
+            return self.client.chat(**kwargs)
 
     def json_loads_with_stringify(self, x: str) -> str:
         """Extract a JSON object string from an LLM response.
@@ -67,7 +193,7 @@ class OllamaExtractors:
         wrappers, and other common LLM response formats. Returns the raw JSON
         string for Pydantic to parse.
         """
-        logging.debug(f"Raw LLM response: {x}")
+        logging.debug(f"Raw LLM response ({len(x)} chars): {x[:RAW_RESPONSE_LOG_CHARS]}")
         # Strip chain-of-thought reasoning blocks emitted by thinking models (e.g. qwen3.5)
         x = re.sub(r'<think>.*?</think>', '', x, flags=re.DOTALL).strip()
         match = re.search(r'\{[^{}]*\}', x, re.DOTALL)
@@ -79,22 +205,25 @@ class OllamaExtractors:
             x = x[4:].strip()
         return x
 
-    def ocr_page_images(self, images: list) -> str:
+    def ocr_page_images(self, images: Iterable) -> str:
         """Extract text from PDF page images using the OCR model.
 
         Used as a fallback when PyPDF cannot extract text from a page
         (e.g. scanned or image-based PDFs). Each image's .data bytes are sent
-        to the OCR model and results are joined.
+        to the OCR model and results are joined. images may be a lazy iterator;
+        each image is consumed (and can be freed) before the next is produced.
 
-        :param images: List of pypdf ImageFile objects (must have a .data attribute)
-        :type images: list
+        :param images: Iterable of objects with a .data attribute (pypdf ImageFile, OcrImage)
+        :type images: Iterable
         :return: Extracted text from all images on the page
         :rtype: str
         """
-        logging.info(f"Running OCR with model {self.OCR_MODEL} on {len(images)} image(s)...")
+        logging.info(f"Running OCR with model {self.OCR_MODEL}...")
         text_parts = []
+        count = 0
         for img in images:
-            response = self.client.chat(
+            count += 1
+            response = self._chat(
                 model=self.OCR_MODEL,
                 messages=[{
                     "role": "user",
@@ -105,78 +234,174 @@ class OllamaExtractors:
             text = response["message"]["content"].strip()
             if text:
                 text_parts.append(text)
+        logging.info(f"OCR processed {count} image(s)")
         return "\n".join(text_parts)
 
+    def _cascade(
+        self,
+        task: str,
+        schema: type[BaseModel],
+        prompt: str,
+        content: str,
+        implausible: Callable[[BaseModel], str | None],
+        empty: BaseModel,
+        count: bool = True,
+    ) -> BaseModel:
+        """Ask each model of task's cascade in turn until one gives a valid, plausible answer.
+
+        If none does, the last valid answer is returned (an implausible answer from
+        the largest model may still be right, e.g. a paper without authors), or
+        empty if no answer validated. With count=False the call is left out of
+        cascade_counters (for partial calls such as chunk summaries).
+        """
+        models = self.cascades[task]
+        answer = None
+        for index, model in enumerate(models):
+            logging.info(f"Getting {task} with model {model}...")
+            response = self._chat(
+                model=model,
+                format=schema.model_json_schema(),
+                think=False,
+                messages=[
+                    {"role": "system", "content": prompt},
+                    {"role": "user", "content": content},
+                ],
+            )
+            try:
+                answer = schema.model_validate_json(
+                    self.json_loads_with_stringify(response["message"]["content"])
+                )
+                reason = implausible(answer)
+            except ValidationError as e:
+                logging.error(f"Failed to synthesize {task} from ollama response: {e}")
+                logging.error(f"Failed to parse {task} from ollama response: {response['message']['content']}")
+                reason = "invalid response"
+            if reason is None or index == len(models) - 1:
+                break
+            logging.info(f"Escalating {task} from {model} to {models[index + 1]}: {reason}")
+        if count:
+            with self._counters_lock:
+                self.cascade_counters.update({(task, "documents"): 1, (task, "stopped_at", model): 1})
+                if index:
+                    self.cascade_counters[(task, "escalated")] += 1
+        return answer if answer is not None else empty
+
+    def cascade_report(self) -> dict[str, dict]:
+        """Per task with more than one model: documents, escalated, and how many cascades stopped at each model."""
+        with self._counters_lock:
+            counters = dict(self.cascade_counters)
+        report = {}
+        for task, models in self.cascades.items():
+            if len(models) < 2:
+                continue
+            report[task] = {
+                "documents": counters.get((task, "documents"), 0),
+                "escalated": counters.get((task, "escalated"), 0),
+                "stopped_at": {model: counters.get((task, "stopped_at", model), 0) for model in models},
+            }
+        return report
+
+    def _local_summary(self, full_text: str) -> dict | None:
+        """In "local" summary mode, the document's abstract or a TextRank extract, if either works."""
+        if self.summary_mode != "local":
+            return None
+        local = local_summary(full_text.split("\n"))
+        if local is None:
+            logging.info("No abstract and too little text to rank; summarizing with the LLM")
+            return None
+        method, text = local
+        logging.info(f"Summary taken from the document ({method}, {len(text)} chars)")
+        with self._counters_lock:
+            self.summary_counters[method] += 1
+        return {"summary": text}
+
     def summarize_text(self, full_text: str) -> dict:
-        """Create a 1-2 paragraph abstract from document text."""
-        logging.info(f"Summarizing with model {self.SUMMARY_MODEL}...")
-        response = self.client.chat(
-            model=self.SUMMARY_MODEL,
-            format=Summary.model_json_schema(),
-            think=False,
-            messages=[
-                {"role": "system", "content": self.SUMMARY_MODEL_PROMPT},
-                {"role": "user", "content": full_text},
-            ],
+        """Create a 1-2 paragraph abstract from document text.
+
+        In "local" summary mode the document's own abstract, or failing that a
+        TextRank extract, is used and the LLM is only called when neither works.
+        """
+        local = self._local_summary(full_text)
+        if local is not None:
+            return local
+        with self._counters_lock:
+            self.summary_counters["llm"] += 1
+        summary = self._cascade(
+            "summary", Summary, self.SUMMARY_MODEL_PROMPT, full_text, implausible_summary, Summary(summary=""),
         )
-        try:
-            t = Summary.model_validate_json(
-                self.json_loads_with_stringify(response["message"]["content"])
-            )
-        except ValidationError as e:
-            logging.error(f"Failed to synthesize summary from ollama response: {e}")
-            logging.error(
-                f"Failed to synthesize summary from ollama response: {response['message']['content']}"
+        return summary.model_dump(mode="json")
+
+    def summarize_long(self, full_text: str, token_budget: int, workers: int = LONG_SUMMARY_WORKERS) -> dict:
+        """Create a 1-2 paragraph abstract of a long document by map-reduce.
+
+        The text is cut into chunks (see utils.long_summary.chunk_text). Up to
+        workers chunks are summarized at once, and the partial summaries are
+        reduced to one abstract (in rounds if they are too long for one call).
+        If the chunks would exceed token_budget tokens of document text,
+        evenly spaced chunks are kept; the reduce calls are not counted
+        against it. Chunk summaries are cached in chunk_cache. "local" summary
+        mode still prefers the document's own abstract.
+
+        :param full_text: Document text, already sampled to about token_budget (see read_pdf_text)
+        :param token_budget: Maximum estimated tokens of document text sent to the chunk calls
+        :param workers: Chunks summarized concurrently
+        """
+        local = self._local_summary(full_text)
+        if local is not None:
+            return local
+        chunks = chunk_text(full_text)
+        selected = select_chunks(chunks, token_budget)
+        logging.info(
+            f"Summarizing {len(selected)} of {len(chunks)} chunks ({len(full_text)} chars) with map-reduce"
+        )
+        models = ",".join(self.cascades["summary"])
+        counts: Counter = Counter()
+        counts_lock = threading.Lock()
+
+        def summarize_chunk(chunk: str) -> str:
+            key = ChunkCache.key(models, self.CHUNK_SUMMARY_PROMPT, chunk)
+            cached = self.chunk_cache.get(key)
+            if cached is not None:
+                with counts_lock:
+                    counts["cached"] += 1
+                return cached
+            with counts_lock:
+                counts["tokens"] += estimate_tokens(chunk)
+            summary = self._cascade(
+                "summary", Summary, self.CHUNK_SUMMARY_PROMPT, chunk, implausible_summary, Summary(summary=""),
+                count=False,
+            ).summary
+            if summary:
+                self.chunk_cache.put(key, summary)
+            return summary
+
+        def combine(summaries: str, final: bool) -> str:
+            with counts_lock:
+                counts["tokens"] += estimate_tokens(summaries)
+            prompt = self.REDUCE_SUMMARY_PROMPT if final else self.MERGE_SUMMARY_PROMPT
+            return self._cascade(
+                "summary", Summary, prompt, summaries, implausible_summary, Summary(summary=""), count=final,
+            ).summary
+
+        summary = map_reduce(selected, summarize_chunk, combine, workers)
+        with self._counters_lock:
+            self.summary_counters["llm"] += 1
+            self.long_summary_counters.update(
+                documents=1, chunks=len(selected), dropped=len(chunks) - len(selected), **counts,
             )
-            t = Summary(summary="")
-        return t.model_dump(mode="json")
+        return {"summary": summary}
 
     def llm_authors(self, x: list[str]) -> dict:
         """Extract author names from the first lines of a document."""
-        logging.info(f"Getting authors with model {self.AUTHORS_MODEL}...")
-        full_text = "\n".join(x)
-        response = self.client.chat(
-            model=self.AUTHORS_MODEL,
-            format=Authors.model_json_schema(),
-            think=False,
-            messages=[
-                {"role": "system", "content": self.AUTHORS_MODEL_PROMPT},
-                {"role": "user", "content": full_text},
-            ],
+        authors = self._cascade(
+            "authors", Authors, self.AUTHORS_MODEL_PROMPT, "\n".join(x), implausible_authors,
+            Authors(authors_list=[], authors=""),
         )
-        try:
-            t = Authors.model_validate_json(
-                self.json_loads_with_stringify(response["message"]["content"])
-            )
-        except ValidationError as e:
-            logging.error(f"Failed to synthesize authors from ollama response: {e}")
-            logging.error(
-                f"Failed to parse authors from ollama response: {response['message']['content']}"
-            )
-            t = Authors(authors_list=[], authors="")
-        return t.model_dump(mode="json")
+        return authors.model_dump(mode="json")
 
     def llm_title(self, x: list[str]) -> dict:
         """Extract the document title from the first lines of a document."""
-        logging.info(f"Getting title with model {self.TITLE_MODEL}...")
-        full_text = "\n".join(x)
-        response = self.client.chat(
-            model=self.TITLE_MODEL,
-            format=Title.model_json_schema(),
-            think=False,
-            messages=[
-                {"role": "system", "content": self.TITLE_MODEL_PROMPT},
-                {"role": "user", "content": full_text},
-            ],
+        title = self._cascade(
+            "title", Title, self.TITLE_MODEL_PROMPT, "\n".join(x), implausible_title, Title(title=""),
         )
-        try:
-            t = Title.model_validate_json(
-                self.json_loads_with_stringify(response["message"]["content"])
-            )
-        except ValidationError as e:
-            logging.error(f"Failed to synthesize title from ollama response: {e}")
-            logging.error(
-                f"Failed to parse title from ollama response: {response['message']['content']}"
-            )
-            t = Title(title="")
-        return t.model_dump(mode="json")
+        return title.model_dump(mode="json")
@@ -0,0 +1,112 @@
+"""Shared fixtures: a stand-in Ollama server and a minimal text-PDF writer."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+
+def make_text_pdf(path: Path, lines: list[str]) -> Path:
+    """Write a one-page PDF whose text layer contains lines (Helvetica, no dependencies)."""
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    stream = "BT /F1 12 Tf 72 740 Td 14 TL " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+    return path
+
+
+class FakeOllama:
+    """Answers /api/chat like Ollama, filling the requested JSON schema with canned values.
+
+    latency adds a fixed delay per request; requests records every chat body.
+    With capacity, the server behaves like a GPU serving that many requests in
+    parallel: beyond it, requests queue and latency grows in proportion to the
+    number in flight. peak_active records the most requests seen at once.
+    """
+
+    ANSWERS = {
+        "title": {"title": "Fake Title"},
+        "authors": {"authors": "Jane Doe", "authors_list": ["Jane Doe"]},
+        "summary": {"summary": "A fake summary."},
+    }
+
+    def __init__(self, latency: float = 0.0, capacity: int | None = None) -> None:
+        self.latency = latency
+        self.capacity = capacity
+        self.active, self.peak_active = 0, 0
+        self.requests: list[dict] = []
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with fake._lock:
+                    fake.requests.append(body)
+                    fake.active += 1
+                    fake.peak_active = max(fake.peak_active, fake.active)
+                    load = fake.active / fake.capacity if fake.capacity else 1.0
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency * max(1.0, load))
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+                properties = (body.get("format") or {}).get("properties", {})
+                answer = next((fake.ANSWERS[key] for key in fake.ANSWERS if key in properties), None)
+                content = json.dumps(answer) if answer else "Fake OCR text"
+                payload = json.dumps({
+                    "model": body.get("model", ""),
+                    "created_at": "2026-01-01T00:00:00Z",
+                    "message": {"role": "assistant", "content": content},
+                    "done": True,
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def fake_ollama():
+    server = FakeOllama()
+    yield server
+    server.close()
@@ -0,0 +1,107 @@
+"""Unit tests for utils/api.py."""
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from utils.api import IN_FLIGHT_PER_WORKER, TEXT_BACKEND_NAMES, ExtractionResult, extract_many
+
+RESULT = (
+    {"title": "A Title"},
+    {"authors": "Jane Doe, John Roe", "authors_list": ["Jane Doe", "John Roe"]},
+    {"date": "2020-01-01 00:00:00", "date_line": "January 2020"},
+    {"summary": "A summary."},
+)
+
+
+def fake_extract(path, stats=None, **kwargs):
+    stats.update(pages=1, ocr_pages=1, ocr_calls_avoided=2, read_seconds=0.01, llm_seconds=0.02)
+    if path.name.startswith("bad"):
+        raise ValueError("broken xref")
+    return RESULT
+
+
+def test_text_backend_names_match_the_backends():
+    """The CLI's --text-backend choices come from utils.api without importing utils.pdf_content."""
+    from utils.pdf_content import TEXT_BACKENDS
+
+    assert set(TEXT_BACKEND_NAMES) == set(TEXT_BACKENDS)
+
+
+class TestExtractionResult:
+    def test_uses_slots(self):
+        result = ExtractionResult(Path("a.pdf"))
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.unexpected = 1
+
+
+class TestExtractMany:
+    @patch("utils.api.extract_from_pdf", side_effect=fake_extract)
+    def test_yields_flattened_results_with_timings(self, _):
+        results = list(extract_many([Path("a.pdf")], workers=1, extractor=Mock()))
+
+        assert len(results) == 1
+        result = results[0]
+        assert result.ok
+        assert result.title == "A Title"
+        assert result.authors == ("Jane Doe", "John Roe")
+        assert result.date == "2020-01-01 00:00:00"
+        assert result.summary == "A summary."
+        assert (result.pages, result.read_seconds, result.llm_seconds) == (1, 0.01, 0.02)
+        assert (result.ocr_pages, result.ocr_calls_avoided) == (1, 2)
+        assert result.total_seconds >= 0
+
+    @patch("utils.api.extract_from_pdf", side_effect=fake_extract)
+    def test_failure_becomes_error_result(self, _):
+        paths = [Path("good1.pdf"), Path("bad.pdf"), Path("good2.pdf")]
+        results = {r.path.name: r for r in extract_many(paths, workers=2, extractor=Mock())}
+
+        assert set(results) == {"good1.pdf", "bad.pdf", "good2.pdf"}
+        assert results["bad.pdf"].error == "broken xref"
+        assert results["bad.pdf"].title is None
+        assert results["good2.pdf"].ok
+
+    @patch("utils.api.extract_from_pdf", side_effect=fake_extract)
+    def test_passes_requested_fields(self, mock_extract):
+        list(extract_many([Path("a.pdf")], fields=["title"], extractor=Mock()))
+        assert mock_extract.call_args.kwargs["fields"] == frozenset({"title"})
+
+    def test_rejects_unknown_fields(self):
+        with pytest.raises(ValueError, match="abstract"):
+            list(extract_many([Path("a.pdf")], fields=["title", "abstract"], extractor=Mock()))
+
+    def test_yields_in_completion_order(self):
+        def slow_first(path, stats=None, **kwargs):
+            if path.name == "slow.pdf":
+                time.sleep(0.3)
+            return RESULT
+
+        with patch("utils.api.extract_from_pdf", side_effect=slow_first):
+            names = [r.path.name for r in extract_many([Path("slow.pdf"), Path("fast.pdf")], workers=2,
+                                                       extractor=Mock())]
+        assert names == ["fast.pdf", "slow.pdf"]
+
+    def test_consumes_input_lazily(self):
+        """Only a bounded window of paths is pulled from the input ahead of the consumer."""
+        pulled = []
+        release = threading.Event()
+
+        def paths():
+            for i in range(1000):
+                pulled.append(i)
+                yield Path(f"{i}.pdf")
+
+        def blocking(path, stats=None, **kwargs):
+            release.wait(5)
+            return RESULT
+
+        with patch("utils.api.extract_from_pdf", side_effect=blocking):
+            stream = extract_many(paths(), workers=2, extractor=Mock())
+            threading.Timer(0.2, release.set).start()
+            next(stream)
+            stream.close()
+
+        assert len(pulled) <= 2 * IN_FLIGHT_PER_WORKER + 2
@@ -0,0 +1,64 @@
+"""Tests for bin/benchmark-text-backends.py."""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import make_text_pdf
+from utils.pdf_content import available_text_backends
+
+_BIN = Path(__file__).resolve().parent.parent / "bin" / "benchmark-text-backends.py"
+_spec = importlib.util.spec_from_file_location("benchmark_text_backends", _BIN)
+harness = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(harness)
+
+
+def _corpus(directory: Path, documents: int, lines: int) -> list[Path]:
+    return [
+        make_text_pdf(directory / f"doc{i:03d}.pdf", [f"Document {i} line {j} with some words" for j in range(lines)])
+        for i in range(documents)
+    ]
+
+
+class TestAgreement:
+    def test_identical_text(self):
+        assert harness.agreement("alpha beta\ngamma", "alpha beta gamma") == 1.0
+
+    def test_disjoint_text(self):
+        assert harness.agreement("alpha beta", "gamma delta") == 0.0
+
+    def test_both_empty(self):
+        assert harness.agreement("", "") == 1.0
+
+
+class TestCompare:
+    def test_reports_rate_and_agreement(self, tmp_path):
+        pdfs = _corpus(tmp_path, 3, 5)
+        rows = harness.compare(available_text_backends(), pdfs, "pypdf")
+
+        by_backend = {row["backend"]: row for row in rows}
+        assert by_backend["pypdf"]["pages"] == 3
+        assert by_backend["pypdf"]["mean_agreement"] == 1.0
+        for row in rows:
+            assert row["failures"] == 0
+            assert row["pages_per_second"] > 0
+            assert row["min_agreement"] > 0.9
+
+    def test_counts_unreadable_files(self, tmp_path):
+        pdfs = _corpus(tmp_path, 1, 2)
+        (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+        rows = harness.compare(["pypdf"], pdfs + [tmp_path / "broken.pdf"], "pypdf")
+        assert rows[0]["failures"] == 1
+        assert rows[0]["pages"] == 1
+
+
+@pytest.mark.benchmark
+class TestBackendThroughput:
+    def test_installed_backends(self, tmp_path):
+        pdfs = _corpus(tmp_path, 40, 50)
+        rows = harness.compare(available_text_backends(), pdfs, "pypdf")
+        print()
+        for row in rows:
+            print(f"{row['backend']:<10} {row['pages_per_second']:8.1f} pages/s  "
+                  f"agreement mean {row['mean_agreement']:.3f} min {row['min_agreement']:.3f}")
+        assert all(row["failures"] == 0 for row in rows)
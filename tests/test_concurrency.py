@@ -0,0 +1,177 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llms.extractors import OllamaExtractors
+from tests.conftest import FakeOllama
+from utils.concurrency import BACKOFF_FACTOR, AdaptiveLimiter, limiter_for, limiters
+
+
+def _call(limiter, kind="m", latency=0.01, size=0):
+    sequence = limiter.acquire()
+    limiter.release(sequence, kind, latency, size)
+
+
+class TestAdaptiveLimiter:
+    def test_grows_additively_while_saturated(self):
+        limiter = AdaptiveLimiter(initial=2)
+        first, second = limiter.acquire(), limiter.acquire()
+
+        limiter.release(first, "m", 0.01)       # 2 in flight, at the limit: 2 -> 2.5
+        third = limiter.acquire()
+        limiter.release(second, "m", 0.01)      # 2.5 -> 2.9
+        limiter.release(third, "m", 0.01)       # 1 in flight: not using the limit
+
+        # Roughly one more slot per round of calls
+        assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+
+    def test_does_not_grow_while_unused(self):
+        limiter = AdaptiveLimiter(initial=4)
+
+        for _ in range(10):
+            _call(limiter)
+
+        assert limiter.limit == 4
+
+    def test_slow_call_halves_limit(self):
+        limiter = AdaptiveLimiter(initial=8)
+        _call(limiter, latency=0.01)
+
+        _call(limiter, latency=0.05)
+
+        assert limiter.limit == 8 * BACKOFF_FACTOR
+        assert limiter.backoffs == 1
+
+    def test_baselines_are_per_kind(self):
+        limiter = AdaptiveLimiter(initial=8)
+        _call(limiter, kind="small", latency=0.01)
+
+        _call(limiter, kind="large", latency=1.0)
+
+        assert limiter.backoffs == 0
+
+    def test_baselines_are_per_prompt_size(self):
+        limiter = AdaptiveLimiter(initial=8)
+        _call(limiter, latency=0.2, size=600)
+
+        # A 16x longer prompt is not compared with the short one
+        _call(limiter, latency=1.0, size=8000)
+        assert limiter.backoffs == 0
+        assert limiter.baseline("m", 8000) == 1.0
+
+        # A prompt of similar length is
+        _call(limiter, latency=1.0, size=900)
+        assert limiter.backoffs == 1
+
+    def test_chat_reports_prompt_size(self):
+        extractor = OllamaExtractors(host="http://size-test:1")
+        sizes = []
+
+        class Limiter:
+            def slot(self, kind, size=0):
+                sizes.append((kind, size))
+                return threading.Lock()
+
+        extractor.limiter = Limiter()
+        extractor.client = type("Client", (), {"chat": lambda self, **kwargs: {}})()
+        extractor._chat(model="ocr", messages=[{"role": "user", "content": "read this", "images": [b"12345"]}])
+
+        assert sizes == [("ocr", len("read this") + 5)]
+
+    def test_error_halves_limit(self):
+        limiter = AdaptiveLimiter(initial=8)
+
+        with pytest.raises(ConnectionError), limiter.slot("m"):
+            raise ConnectionError("refused")
+
+        assert (limiter.limit, limiter.errors, limiter.in_flight) == (4, 1, 0)
+
+    def test_one_backoff_per_burst(self):
+        limiter = AdaptiveLimiter(initial=8)
+        _call(limiter, latency=0.01)
+        burst = [limiter.acquire() for _ in range(8)]
+
+        for sequence in burst:
+            limiter.release(sequence, "m", 0.05)
+
+        assert limiter.limit == 4
+        assert limiter.backoffs == 1
+
+    def test_never_below_minimum(self):
+        limiter = AdaptiveLimiter(initial=1)
+
+        for _ in range(3):
+            _call(limiter, latency=None)
+
+        assert limiter.limit == 1
+
+    def test_blocks_beyond_limit(self):
+        limiter = AdaptiveLimiter(initial=1)
+        held = limiter.acquire()
+        entered = threading.Event()
+
+        def second():
+            with limiter.slot("m"):
+                entered.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not entered.wait(0.1)
+        limiter.release(held, "m", 0.01)
+        assert entered.wait(5)
+        thread.join()
+        assert limiter.waits == 1
+        assert limiter.peak_in_flight == 1
+
+    def test_limiter_shared_per_host(self):
+        assert limiter_for("http://a:1") is limiter_for("http://a:1")
+        assert limiter_for("http://a:1") is not limiter_for("http://b:1")
+        assert "http://a:1" in limiters()
+
+
+class TestAgainstCapacityCurve:
+    """A stand-in Ollama that serves `capacity` requests in parallel and queues the rest."""
+
+    @staticmethod
+    def _hammer(extractor, callers, calls_each):
+        def caller():
+            for _ in range(calls_each):
+                extractor.llm_title(["A Title"])
+
+        with ThreadPoolExecutor(callers) as pool:
+            for future in [pool.submit(caller) for _ in range(callers)]:
+                future.result()
+
+    def test_limit_settles_near_capacity(self):
+        capacity, callers, latency = 4, 16, 0.05
+        fake = FakeOllama(latency=latency, capacity=capacity)
+        try:
+            extractor = OllamaExtractors(host=fake.host)
+            self._hammer(extractor, callers, calls_each=8)
+        finally:
+            fake.close()
+
+        limiter = extractor.limiter
+        assert limiter.backoffs >= 1
+        assert limiter.errors == 0
+        # AIMD oscillates between about capacity (latency at baseline) and
+        # 2 * capacity (latency at LATENCY_TOLERANCE times baseline)
+        assert capacity / 2 <= limiter.limit <= 3 * capacity
+        # Unlimited, all 16 callers would be queued at the server at once
+        assert fake.peak_active <= 3 * capacity
+
+    def test_grows_to_demand_when_server_keeps_up(self):
+        callers, calls_each, latency = 8, 6, 0.05
+        fake = FakeOllama(latency=latency)
+        try:
+            extractor = OllamaExtractors(host=fake.host)
+            started = time.perf_counter()
+            self._hammer(extractor, callers, calls_each)
+            elapsed = time.perf_counter() - started
+        finally:
+            fake.close()
+
+        assert extractor.limiter.peak_in_flight == callers
+        assert elapsed < callers * calls_each * latency / 2
@@ -0,0 +1,136 @@
+"""Unit tests for utils/destinations.py."""
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils.destinations import DestinationIndex, _first_author_surname, _year_from_date, rename_no_clobber
+
+AUTHORS = {"authors": "Jane Doe", "authors_list": ["Jane Doe"]}
+DATE = {"date": "('March 2019', datetime.datetime(2019, 3, 1, 0, 0))", "date_line": "March 2019"}
+
+
+class TestHelpers:
+    def test_year_from_date(self):
+        assert _year_from_date(DATE) == "2019"
+
+    def test_year_from_date_none(self):
+        assert _year_from_date(None) == ""
+
+    def test_first_author_surname(self):
+        assert _first_author_surname(AUTHORS) == "Doe"
+
+    def test_first_author_surname_empty(self):
+        assert _first_author_surname({"authors": "", "authors_list": []}) == ""
+
+
+class TestDestinationIndex:
+    def test_unique_title_is_unchanged(self, tmp_path):
+        index = DestinationIndex()
+        assert index.claim(tmp_path / "a.pdf", "Intro") == tmp_path / "Intro.pdf"
+        assert index.collisions == 0
+
+    def test_suffix_order_author_year_hash(self, tmp_path):
+        index = DestinationIndex()
+        names = [
+            index.claim(tmp_path / f"{i}.pdf", "Intro", AUTHORS, DATE).name
+            for i in range(4)
+        ]
+        assert names[:3] == ["Intro.pdf", "Intro_Doe.pdf", "Intro_Doe_2019.pdf"]
+        assert names[3].startswith("Intro_") and len(names[3]) == len("Intro_.pdf") + 8
+        assert index.collisions == 3
+
+    def test_hash_suffix_is_deterministic(self, tmp_path):
+        indexes = [DestinationIndex() for _ in range(2)]
+        results = []
+        for index in indexes:
+            index.claim(tmp_path / "x.pdf", "Intro")
+            results.append(index.claim(tmp_path / "y.pdf", "Intro"))
+        assert results[0] == results[1]
+
+    def test_hash_suffixed_name_is_kept(self, tmp_path):
+        (tmp_path / "Intro.pdf").touch()
+        (tmp_path / "Intro_9da0a9b8.pdf").touch()
+        index = DestinationIndex()
+        assert index.claim(tmp_path / "Intro_9da0a9b8.pdf", "Intro").name == "Intro_9da0a9b8.pdf"
+        assert index.collisions == 0
+
+    def test_case_insensitive_collision(self, tmp_path):
+        (tmp_path / "intro.pdf").touch()
+        index = DestinationIndex()
+        assert index.claim(tmp_path / "a.pdf", "Intro", AUTHORS).name == "Intro_Doe.pdf"
+
+    def test_case_sensitive_mode(self, tmp_path):
+        (tmp_path / "intro.pdf").touch()
+        index = DestinationIndex(case_insensitive=False)
+        assert index.claim(tmp_path / "a.pdf", "Intro").name == "Intro.pdf"
+
+    def test_source_may_keep_its_own_name(self, tmp_path):
+        (tmp_path / "Intro.pdf").touch()
+        index = DestinationIndex()
+        assert index.claim(tmp_path / "Intro.pdf", "Intro") == tmp_path / "Intro.pdf"
+
+    def test_vacated_source_name_can_be_claimed(self, tmp_path):
+        (tmp_path / "Intro.pdf").touch()
+        index = DestinationIndex()
+        index.claim(tmp_path / "Intro.pdf", "Other")
+        assert index.claim(tmp_path / "b.pdf", "Intro").name == "Intro.pdf"
+
+    def test_directory_listed_once(self, tmp_path, mocker):
+        spy = mocker.spy(__import__("os"), "scandir")
+        index = DestinationIndex()
+        for i in range(5):
+            index.claim(tmp_path / f"{i}.pdf", f"T{i}")
+        assert spy.call_count == 1
+
+
+class TestNoClobberRename:
+    def test_renames(self, tmp_path):
+        source = tmp_path / "a.pdf"
+        source.write_bytes(b"a")
+        rename_no_clobber(source, tmp_path / "b.pdf")
+        assert not source.exists() and (tmp_path / "b.pdf").read_bytes() == b"a"
+
+    def test_refuses_to_replace(self, tmp_path):
+        source, existing = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        source.write_bytes(b"a")
+        existing.write_bytes(b"b")
+        with pytest.raises(FileExistsError):
+            rename_no_clobber(source, existing)
+        assert source.read_bytes() == b"a" and existing.read_bytes() == b"b"
+
+    def test_without_hard_links(self, tmp_path):
+        source, existing = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        source.write_bytes(b"a")
+        existing.write_bytes(b"b")
+        with patch("utils.destinations.os.link", side_effect=PermissionError):
+            with pytest.raises(FileExistsError):
+                rename_no_clobber(source, existing)
+            rename_no_clobber(source, tmp_path / "c.pdf")
+        assert existing.read_bytes() == b"b" and (tmp_path / "c.pdf").read_bytes() == b"a"
+
+    def test_moving_again_is_a_no_op(self, tmp_path):
+        for i in range(4):
+            (tmp_path / f"{i}.pdf").write_bytes(str(i).encode())
+        names = []
+        for _ in range(3):
+            index = DestinationIndex()
+            for path in sorted(tmp_path.iterdir()):
+                index.move(path, "Intro", AUTHORS)
+            names.append(sorted(p.name for p in tmp_path.iterdir()))
+        assert names[0] == names[1] == names[2]
+        assert len(names[0]) == 4
+
+    def test_move_skips_name_taken_after_listing(self, tmp_path):
+        source = tmp_path / "a.pdf"
+        source.write_bytes(b"a")
+        index = DestinationIndex()
+        index.is_taken(source)      # lists the directory
+        (tmp_path / "Intro.pdf").write_bytes(b"arrived later")
+
+        destination = index.move(source, "Intro", AUTHORS)
+
+        assert destination == tmp_path / "Intro_Doe.pdf"
+        assert destination.read_bytes() == b"a"
+        assert (tmp_path / "Intro.pdf").read_bytes() == b"arrived later"
+        assert index.collisions == 1
@@ -0,0 +1,55 @@
+"""Unit tests for utils/duplicates.py."""
+
+from utils.duplicates import PARTIAL_HASH_BYTES, file_digest, find_exact_duplicates
+
+
+class TestFileDigest:
+    def test_same_content_same_digest(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"x" * 100)
+        (tmp_path / "b").write_bytes(b"x" * 100)
+        assert file_digest(tmp_path / "a") == file_digest(tmp_path / "b")
+
+    def test_limit_hashes_prefix_only(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"head" + b"1" * 10)
+        (tmp_path / "b").write_bytes(b"head" + b"2" * 10)
+        assert file_digest(tmp_path / "a", 4) == file_digest(tmp_path / "b", 4)
+        assert file_digest(tmp_path / "a") != file_digest(tmp_path / "b")
+
+
+class TestFindExactDuplicates:
+    def test_groups_identical_files(self, tmp_path):
+        for name in ("a.pdf", "c.pdf"):
+            (tmp_path / name).write_bytes(b"same")
+        (tmp_path / "b.pdf").write_bytes(b"diff")
+        groups = find_exact_duplicates(sorted(tmp_path.iterdir()))
+        assert groups == [[tmp_path / "a.pdf", tmp_path / "c.pdf"]]
+
+    def test_unique_sizes_are_never_hashed(self, tmp_path, mocker):
+        (tmp_path / "a.pdf").write_bytes(b"1")
+        (tmp_path / "b.pdf").write_bytes(b"22")
+        spy = mocker.patch("utils.duplicates.file_digest")
+        assert find_exact_duplicates(sorted(tmp_path.iterdir())) == []
+        spy.assert_not_called()
+
+    def test_large_files_differing_after_prefix(self, tmp_path):
+        prefix = b"p" * PARTIAL_HASH_BYTES
+        (tmp_path / "a.pdf").write_bytes(prefix + b"tail-1")
+        (tmp_path / "b.pdf").write_bytes(prefix + b"tail-2")
+        (tmp_path / "c.pdf").write_bytes(prefix + b"tail-1")
+        groups = find_exact_duplicates(sorted(tmp_path.iterdir()))
+        assert groups == [[tmp_path / "a.pdf", tmp_path / "c.pdf"]]
+
+    def test_unreadable_file_is_ignored(self, tmp_path):
+        (tmp_path / "a.pdf").write_bytes(b"same")
+        assert find_exact_duplicates([tmp_path / "a.pdf", tmp_path / "missing.pdf"]) == []
+
+    def test_known_digests_are_not_reread(self, tmp_path, mocker):
+        for name, data in (("a.pdf", b"same"), ("b.pdf", b"same"), ("c.pdf", b"diff"), ("d.pdf", b"same")):
+            (tmp_path / name).write_bytes(data)
+        known = {tmp_path / name: file_digest(tmp_path / name) for name in ("a.pdf", "b.pdf", "c.pdf")}
+        spy = mocker.spy(__import__("utils.duplicates").duplicates, "file_digest")
+
+        groups = find_exact_duplicates(sorted(tmp_path.iterdir()), known)
+
+        assert groups == [[tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "d.pdf"]]
+        assert [call.args[0] for call in spy.call_args_list] == [tmp_path / "d.pdf"]
@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import Mock, patch
 from pydantic import ValidationError
-from llms.extractors import OllamaExtractors, Title, Authors, Summary
+from llms.extractors import (
+    OllamaExtractors, Title, Authors, Summary, implausible_authors, implausible_summary, implausible_title,
+)
 
 
 class TestOllamaExtractors:
@@ -18,6 +20,14 @@ class TestOllamaExtractors:
         mock_client_class.assert_called_once_with(host=OllamaExtractors.HOST)
         assert extractor.client == mock_client_instance
 
+    @patch("llms.extractors.ollama.Client")
+    def test_init_accepts_host(self, mock_client_class):
+        """Test that an explicit host overrides the class default."""
+        extractor = OllamaExtractors(host="http://127.0.0.1:11434")
+
+        mock_client_class.assert_called_once_with(host="http://127.0.0.1:11434")
+        assert extractor.host == "http://127.0.0.1:11434"
+
     @patch("llms.extractors.ollama.Client")
     def test_json_loads_with_stringify_basic(self, mock_client_class):
         """Test that a plain JSON string is returned unchanged."""
@@ -311,3 +321,236 @@ class TestOllamaExtractors:
 
         call_args = mock_client.chat.call_args[1]
         assert call_args["messages"][1]["content"] == ""
+
+
+def _reply(content):
+    return {"message": {"content": content}}
+
+
+class TestPlausibility:
+    @pytest.mark.parametrize("title", [
+        "Deep Learning for Natural Language Processing",
+        "Attention Is All You Need",
+        "BERT: Pre-training of Deep Bidirectional Transformers",
+    ])
+    def test_plausible_titles(self, title):
+        assert implausible_title(Title(title=title)) is None
+
+    @pytest.mark.parametrize("title, reason", [
+        ("", "empty"),
+        ("   ", "empty"),
+        ("10.1145/3292500.3330701", "non-letters"),
+        ("Journal of Machine Learning Research", "venue"),
+        ("Proceedings of the 2019 Conference", "venue"),
+        ("IEEE Transactions on Pattern Analysis", "venue"),
+        ("arXiv:1706.03762v5 [cs.CL]", "non-letters"),
+        ("word " * 50, "too long"),
+    ])
+    def test_implausible_titles(self, title, reason):
+        assert reason in implausible_title(Title(title=title))
+
+    def test_authors(self):
+        assert implausible_authors(Authors(authors="Jane Doe", authors_list=["Jane Doe"])) is None
+        assert implausible_authors(Authors(authors="", authors_list=[])) == "no authors"
+        assert "implausible" in implausible_authors(Authors(authors="", authors_list=["jane@uni.edu"]))
+        assert "too long" in implausible_authors(
+            Authors(authors="", authors_list=["Department of Computer Science University of Somewhere"])
+        )
+
+    def test_summary(self):
+        assert implausible_summary(Summary(summary="A study of " + "things " * 10)) is None
+        assert implausible_summary(Summary(summary="Short.")) is not None
+
+
+class TestCascades:
+    CASCADES = {"title": ["small", "large"], "authors": ["small", "large"], "summary": ["small", "large"]}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_default_is_single_model(self, mock_client_class):
+        extractor = OllamaExtractors()
+
+        assert extractor.cascades["title"] == [OllamaExtractors.TITLE_MODEL]
+        assert extractor.cascade_report() == {}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_unknown_task_rejected(self, mock_client_class):
+        with pytest.raises(ValueError, match="unknown cascade task"):
+            OllamaExtractors(cascades={"date": ["small"]})
+        with pytest.raises(ValueError, match="no models"):
+            OllamaExtractors(cascades={"title": []})
+
+    @patch("llms.extractors.ollama.Client")
+    def test_plausible_answer_not_escalated(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.return_value = _reply('{"title": "Spectral Learning"}')
+        extractor = OllamaExtractors(cascades=self.CASCADES)
+
+        assert extractor.llm_title(["Spectral Learning"]) == {"title": "Spectral Learning"}
+
+        assert [c[1]["model"] for c in mock_client.chat.call_args_list] == ["small"]
+        assert extractor.cascade_report()["title"] == {
+            "documents": 1, "escalated": 0, "stopped_at": {"small": 1, "large": 0},
+        }
+
+    @patch("llms.extractors.ollama.Client")
+    def test_implausible_answer_escalated(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.side_effect = [
+            _reply('{"title": "Journal of Machine Learning Research"}'),
+            _reply('{"title": "Spectral Learning"}'),
+        ]
+        extractor = OllamaExtractors(cascades=self.CASCADES)
+
+        assert extractor.llm_title(["JMLR", "Spectral Learning"]) == {"title": "Spectral Learning"}
+
+        assert [c[1]["model"] for c in mock_client.chat.call_args_list] == ["small", "large"]
+        assert extractor.cascade_report()["title"]["escalated"] == 1
+
+    @patch("llms.extractors.ollama.Client")
+    def test_invalid_answer_escalated(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.side_effect = [
+            _reply("not json"),
+            _reply('{"authors": "Jane Doe", "authors_list": ["Jane Doe"]}'),
+        ]
+        extractor = OllamaExtractors(cascades=self.CASCADES)
+
+        assert extractor.llm_authors(["Jane Doe"])["authors_list"] == ["Jane Doe"]
+        assert extractor.cascade_report()["authors"]["stopped_at"] == {"small": 0, "large": 1}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_last_valid_answer_kept_when_all_implausible(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.side_effect = [
+            _reply('{"authors": "", "authors_list": []}'),
+            _reply("not json"),
+        ]
+        extractor = OllamaExtractors(cascades=self.CASCADES)
+
+        assert extractor.llm_authors(["An anonymous note"]) == {"authors": "", "authors_list": []}
+        assert mock_client.chat.call_count == 2
+
+    @patch("llms.extractors.ollama.Client")
+    def test_summary_cascade(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        long_summary = "This paper studies " + "spectral methods " * 5
+        mock_client.chat.side_effect = [_reply('{"summary": "Ok."}'), _reply(f'{{"summary": "{long_summary}"}}')]
+        extractor = OllamaExtractors(cascades=self.CASCADES)
+
+        assert extractor.summarize_text("text") == {"summary": long_summary}
+        assert extractor.cascade_report()["summary"]["escalated"] == 1
+
+
+class TestLocalSummaryMode:
+    ABSTRACT = (
+        "We study spectral methods for learning latent variable models. Our algorithm recovers the "
+        "parameters from low-order moments with provable guarantees, and experiments show it is fast."
+    ) * 2
+
+    @patch("llms.extractors.ollama.Client")
+    def test_unknown_mode_rejected(self, mock_client_class):
+        with pytest.raises(ValueError, match="unknown summary mode"):
+            OllamaExtractors(summary_mode="fast")
+
+    @patch("llms.extractors.ollama.Client")
+    def test_abstract_used_without_llm(self, mock_client_class):
+        extractor = OllamaExtractors(summary_mode="local")
+
+        result = extractor.summarize_text("\n".join(["A Title", "Abstract", self.ABSTRACT, "1 Introduction"]))
+
+        assert result == {"summary": self.ABSTRACT}
+        mock_client_class.return_value.chat.assert_not_called()
+        assert extractor.summary_counters == {"abstract": 1}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_llm_when_nothing_local_works(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.return_value = _reply('{"summary": "From the model."}')
+        extractor = OllamaExtractors(summary_mode="local")
+
+        assert extractor.summarize_text("A Title\nJane Doe") == {"summary": "From the model."}
+        assert extractor.summary_counters == {"llm": 1}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_llm_mode_ignores_abstract(self, mock_client_class):
+        mock_client = mock_client_class.return_value
+        mock_client.chat.return_value = _reply('{"summary": "From the model."}')
+        extractor = OllamaExtractors()
+
+        assert extractor.summarize_text(f"Abstract\n{self.ABSTRACT}") == {"summary": "From the model."}
+
+
+class TestLongSummaries:
+    @staticmethod
+    def _text(parts):
+        return "\n".join(
+            f"Section {index} describes part of the method in some detail. " * 30 for index in range(parts)
+        )
+
+    @staticmethod
+    def _replies(**kwargs):
+        prompts = []
+
+        def chat(**call):
+            system = call["messages"][0]["content"]
+            prompts.append(system)
+            if system == OllamaExtractors.CHUNK_SUMMARY_PROMPT:
+                return _reply('{"summary": "A part of the report describes the method in detail."}')
+            return _reply('{"summary": "The whole report describes a method and its evaluation."}')
+
+        return chat, prompts
+
+    @patch("llms.extractors.ollama.Client")
+    def test_map_reduce(self, mock_client_class):
+        chat, prompts = self._replies()
+        mock_client_class.return_value.chat.side_effect = chat
+        extractor = OllamaExtractors()
+        text = self._text(6)
+
+        result = extractor.summarize_long(text, token_budget=100_000)
+
+        assert result == {"summary": "The whole report describes a method and its evaluation."}
+        chunks = prompts.count(OllamaExtractors.CHUNK_SUMMARY_PROMPT)
+        assert chunks >= 2
+        assert prompts[-1] == OllamaExtractors.REDUCE_SUMMARY_PROMPT
+        counts = extractor.long_summary_counters
+        assert (counts["documents"], counts["chunks"], counts["dropped"]) == (1, chunks, 0)
+        assert counts["tokens"] > len(text) // 4
+        assert extractor.summary_counters == {"llm": 1}
+
+    @patch("llms.extractors.ollama.Client")
+    def test_identical_chunks_answered_from_cache(self, mock_client_class):
+        chat, prompts = self._replies()
+        mock_client_class.return_value.chat.side_effect = chat
+        extractor = OllamaExtractors()
+        text = self._text(6)
+
+        extractor.summarize_long(text, token_budget=100_000)
+        first = len(prompts)
+        extractor.summarize_long(text, token_budget=100_000)
+
+        # Only the reduce step is asked again
+        assert prompts[first:] == [OllamaExtractors.REDUCE_SUMMARY_PROMPT]
+        assert extractor.long_summary_counters["cached"] == extractor.long_summary_counters["chunks"] // 2
+        assert extractor.chunk_cache.hits == extractor.long_summary_counters["cached"]
+
+    @patch("llms.extractors.ollama.Client")
+    def test_token_budget_drops_chunks(self, mock_client_class):
+        chat, prompts = self._replies()
+        mock_client_class.return_value.chat.side_effect = chat
+        extractor = OllamaExtractors()
+
+        extractor.summarize_long(self._text(12), token_budget=3000)
+
+        assert extractor.long_summary_counters["dropped"] > 0
+        assert prompts.count(OllamaExtractors.CHUNK_SUMMARY_PROMPT) == extractor.long_summary_counters["chunks"]
+
+    @patch("llms.extractors.ollama.Client")
+    def test_chunk_calls_not_counted_as_cascade_documents(self, mock_client_class):
+        chat, _ = self._replies()
+        mock_client_class.return_value.chat.side_effect = chat
+        extractor = OllamaExtractors(cascades={"summary": ["small", "large"]})
+
+        extractor.summarize_long(self._text(6), token_budget=100_000)
+
+        assert extractor.cascade_report()["summary"]["documents"] == 1
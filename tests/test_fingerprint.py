@@ -0,0 +1,107 @@
+"""Unit tests for utils/fingerprint.py."""
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.fingerprint import (
+    NearDuplicateIndex,
+    estimate_similarity,
+    minhash_signature,
+    shingle_hashes,
+)
+
+ABSTRACT = (
+    "We present a tutorial on spectral clustering that explains the graph Laplacian, "
+    "derives the normalized and unnormalized algorithms, and discusses why they work "
+    "from the perspective of graph cuts, random walks and perturbation theory. "
+    "The paper closes with practical advice on choosing the similarity graph and the number of clusters."
+)
+
+
+def _lines(text):
+    return [text[i:i + 60] for i in range(0, len(text), 60)]
+
+
+def _signature(text):
+    return minhash_signature(shingle_hashes(_lines(text)))
+
+
+class TestShingles:
+    def test_insensitive_to_wrapping_and_case(self):
+        assert shingle_hashes(["Spectral Clustering, a", "Tutorial"]) == shingle_hashes(["spectral clustering a tutorial"])
+
+    def test_short_text_single_shingle(self):
+        assert len(shingle_hashes(["two words"])) == 1
+
+    def test_empty(self):
+        assert shingle_hashes([]) == set()
+        assert minhash_signature(set()) == ()
+
+
+class TestSimilarity:
+    def test_identical_text(self):
+        assert estimate_similarity(_signature(ABSTRACT), _signature(ABSTRACT)) == 1.0
+
+    def test_near_duplicate_scores_high(self):
+        revised = ABSTRACT.replace("closes with", "ends with") + " Version 2."
+        assert estimate_similarity(_signature(ABSTRACT), _signature(revised)) > 0.6
+
+    def test_unrelated_scores_low(self):
+        other = "Auto-scaling cloud infrastructure with reinforcement learning agents " * 5
+        assert estimate_similarity(_signature(ABSTRACT), _signature(other)) < 0.2
+
+    def test_signatures_are_deterministic(self):
+        assert _signature(ABSTRACT) == _signature(ABSTRACT)
+
+
+class TestNearDuplicateIndex:
+    def test_query_returns_match_and_metadata(self):
+        index = NearDuplicateIndex(threshold=0.5)
+        index.add("v1.pdf", _signature(ABSTRACT), {"title": {"title": "T"}})
+        match = index.query(_signature(ABSTRACT + " Revised."))
+        assert match[0] == "v1.pdf"
+        assert match[2] == {"title": {"title": "T"}}
+
+    def test_threshold_rejects_dissimilar(self):
+        index = NearDuplicateIndex(threshold=0.9)
+        index.add("a.pdf", _signature(ABSTRACT), {})
+        assert index.query(_signature("completely different text about databases " * 5)) is None
+
+    def test_empty_signature_ignored(self):
+        index = NearDuplicateIndex()
+        index.add("a.pdf", (), {})
+        assert index.query(()) is None
+
+    def test_clusters(self):
+        index = NearDuplicateIndex()
+        for key in ("a", "b", "c", "d"):
+            index.add(key, _signature(key * 50), {})
+        index.record_match("b", "a", 0.9)
+        index.record_match("c", "b", 0.95)
+        assert index.clusters() == [["a", "b", "c"]]
+
+    def test_match_of(self):
+        index = NearDuplicateIndex()
+        index.record_match("b", "a", 0.9)
+
+        assert index.match_of("b") == ("a", 0.9)
+        assert index.match_of("a") is None
+
+    def test_concurrent_add_query_and_match(self):
+        index = NearDuplicateIndex(threshold=0.5)
+        signature = _signature(ABSTRACT)
+
+        def worker(thread):
+            for i in range(100):
+                key = (thread, i)
+                match = index.query(signature)
+                if match is not None:
+                    index.record_match(key, match[0], match[1])
+                index.add(key, signature, {})
+                if i % 25 == 0:
+                    index.clusters()
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(worker, range(8)))
+
+        assert index.query(signature) is not None
+        assert len(index.matches) >= 8 * 100 - 8
+        assert sum(len(cluster) for cluster in index.clusters()) >= 8 * 100 - 8
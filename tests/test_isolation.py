@@ -0,0 +1,197 @@
+"""Tests for utils/isolation.py. Job functions live at module level so spawn workers can import them."""
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from tests.conftest import make_text_pdf
+from utils.isolation import (
+    STATUS_CRASHED, STATUS_OOM, STATUS_TIMEOUT, IsolatedParseError, IsolatedParser, ParseOutOfMemory, ParseTimeout,
+    call_parent,
+)
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def sleep_for(seconds: float) -> str:
+    time.sleep(seconds)
+    return "done"
+
+
+def allocate(megabytes: int) -> int:
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def fail(message: str) -> None:
+    raise ValueError(message)
+
+
+def log_warning(message: str) -> None:
+    logging.getLogger("isolation-test").warning(message)
+
+
+def die() -> None:
+    os._exit(3)
+
+
+def ask_parent(name: str, *args) -> object:
+    return call_parent(name, *args)
+
+
+@pytest.fixture()
+def parser():
+    with IsolatedParser(timeout=10, memory_limit=512 * 1024 * 1024) as parser:
+        yield parser
+
+
+class TestIsolatedParser:
+    def test_runs_job_in_reused_worker(self, parser):
+        first = parser.run(worker_pid)
+
+        assert first != os.getpid()
+        assert parser.run(worker_pid) == first
+
+    def test_timeout_kills_worker_and_next_job_gets_a_new_one(self, parser):
+        first = parser.run(worker_pid)
+        parser.timeout = 0.5
+
+        started = time.perf_counter()
+        with pytest.raises(ParseTimeout) as excinfo:
+            parser.run(sleep_for, 30)
+
+        assert time.perf_counter() - started < 5
+        assert excinfo.value.status == STATUS_TIMEOUT
+        assert parser.timeouts == 1
+        parser.timeout = 10
+        assert parser.run(worker_pid) != first
+
+    def test_memory_limit_reported_as_oom(self, parser):
+        with pytest.raises(ParseOutOfMemory) as excinfo:
+            parser.run(allocate, 1024)
+
+        assert excinfo.value.status == STATUS_OOM
+        assert parser.out_of_memory == 1
+        assert parser.run(allocate, 16) == 16 * 1024 * 1024
+
+    def test_job_exception_keeps_worker(self, parser):
+        first = parser.run(worker_pid)
+
+        with pytest.raises(RuntimeError, match="ValueError: bad pdf"):
+            parser.run(fail, "bad pdf")
+
+        assert parser.run(worker_pid) == first
+
+    def test_worker_death_reported_as_crash(self, parser):
+        with pytest.raises(IsolatedParseError) as excinfo:
+            parser.run(die)
+
+        assert excinfo.value.status == STATUS_CRASHED
+        assert parser.crashed == 1
+
+    def test_parent_handler_time_is_not_counted(self, parser):
+        parser.timeout = 0.5
+
+        def slow_upper(text):
+            time.sleep(1)
+            return text.upper()
+
+        assert parser.run(ask_parent, "upper", "ocr text", handlers={"upper": slow_upper}) == "OCR TEXT"
+        assert parser.timeouts == 0
+
+    def test_parent_handler_error_raised_in_job(self, parser):
+        def broken(text):
+            raise ValueError("model unavailable")
+
+        with pytest.raises(RuntimeError, match="ValueError: model unavailable"):
+            parser.run(ask_parent, "ocr", "x", handlers={"ocr": broken})
+        with pytest.raises(RuntimeError, match="no handler"):
+            parser.run(ask_parent, "missing")
+
+    def test_dead_idle_worker_replaced(self, parser):
+        first = parser.run(worker_pid)
+        os.kill(first, signal.SIGKILL)
+        time.sleep(0.2)
+
+        assert parser.run(worker_pid) not in (first, None)
+
+    def test_send_to_dead_worker_reported_as_crash(self, parser):
+        parser.run(worker_pid)
+        worker = parser._idle.get_nowait()
+        worker.process.kill()
+        worker.process.join()
+
+        with pytest.raises(IsolatedParseError) as excinfo:
+            worker.call(worker_pid, (), 5)
+
+        assert excinfo.value.status == STATUS_CRASHED
+
+    def test_worker_logs_are_forwarded(self, parser, caplog):
+        with caplog.at_level(logging.WARNING, logger="isolation-test"):
+            parser.run(log_warning, "from the worker")
+            deadline = time.monotonic() + 5
+            while "from the worker" not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+        assert "from the worker" in caplog.text
+
+
+class TestIsolatedExtraction:
+    def test_extract_from_pdf_reads_in_worker(self, tmp_path, parser):
+        from utils.pdf_content import ALL_FIELDS, extract_from_pdf, page_counters
+
+        pdf = make_text_pdf(tmp_path / "paper.pdf", ["A Study of Isolated Parsing", "Jane Doe"])
+        extractor = type("Extractor", (), {
+            "host": None,
+            "llm_title": lambda self, lines: {"title": lines[0]},
+            "llm_authors": lambda self, lines: {"authors": lines[1], "authors_list": [lines[1]]},
+        })()
+        documents_before = page_counters["documents"]
+        stats = {}
+
+        title, authors, _, _ = extract_from_pdf(
+            Path(pdf), extractor=extractor, fields=ALL_FIELDS - {"summary", "date"}, stats=stats, isolation=parser,
+        )
+
+        assert title == {"title": "A Study of Isolated Parsing"}
+        assert authors["authors"] == "Jane Doe"
+        assert stats["pages"] == 1
+        assert page_counters["documents"] == documents_before + 1
+
+    def test_ocr_runs_in_parent_outside_the_timeout(self, tmp_path, parser):
+        from PIL import Image
+
+        from utils.pdf_content import ALL_FIELDS, extract_from_pdf
+
+        pdf = tmp_path / "scan.pdf"
+        Image.new("RGB", (200, 100), "white").save(pdf, "PDF")
+        ocr_pids = []
+
+        def ocr_page_images(images):
+            ocr_pids.append(os.getpid())
+            assert [len(image.data) > 0 for image in images] == [True]
+            time.sleep(1.5)
+            return "A Scanned Study\nJane Doe"
+
+        extractor = Mock(host=None, ocr_page_images=ocr_page_images)
+        extractor.llm_title.side_effect = lambda lines: {"title": lines[0]}
+        extractor.llm_authors.side_effect = lambda lines: {"authors": lines[1], "authors_list": [lines[1]]}
+        fields = ALL_FIELDS - {"summary", "date"}
+        # Warm the worker up so its imports are not timed
+        extract_from_pdf(make_text_pdf(tmp_path / "warm.pdf", ["Warming Up", "The Worker"]), extractor=extractor, fields=fields,
+                         isolation=parser)
+        parser.timeout = 1
+        stats = {}
+
+        title, _, _, _ = extract_from_pdf(
+            pdf, extractor=extractor, fields=fields, stats=stats, isolation=parser,
+        )
+
+        assert title == {"title": "A Scanned Study"}
+        assert ocr_pids == [os.getpid()]
+        assert stats["ocr_pages"] == 1
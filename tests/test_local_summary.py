@@ -0,0 +1,110 @@
+import pytest
+
+from utils.local_summary import (
+    MAX_LOCAL_SUMMARY_CHARS, find_abstract, local_summary, split_sentences, textrank, textrank_summary,
+)
+
+ABSTRACT = (
+    "We study spectral methods for learning latent variable models. Our algorithm recovers the "
+    "parameters from low-order moments with provable guarantees. Experiments on topic models and "
+    "hidden Markov models show it is faster than expectation maximization while matching its accuracy."
+)
+HEADER = ["Spectral Learning of Latent Variable Models", "Jane Doe, John Smith", "University of Somewhere"]
+
+BODY = [
+    "Topic models describe documents as mixtures of topics drawn from a shared vocabulary.",
+    "Spectral methods estimate topic models from the moments of word co-occurrence counts.",
+    "The weather in the city was pleasant during the conference week last year.",
+    "Moment estimates from word co-occurrence counts make spectral topic models fast to fit.",
+    "Expectation maximization fits topic models slowly and can stall in poor local optima.",
+    "We compare spectral topic models with expectation maximization on three corpora.",
+]
+
+
+class TestFindAbstract:
+    def test_heading_line(self):
+        lines = HEADER + ["Abstract"] + ABSTRACT.split(". ") + ["1 Introduction", "Latent variable models are"]
+
+        abstract = find_abstract(lines)
+
+        assert abstract.startswith("We study spectral methods")
+        assert abstract.endswith("accuracy.")
+        assert "Introduction" not in abstract
+
+    def test_inline_heading_and_keywords_end(self):
+        lines = HEADER + [f"Abstract—{ABSTRACT[:90]}", ABSTRACT[90:], "Keywords: spectral methods, moments"]
+
+        assert find_abstract(lines) == ABSTRACT
+
+    def test_title_starting_with_abstract_is_not_a_heading(self):
+        lines = ["Abstract Interpretation of Concurrent Programs", "Summary Statistics for " + ABSTRACT,
+                 "Abstract", ABSTRACT, "Introduction"]
+
+        assert find_abstract(lines) == ABSTRACT
+
+    def test_letter_spaced_heading(self):
+        lines = HEADER + ["A B S T R A C T", ABSTRACT, "I. INTRODUCTION"]
+
+        assert find_abstract(lines) == ABSTRACT
+
+    def test_hyphenated_line_breaks_joined(self):
+        lines = ["Abstract:", ABSTRACT[:40] + "algo-", "rithm " + ABSTRACT[40:]]
+
+        assert "algorithm" in find_abstract(lines)
+
+    def test_missing_or_too_short(self):
+        assert find_abstract(HEADER + BODY) is None
+        assert find_abstract(["Abstract", "Too short.", "Introduction"]) is None
+
+    def test_capped_at_sentence_end(self):
+        lines = ["Abstract"] + [ABSTRACT] * 20
+
+        abstract = find_abstract(lines)
+
+        assert len(abstract) <= 3000
+        assert abstract.endswith(".")
+
+
+class TestTextRank:
+    @pytest.fixture(autouse=True)
+    def _numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_split_sentences_drops_fragments_and_contacts(self):
+        text = "Short one. " + " ".join(BODY[:2]) + " Contact jane@uni.edu for the code and data sets."
+
+        assert split_sentences(text) == BODY[:2]
+
+    def test_central_sentences_rank_above_outlier(self):
+        scores = textrank(BODY)
+
+        outlier = BODY.index("The weather in the city was pleasant during the conference week last year.")
+        assert min(score for index, score in enumerate(scores) if index != outlier) > scores[outlier]
+        assert sum(scores) == pytest.approx(1.0)
+
+    def test_summary_keeps_document_order(self):
+        summary = textrank_summary(HEADER + BODY)
+
+        assert "weather" not in summary
+        positions = [summary.find(sentence) for sentence in BODY if sentence in summary]
+        assert positions == sorted(positions) and len(positions) == 5
+        assert len(summary) <= MAX_LOCAL_SUMMARY_CHARS
+
+    def test_too_little_text(self):
+        assert textrank_summary(HEADER + BODY[:2]) is None
+
+
+class TestLocalSummary:
+    def test_prefers_abstract(self):
+        assert local_summary(HEADER + ["Abstract", ABSTRACT, "Introduction"] + BODY) == ("abstract", ABSTRACT)
+
+    def test_falls_back_to_textrank(self):
+        pytest.importorskip("numpy")
+
+        method, summary = local_summary(HEADER + BODY)
+
+        assert method == "textrank"
+        assert summary
+
+    def test_nothing_to_summarize(self):
+        assert local_summary(HEADER) is None
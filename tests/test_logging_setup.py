@@ -0,0 +1,84 @@
+"""Unit tests for utils/logging_setup.py."""
+import logging
+import threading
+
+import pytest
+
+from utils.logging_setup import SampledDebugFilter, configure_logging
+
+
+def _record(level: int = logging.DEBUG, lineno: int = 10, msg: str = "raw response %s") -> logging.LogRecord:
+    return logging.LogRecord("test", level, "/src/module.py", lineno, msg, ("x",), None)
+
+
+@pytest.fixture()
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestSampledDebugFilter:
+    def test_burst_then_sampled(self):
+        debug_filter = SampledDebugFilter(burst=3, sample_every=10)
+        passed = [debug_filter.filter(_record()) for _ in range(33)]
+        # 3 in the burst, then records 13, 23 and 33
+        assert sum(passed) == 6
+        assert passed[:3] == [True] * 3
+
+    def test_sampled_record_is_annotated(self):
+        debug_filter = SampledDebugFilter(burst=0, sample_every=2)
+        debug_filter.filter(_record())
+        record = _record()
+        assert debug_filter.filter(record)
+        assert record.getMessage() == "raw response x [sampled: 1 similar records dropped]"
+
+    def test_call_sites_are_counted_separately(self):
+        debug_filter = SampledDebugFilter(burst=1, sample_every=1000)
+        assert debug_filter.filter(_record(lineno=1))
+        assert debug_filter.filter(_record(lineno=2))
+        assert not debug_filter.filter(_record(lineno=1))
+
+    def test_info_never_filtered(self):
+        debug_filter = SampledDebugFilter(burst=0, sample_every=1000)
+        assert all(debug_filter.filter(_record(logging.INFO)) for _ in range(50))
+
+
+class TestConfigureLogging:
+    def test_records_reach_file_from_listener_thread(self, tmp_path, restore_root_logger):
+        log_path = tmp_path / "process.log"
+        listener = configure_logging(log_path, logging.INFO, "%(threadName)s %(message)s")
+
+        logging.info("hello from the caller")
+        logging.debug("not at this level")
+        listener.stop()
+
+        text = log_path.read_text()
+        assert "hello from the caller" in text
+        assert "not at this level" not in text
+        # The record is formatted with the caller's thread, not the listener's
+        assert threading.current_thread().name in text
+
+    def test_rotates(self, tmp_path, restore_root_logger):
+        log_path = tmp_path / "process.log"
+        listener = configure_logging(log_path, logging.INFO, max_bytes=2_000, backup_count=2)
+        for i in range(200):
+            logging.info(f"line {i} " + "x" * 50)
+        listener.stop()
+
+        assert (tmp_path / "process.log.1").exists()
+        assert (tmp_path / "process.log.2").exists()
+        assert not (tmp_path / "process.log.3").exists()
+        assert log_path.stat().st_size <= 2_000
+
+    def test_stopping_twice_is_harmless(self, tmp_path, restore_root_logger):
+        listener = configure_logging(tmp_path / "process.log", logging.INFO)
+        assert listener.running
+        listener.stop()
+        listener.stop()
+        assert not listener.running
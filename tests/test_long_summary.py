@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from utils import long_summary
+from utils.long_summary import (
+    CHARS_PER_TOKEN, ChunkCache, chunk_text, estimate_tokens, map_reduce, select_chunks, spread,
+)
+
+
+class TestChunking:
+    def test_chunks_break_at_lines(self):
+        text = "\n".join(f"line {index:03d} " + "x" * 40 for index in range(100))
+
+        chunks = chunk_text(text, chunk_tokens=100)
+
+        assert all(len(chunk) <= 100 * CHARS_PER_TOKEN for chunk in chunks)
+        assert "\n".join(chunks) == text
+
+    def test_overlong_line_is_cut(self):
+        chunks = chunk_text("short\n" + "y" * 1000 + "\nend", chunk_tokens=100)
+
+        assert chunks == ["short", "y" * 400, "y" * 400, "y" * 200 + "\nend"]
+
+    def test_all_chunks_kept_within_budget(self):
+        chunks = ["a" * 400] * 5
+
+        assert select_chunks(chunks, token_budget=10_000) == chunks
+
+    def test_chunks_sampled_evenly_over_budget(self):
+        chunks = [f"{index}" + "a" * 3999 for index in range(10)]
+
+        selected = select_chunks(chunks, token_budget=4 * 1000)
+
+        # First, last and evenly spaced in between, rather than the first four
+        assert [chunk[0] for chunk in selected] == ["0", "3", "6", "9"]
+
+    def test_text_of_exactly_the_budget_is_kept_whole(self):
+        chunks = chunk_text("\n".join(["b" * 99] * 400), chunk_tokens=100)
+
+        # The reduce step is budgeted separately, so nothing read is dropped
+        assert select_chunks(chunks, token_budget=10_000) == chunks
+
+    def test_spread(self):
+        assert spread(list(range(10)), 4) == [0, 3, 6, 9]
+        assert spread(range(5), 2) == [0, 4]
+        assert spread([1, 2], 5) == [1, 2]
+        assert spread([1, 2], 1) == [1]
+
+    def test_budget_for_less_than_one_chunk_keeps_the_first(self):
+        chunks = ["a" * 4000, "b" * 4000]
+
+        assert select_chunks(chunks, token_budget=10) == chunks[:1]
+
+
+class TestMapReduce:
+    def test_chunks_summarized_concurrently_and_reduced_in_order(self):
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def summarize_chunk(chunk):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return chunk.upper()
+
+        combined = []
+
+        def combine(text, final):
+            combined.append((text, final))
+            return f"abstract of {text!r}"
+
+        result = map_reduce(["a", "b", "c", "d"], summarize_chunk, combine, workers=4)
+
+        assert peak[0] == 4
+        assert combined == [("A\n\nB\n\nC\n\nD", True)]
+        assert result == "abstract of 'A\\n\\nB\\n\\nC\\n\\nD'"
+
+    def test_reduces_in_rounds_when_partials_are_too_long(self):
+        calls = []
+
+        def combine(text, final):
+            calls.append(final)
+            return "merged" if not final else "abstract"
+
+        result = map_reduce(["p" * 400] * 6, lambda chunk: chunk, combine, reduce_tokens=250)
+
+        assert result == "abstract"
+        assert calls.count(True) == 1
+        assert calls.count(False) >= 2
+
+    def test_failed_chunks_are_skipped(self):
+        result = map_reduce(["a", "b"], lambda chunk: "" if chunk == "a" else "B", lambda text, final: text)
+
+        assert result == "B"
+
+    def test_nothing_summarized(self):
+        assert map_reduce(["a"], lambda chunk: "", lambda text, final: "never") == ""
+        assert map_reduce([], lambda chunk: "x", lambda text, final: "never") == ""
+
+
+class TestChunkCache:
+    def test_get_and_put(self):
+        cache = ChunkCache()
+        key = ChunkCache.key("model", "prompt", "chunk")
+
+        assert cache.get(key) is None
+        cache.put(key, "summary")
+        assert cache.get(key) == "summary"
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert key != ChunkCache.key("other-model", "prompt", "chunk")
+
+    def test_least_recently_used_dropped(self):
+        cache = ChunkCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+
+        assert list(cache.entries) == ["a", "c"]
+
+    def test_save_and_reload(self, tmp_path):
+        path = tmp_path / "cache" / "chunks.json"
+        cache = ChunkCache(path)
+        cache.put("a", "A")
+        cache.save()
+
+        assert ChunkCache(path).get("a") == "A"
+        assert not path.with_name("chunks.json.tmp").exists()
+
+    def test_ignores_unknown_version(self, tmp_path, caplog):
+        path = tmp_path / "chunks.json"
+        path.write_text('{"version": 99, "entries": {"a": "A"}}')
+
+        assert ChunkCache(path).entries == {}
+        assert "unknown version" in caplog.text
+
+    def test_in_memory_save_is_a_no_op(self, tmp_path):
+        ChunkCache().save()
+
+
+@pytest.mark.parametrize("tokens", [1, 100, 32000])
+def test_budget_chars_matches_estimate(tokens):
+    assert estimate_tokens("x" * long_summary.budget_chars(tokens)) == tokens + 1
@@ -0,0 +1,118 @@
+"""Unit tests for utils/manifest.py."""
+import json
+import os
+
+import pytest
+
+from utils.manifest import MANIFEST_VERSION, Manifest
+
+RESULT = ({"title": "A Title"}, {"authors": "Jane Doe", "authors_list": ["Jane Doe"]}, None, {"summary": "S"})
+
+
+@pytest.fixture()
+def pdf(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(b"%PDF-1.4 paper contents")
+    return path
+
+
+class TestManifest:
+    def test_unknown_file_is_a_miss(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        assert manifest.lookup(pdf) is None
+        assert manifest.misses == 1
+
+    def test_unchanged_file_hits_on_stat(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        assert manifest.lookup(pdf) == RESULT
+        assert (manifest.hits, manifest.rehashed) == (1, 0)
+
+    def test_touched_file_with_same_content_hits_on_hash(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        st = pdf.stat()
+        os.utime(pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        assert manifest.lookup(pdf) == RESULT
+        assert manifest.rehashed == 1
+        # The refreshed mtime makes the next lookup a plain stat hit
+        assert manifest.lookup(pdf) == RESULT
+        assert manifest.hits == 1
+
+    def test_is_current_checks_stat_only(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        assert not manifest.is_current(pdf)
+        manifest.record(pdf, RESULT)
+        assert manifest.is_current(pdf)
+        st = pdf.stat()
+        os.utime(pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert not manifest.is_current(pdf)
+        assert (manifest.hits, manifest.misses) == (0, 0)
+
+    def test_current_digest_is_the_recorded_hash(self, tmp_path, pdf, mocker):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        spy = mocker.patch("utils.manifest.file_digest")
+
+        assert manifest.current_digest(pdf) == manifest.files[str(pdf)]["hash"]
+        renamed = pdf.rename(tmp_path / "renamed.pdf")
+        assert manifest.current_digest(renamed) == manifest.files[str(pdf)]["hash"]
+        spy.assert_not_called()
+
+    def test_changed_content_is_a_miss(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        pdf.write_bytes(b"%PDF-1.4 revised paper contents")
+        assert manifest.lookup(pdf) is None
+
+    def test_move_rekeys_entry(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        destination = pdf.with_name("A_Title.pdf")
+        pdf.rename(destination)
+        manifest.move(pdf, destination)
+
+        assert manifest.lookup(destination) == RESULT
+        assert str(pdf) not in manifest.files
+
+    def test_file_renamed_outside_the_run_keeps_its_entry(self, tmp_path, pdf):
+        path = tmp_path / "manifest.json"
+        manifest = Manifest(path)
+        manifest.record(pdf, RESULT)
+        manifest.save()
+        destination = pdf.with_name("A_Title.pdf")
+        pdf.rename(destination)  # e.g. by --apply, which does not load the manifest
+
+        reloaded = Manifest(path)
+        assert reloaded.is_current(destination)
+        assert reloaded.lookup(destination) is not None
+        assert (reloaded.hits, reloaded.rehashed, reloaded.misses) == (1, 0, 0)
+        assert list(reloaded.files) == [str(destination)]
+
+    def test_copy_or_surviving_original_is_not_a_rename(self, tmp_path, pdf):
+        manifest = Manifest(tmp_path / "manifest.json")
+        manifest.record(pdf, RESULT)
+        link = pdf.with_name("link.pdf")
+        os.link(pdf, link)
+        copy = pdf.with_name("copy.pdf")
+        copy.write_bytes(pdf.read_bytes())
+
+        assert manifest.lookup(link) is None
+        assert manifest.lookup(copy) is None
+        assert str(pdf) in manifest.files
+
+    def test_save_and_reload(self, tmp_path, pdf):
+        path = tmp_path / "state" / "manifest.json"
+        manifest = Manifest(path)
+        manifest.record(pdf, RESULT)
+        manifest.save()
+
+        reloaded = Manifest(path)
+        assert reloaded.lookup(pdf) == tuple(json.loads(json.dumps(list(RESULT))))
+        assert not path.with_name("manifest.json.tmp").exists()
+
+    def test_ignores_unknown_version(self, tmp_path, pdf):
+        path = tmp_path / "manifest.json"
+        path.write_text(json.dumps({"version": MANIFEST_VERSION + 1, "files": {str(pdf): {}}}))
+        assert Manifest(path).files == {}
@@ -0,0 +1,89 @@
+import json
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils import memprofile
+from utils.memprofile import MemoryProfiler, report_path_for
+
+MB = 1024 * 1024
+
+
+def _records(profiler):
+    return [json.loads(line) for line in profiler.records_path.read_text().splitlines()]
+
+
+class TestMemoryProfiler:
+    def test_report_next_to_log(self):
+        assert report_path_for(Path("logs/process.log")) == Path("logs/process.memprofile.txt")
+
+    def test_hooks_are_no_ops_when_not_profiling(self):
+        assert isinstance(memprofile.document(Path("a.pdf")), nullcontext)
+        assert isinstance(memprofile.stage("read"), nullcontext)
+
+    def test_records_document_and_stage_peaks(self, tmp_path):
+        with MemoryProfiler(tmp_path / "run.memprofile.txt") as profiler:
+            with memprofile.document(Path("a.pdf")):
+                with memprofile.stage("read"):
+                    buffer = bytearray(4 * MB)
+                    del buffer
+                with memprofile.stage("summary"):
+                    kept = bytearray(MB)
+
+        record, = _records(profiler)
+        assert record["document"] == "a.pdf"
+        assert record["stages"]["read"] >= 4 * MB
+        assert MB <= record["stages"]["summary"] < 2 * MB
+        # The read stage's peak counts towards the document's even though each stage resets it
+        assert record["peak"] >= 4 * MB
+        assert MB <= record["retained"] < 2 * MB
+        assert record["rss"] > 0
+        assert profiler.stage_peaks["read"][0] == 1
+        assert not tracemalloc.is_tracing()
+        del kept
+
+    def test_periodic_dumps_and_summary(self, tmp_path):
+        with MemoryProfiler(tmp_path / "run.memprofile.txt", snapshot_every=2) as profiler:
+            for name in ("a.pdf", "b.pdf", "c.pdf"):
+                with memprofile.document(Path(name)):
+                    pass
+
+        report = profiler.report_path.read_text()
+        assert "Top allocation sites after 2 documents" in report
+        assert "Top allocation sites final" in report
+        assert "Summary: 3 documents" in report
+        assert "No steady growth" in report
+        assert len(_records(profiler)) == 3
+
+    def test_flags_steady_growth(self, tmp_path, caplog):
+        leak = []
+        with patch.object(memprofile, "GROWTH_MIN_BYTES", MB):
+            with MemoryProfiler(tmp_path / "run.memprofile.txt", snapshot_every=1) as profiler:
+                for index in range(memprofile.GROWTH_CHECKPOINTS + 2):
+                    with memprofile.document(Path(f"{index}.pdf")):
+                        leak.append(bytearray(MB))
+
+        assert profiler.growth_flagged == 2
+        assert "grew at each of the last" in caplog.text
+        report = profiler.report_path.read_text()
+        assert "!! GROWTH" in report
+        assert "test_memprofile.py" in report.split("!! GROWTH")[1]
+
+    def test_no_growth_flag_for_steady_memory(self, tmp_path):
+        with patch.object(memprofile, "GROWTH_MIN_BYTES", MB):
+            with MemoryProfiler(tmp_path / "run.memprofile.txt", snapshot_every=1) as profiler:
+                for index in range(memprofile.GROWTH_CHECKPOINTS + 2):
+                    with memprofile.document(Path(f"{index}.pdf")):
+                        bytearray(2 * MB)
+
+        assert profiler.growth_flagged == 0
+
+    def test_document_recorded_when_processing_fails(self, tmp_path):
+        with MemoryProfiler(tmp_path / "run.memprofile.txt") as profiler:
+            with pytest.raises(ValueError), memprofile.document(Path("bad.pdf")):
+                raise ValueError("broken")
+
+        assert [record["document"] for record in _records(profiler)] == ["bad.pdf"]
@@ -0,0 +1,86 @@
+"""Unit tests for utils/metadata_store.py."""
+import sqlite3
+import time
+
+import pytest
+
+from utils.metadata_store import MetadataStore, _fts_query
+
+
+def _record(n, title, authors="", summary=""):
+    return {
+        "title": {"title": title},
+        "authors": {"authors": authors, "authors_list": [authors] if authors else []},
+        "date": None,
+        "summary": {"summary": summary},
+        "source": f"/pdfs/src{n}.pdf",
+        "destination": f"/pdfs/dest{n}.pdf",
+    }
+
+
+class TestMetadataStore:
+    def test_add_and_search(self, tmp_path):
+        with MetadataStore(tmp_path / "m.db") as store:
+            store.add(_record(1, "A Tutorial on Spectral Clustering", "Ulrike von Luxburg"))
+            store.add(_record(2, "Auto-scaling with Reinforcement Learning"))
+            results = store.search("spectral")
+
+        assert [r["title"]["title"] for r in results] == ["A Tutorial on Spectral Clustering"]
+        assert results[0]["source"] == "/pdfs/src1.pdf"
+
+    def test_title_match_outranks_summary_match(self, tmp_path):
+        with MetadataStore(tmp_path / "m.db") as store:
+            store.add(_record(1, "Graph methods", summary="mentions clustering once"))
+            store.add(_record(2, "Clustering", summary="other"))
+            results = store.search("clustering")
+
+        assert [r["destination"] for r in results] == ["/pdfs/dest2.pdf", "/pdfs/dest1.pdf"]
+
+    def test_upsert_by_destination_updates_index(self, tmp_path):
+        with MetadataStore(tmp_path / "m.db") as store:
+            store.add(_record(1, "Old title"))
+            store.add(_record(1, "New title"))
+            assert store.search("old") == []
+            assert len(store.search("new")) == 1
+
+    def test_batches_commits(self, tmp_path, mocker):
+        store = MetadataStore(tmp_path / "m.db", batch_size=3)
+        spy = mocker.spy(store, "commit")
+        for n in range(7):
+            store.add(_record(n, f"Title {n}"))
+        assert spy.call_count == 2
+        store.close()
+
+        count = sqlite3.connect(tmp_path / "m.db").execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        assert count == 7
+
+    def test_query_syntax_is_escaped(self, tmp_path):
+        with MetadataStore(tmp_path / "m.db") as store:
+            store.add(_record(1, 'Say "hello" AND goodbye'))
+            assert len(store.search('"hello" AND')) == 1
+            assert store.search("   ") == []
+
+    def test_fts_query_quotes_terms(self):
+        assert _fts_query('a "b"') == '"a" """b"""'
+
+
+@pytest.mark.benchmark
+def test_benchmark_search_40k_records(tmp_path, capsys):
+    """Bulk-load a 40k-paper library and time a ranked search."""
+    words = ["spectral", "graph", "learning", "cloud", "neural", "bayesian", "kernel", "latent"]
+    start = time.perf_counter()
+    with MetadataStore(tmp_path / "m.db") as store:
+        for n in range(40_000):
+            title = f"{words[n % 8]} {words[(n // 8) % 8]} methods part {n}"
+            store.add(_record(n, title, summary=f"{words[(n // 64) % 8]} analysis"))
+        store.commit()
+        load_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = store.search("spectral kernel")
+        search_ms = (time.perf_counter() - start) * 1000
+
+    assert results
+    assert search_ms < 500
+    with capsys.disabled():
+        print(f"\nload: 40000 records in {load_secs:.2f}s; search: {search_ms:.1f} ms")
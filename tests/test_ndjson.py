@@ -0,0 +1,52 @@
+import io
+import json
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+from utils.ndjson import NdjsonWriter
+
+
+class FlushCounter(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def flush(self):
+        self.flushed.append(self.getvalue())
+        super().flush()
+
+
+class TestNdjsonWriter:
+    def test_one_flushed_line_per_record(self):
+        stream = FlushCounter()
+        writer = NdjsonWriter(stream)
+
+        writer.write({"source": "a.pdf", "status": "OK"})
+        writer.write({"source": "b.pdf", "status": "ERROR"})
+
+        lines = stream.getvalue().splitlines()
+        assert [json.loads(line)["source"] for line in lines] == ["a.pdf", "b.pdf"]
+        # Each record is out before the next one is written
+        assert stream.flushed == [lines[0] + "\n", "\n".join(lines) + "\n"]
+        assert writer.written == 2
+
+    def test_values_json_cannot_encode_are_strings(self):
+        stream = io.StringIO()
+
+        NdjsonWriter(stream).write({"path": Path("/a/b.pdf"), "at": datetime(2026, 1, 2), "title": "Über"})
+
+        assert json.loads(stream.getvalue()) == {"path": "/a/b.pdf", "at": "2026-01-02 00:00:00", "title": "Über"}
+
+    def test_closed_pipe_stops_output(self, caplog):
+        stream = Mock()
+        stream.write.side_effect = BrokenPipeError
+        writer = NdjsonWriter(stream)
+
+        writer.write({"source": "a.pdf"})
+        writer.write({"source": "b.pdf"})
+
+        assert writer.closed
+        assert stream.write.call_count == 1
+        assert writer.written == 0
+        assert caplog.text.count("closed the pipe") == 1
@@ -0,0 +1,233 @@
+import io
+import tracemalloc
+import zlib
+from unittest.mock import Mock
+
+import pytest
+from PIL import Image
+from pypdf import PdfReader
+
+from utils.page_images import ImageBudget, OcrImage, iter_page_images
+
+
+def make_image_pdf(path, size, count=1, mode="RGB", jpeg=True):
+    """Write a PDF with count pages, each holding one size image (JPEG, or 1-bit CCITT with jpeg=False)."""
+    pages = [Image.new(mode, size, color=(200, 200, 200) if mode == "RGB" else 200) for _ in range(count)]
+    if not jpeg:
+        # PIL writes RGB/L as DCTDecode and 1-bit images as CCITTFaxDecode
+        pages = [page.convert("1") for page in pages]
+    pages[0].save(path, format="PDF", save_all=True, append_images=pages[1:])
+    return path
+
+
+def make_flate_pdf(path, width, height, gray=8):
+    """Write a one-page PDF whose only image is an unpredicted FlateDecode grayscale bitmap."""
+    row = bytes([gray]) * width
+    pixels = zlib.compress(row * height, 1)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /XObject << /Im0 5 0 R >> >> /Contents 4 0 R >>",
+        b"<< /Length 30 >>\nstream\nq 612 0 0 792 0 0 cm /Im0 Do Q\nendstream",
+        f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray "
+        f"/BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>\nstream\n".encode()
+        + pixels + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+    return path
+
+
+def make_inline_image_pdf(path, width, height, gray=120):
+    """Write a one-page PDF whose only image is an inline (BI ... ID ... EI) grayscale image."""
+    content = (
+        f"q {width} 0 0 {height} 0 0 cm BI /W {width} /H {height} /CS /G /BPC 8 ID ".encode()
+        + bytes([gray]) * (width * height) + b" EI Q"
+    )
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << >> /Contents 4 0 R >>",
+        f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+    return path
+
+
+def decoded_size(image):
+    with Image.open(io.BytesIO(image.data)) as decoded:
+        return decoded.size
+
+
+class TestIterPageImages:
+    def test_small_jpeg_passed_through_unchanged(self, tmp_path):
+        pdf = make_image_pdf(tmp_path / "small.pdf", (200, 100))
+        page = PdfReader(str(pdf)).pages[0]
+
+        images = list(iter_page_images(page))
+
+        assert len(images) == 1
+        assert images[0].data[:2] == b"\xff\xd8"  # raw JPEG bytes from the stream
+        assert decoded_size(images[0]) == (200, 100)
+
+    def test_oversized_jpeg_downsampled_to_cap(self, tmp_path):
+        pdf = make_image_pdf(tmp_path / "big.pdf", (2000, 1000))
+        page = PdfReader(str(pdf)).pages[0]
+        cap = 500 * 250 * 3
+
+        [image] = iter_page_images(page, max_image_bytes=cap)
+
+        width, height = decoded_size(image)
+        assert width * height * 3 <= cap
+        assert width == pytest.approx(500, abs=2) and height == pytest.approx(250, abs=2)
+
+    def test_oversized_non_jpeg_downsampled_and_cache_released(self, tmp_path):
+        pdf = make_image_pdf(tmp_path / "bilevel.pdf", (4000, 4000), jpeg=False)
+        page = PdfReader(str(pdf)).pages[0]
+        stream = next(iter(page["/Resources"]["/XObject"].values())).get_object()
+
+        [image] = iter_page_images(page, max_image_bytes=1000 * 1000)
+
+        width, height = decoded_size(image)
+        assert width * height <= 1000 * 1000
+        assert getattr(stream, "decoded_self", None) is None
+
+    def test_oversized_flate_downsampled_while_inflating(self, tmp_path):
+        pdf = make_flate_pdf(tmp_path / "flate.pdf", 3000, 2000, gray=90)
+        page = PdfReader(str(pdf)).pages[0]
+
+        [image] = iter_page_images(page, max_image_bytes=1000 * 1000)
+
+        with Image.open(io.BytesIO(image.data)) as decoded:
+            assert decoded.size == (1000, 667)
+            assert decoded.getpixel((10, 10)) == 90
+
+    def test_inline_images_included(self, tmp_path):
+        pdf = make_inline_image_pdf(tmp_path / "inline.pdf", 8, 4)
+        page = PdfReader(str(pdf)).pages[0]
+
+        [image] = iter_page_images(page)
+
+        assert decoded_size(image) == (8, 4)
+
+    def test_is_lazy(self, tmp_path):
+        pdf = make_image_pdf(tmp_path / "pages.pdf", (100, 100), count=2)
+        reader = PdfReader(str(pdf))
+        page = reader.pages[0]
+
+        images = iter_page_images(page)
+
+        assert not isinstance(images, list)
+        assert isinstance(next(images), OcrImage)
+
+    def test_generic_page_images_kept_when_small(self):
+        image = Mock(data=b"not an image")
+        page = Mock(images=[image])
+
+        assert list(iter_page_images(page)) == [image]
+
+    def test_unreadable_generic_image_sent_as_is_with_warning(self, caplog):
+        image = Mock(data=b"not an image")
+        image.name = "scan.png"
+
+        assert list(iter_page_images(Mock(images=[image]))) == [image]
+        assert "Could not downsample image scan.png" in caplog.text
+
+    def test_unexpected_errors_are_not_swallowed(self):
+        image = Mock(data=12345)  # a caller bug, not a bad image
+
+        with pytest.raises(TypeError):
+            list(iter_page_images(Mock(images=[image])))
+
+
+class TestImageBudget:
+    def test_document_cap_skips_later_images(self):
+        budget = ImageBudget(max_bytes=10)
+        page = Mock(images=[Mock(data=b"x" * 6), Mock(data=b"y" * 6), Mock(data=b"z" * 4)])
+
+        images = list(iter_page_images(page, budget))
+
+        assert [image.data for image in images] == [b"x" * 6, b"z" * 4]
+        assert (budget.used, budget.skipped) == (10, 1)
+
+    def test_images_past_the_cap_are_not_decoded(self, tmp_path, mocker):
+        pdf = make_image_pdf(tmp_path / "pages.pdf", (400, 400), count=2, jpeg=False)
+        reader = PdfReader(str(pdf))
+        decode = mocker.spy(__import__("utils.page_images").page_images, "_decoded_copy")
+        budget = ImageBudget(max_bytes=1)
+
+        for page in reader.pages:
+            assert list(iter_page_images(page, budget)) == []
+
+        decode.assert_not_called()
+        assert (budget.used, budget.skipped) == (0, 2)
+
+    def test_budget_spans_pages(self):
+        budget = ImageBudget(max_bytes=8)
+        first, second = Mock(images=[Mock(data=b"a" * 5)]), Mock(images=[Mock(data=b"b" * 5)])
+
+        assert len(list(iter_page_images(first, budget))) == 1
+        assert list(iter_page_images(second, budget)) == []
+
+
+class TestPeakMemory:
+    """tracemalloc sees Python-level buffers (pypdf's decoded streams), which is where full decodes land."""
+
+    @staticmethod
+    def _peak(images):
+        """Return ([len(image.data), ...], peak traced bytes) for images(), traced from the first call."""
+        tracemalloc.start()
+        try:
+            sizes = [len(image.data) for image in images()]
+            return sizes, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_huge_flate_page_stays_within_cap(self, tmp_path):
+        # 8000x8000 8-bit gray decodes to 64 MB
+        cap = 4 * 1024 * 1024
+        pdf = make_flate_pdf(tmp_path / "huge.pdf", 8000, 8000)
+        page = PdfReader(str(pdf)).pages[0]
+
+        sizes, peak = self._peak(lambda: iter_page_images(page, max_image_bytes=cap))
+
+        assert len(sizes) == 1
+        assert peak < 2 * cap
+
+    def test_eager_decode_holds_whole_bitmap(self, tmp_path):
+        """Baseline for the test above: pypdf's own page.images decodes everything up front."""
+        pdf = make_flate_pdf(tmp_path / "huge.pdf", 8000, 8000)
+        page = PdfReader(str(pdf)).pages[0]
+
+        _, peak = self._peak(lambda: list(page.images))
+
+        assert peak > 8000 * 8000
+
+    def test_huge_jpeg_page_stays_small(self, tmp_path):
+        pdf = make_image_pdf(tmp_path / "huge.pdf", (6000, 6000))
+        page = PdfReader(str(pdf)).pages[0]
+
+        sizes, peak = self._peak(lambda: iter_page_images(page, max_image_bytes=4 * 1024 * 1024))
+
+        assert len(sizes) == 1
+        assert peak < 6000 * 6000 * 3 / 8
@@ -8,12 +8,15 @@ from utils.pdf_content import (
     extract_from_pdf,
     _extract_page_text,
     MIN_LINE_CHAR_THRESHOLD,
-    MIN_CONTENT_LINES,
     MAX_PAGES_TO_READ,
     MAX_SUMMARY_CHARS,
     MIN_OCR_TRIGGER_CHARS,
     MAX_LINES_FOR_TITLE_AND_AUTHORS,
+    TEXT_BACKENDS,
+    close_document,
+    open_document,
 )
+from tests.conftest import make_text_pdf
 
 
 class TestCleanText:
@@ -64,6 +67,17 @@ class TestCleanText:
     def test_clean_text_newlines_only(self):
         assert clean_text("\n\n\n") == []
 
+    def test_clean_text_counts_instead_of_logging_each_line(self, caplog):
+        """Dropped lines are tallied in clean_text_counters, not logged individually."""
+        from utils.pdf_content import clean_text_counters
+
+        before = clean_text_counters.copy()
+        with caplog.at_level("DEBUG"):
+            clean_text("kept line one\nab\n\nkept line two\nx")
+        assert clean_text_counters["lines_kept"] - before["lines_kept"] == 2
+        assert clean_text_counters["lines_skipped"] - before["lines_skipped"] == 3
+        assert len(caplog.records) == 1
+
     def test_clean_text_keeps_short_words_in_titles(self):
         """Lines longer than threshold like 'AI' extended words should be kept."""
         # MIN_LINE_CHAR_THRESHOLD is 2, so 3+ char lines are kept
@@ -219,7 +233,8 @@ class TestExtractPageText:
 
         result = _extract_page_text(mock_page, mock_extractor)
 
-        mock_extractor.ocr_page_images.assert_called_once_with(mock_page.images)
+        mock_extractor.ocr_page_images.assert_called_once()
+        assert list(mock_extractor.ocr_page_images.call_args[0][0]) == mock_page.images
         assert result == "OCR extracted text"
 
     def test_ocr_fallback_when_text_below_threshold(self):
@@ -342,7 +357,7 @@ class TestExtractFromPdf:
     @patch("utils.pdf_content.OllamaExtractors")
     @patch("utils.pdf_content.PdfReader")
     def test_extract_from_pdf_respects_max_pages(self, mock_pdf_reader_class, mock_extractor_class):
-        """Page reading stops at MAX_PAGES_TO_READ even if MIN_CONTENT_LINES not reached."""
+        """Page reading stops at MAX_PAGES_TO_READ even if the text budget is not met."""
         mock_extractor = Mock()
         mock_extractor.llm_title.return_value = {"title": "T"}
         mock_extractor.llm_authors.return_value = {"authors": "", "authors_list": []}
@@ -381,6 +396,23 @@ class TestExtractFromPdf:
         sent_text = mock_extractor.summarize_text.call_args[0][0]
         assert len(sent_text) <= MAX_SUMMARY_CHARS
 
+    @patch("utils.pdf_content.OllamaExtractors")
+    @patch("utils.pdf_content.PdfReader")
+    def test_extract_from_pdf_reuses_given_extractor(self, mock_pdf_reader_class, mock_extractor_class):
+        """A long-lived extractor passed in is used instead of constructing a new client."""
+        extractor = Mock()
+        extractor.llm_title.return_value = {"title": "T"}
+        extractor.llm_authors.return_value = {"authors": "", "authors_list": []}
+        extractor.summarize_text.return_value = {"summary": ""}
+        mock_page = Mock()
+        mock_page.extract_text.return_value = "Long enough line of text here\n" * 100
+        mock_pdf_reader_class.return_value = Mock(pages=[mock_page])
+
+        title, _, _, _ = extract_from_pdf(Path("/fake/test.pdf"), extractor=extractor)
+
+        mock_extractor_class.assert_not_called()
+        assert title == {"title": "T"}
+
     @patch("utils.pdf_content.PdfReader")
     def test_extract_from_pdf_file_not_found(self, mock_pdf_reader_class):
         """Test that FileNotFoundError propagates."""
@@ -398,15 +430,51 @@ class TestExtractFromPdf:
             extract_from_pdf(Path("/fake/corrupted.pdf"))
 
 
+class TestNearDuplicates:
+    """extract_from_pdf reuses title/authors from a near-duplicate document."""
+
+    def _extractor(self):
+        extractor = Mock()
+        extractor.llm_title.return_value = {"title": "Spectral Clustering"}
+        extractor.llm_authors.return_value = {"authors": "U. Luxburg", "authors_list": ["U. Luxburg"]}
+        extractor.summarize_text.return_value = {"summary": "S"}
+        return extractor
+
+    def _reader(self, text):
+        reader = Mock()
+        page = Mock()
+        page.extract_text.return_value = text
+        reader.pages = [page]
+        return reader
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.OllamaExtractors")
+    @patch("utils.pdf_content.PdfReader")
+    def test_second_copy_skips_title_llm(self, mock_reader_class, mock_extractor_class, _):
+        from utils.fingerprint import NearDuplicateIndex
+
+        extractor = self._extractor()
+        mock_extractor_class.return_value = extractor
+        body = "".join(f"Sentence number {i} of the shared front matter text\n" for i in range(80))
+        mock_reader_class.side_effect = [self._reader(body), self._reader(body + "arXiv v2 revision\n")]
+        index = NearDuplicateIndex()
+
+        extract_from_pdf(Path("/fake/v1.pdf"), near_duplicates=index)
+        title, authors, _, _ = extract_from_pdf(Path("/fake/v2.pdf"), near_duplicates=index)
+
+        assert extractor.llm_title.call_count == 1
+        assert extractor.llm_authors.call_count == 1
+        assert title == {"title": "Spectral Clustering"}
+        assert authors["authors_list"] == ["U. Luxburg"]
+        assert index.matches[Path("/fake/v2.pdf")][0] == Path("/fake/v1.pdf")
+
+
 class TestConstants:
     """Verify module constants have expected values."""
 
     def test_min_line_char_threshold(self):
         assert MIN_LINE_CHAR_THRESHOLD == 2
 
-    def test_min_content_lines(self):
-        assert MIN_CONTENT_LINES == 66 * 8
-
     def test_max_pages_to_read(self):
         assert MAX_PAGES_TO_READ == 3
 
@@ -418,3 +486,233 @@ class TestConstants:
 
     def test_max_lines_for_title_and_authors(self):
         assert MAX_LINES_FOR_TITLE_AND_AUTHORS == 30
+
+
+class TestAdaptivePageReading:
+    """Pages are read only until the title and summary budgets are covered."""
+
+    def _extractor(self):
+        extractor = Mock()
+        extractor.llm_title.return_value = {"title": "T"}
+        extractor.llm_authors.return_value = {"authors": "", "authors_list": []}
+        extractor.summarize_text.return_value = {"summary": ""}
+        extractor.ocr_page_images.return_value = "OCR line of scanned text\n" * 200
+        return extractor
+
+    def _pages(self, texts, images=()):
+        pages = []
+        for text in texts:
+            page = Mock()
+            page.extract_text.return_value = text
+            page.images = list(images)
+            pages.append(page)
+        return pages
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_dense_first_page_is_enough(self, mock_reader_class, _):
+        pages = self._pages(["Long enough line of text here\n" * 200] * 3)
+        mock_reader_class.return_value.pages = pages
+        stats = {}
+
+        extract_from_pdf(Path("/fake/dense.pdf"), extractor=self._extractor(), stats=stats)
+
+        assert pages[1].extract_text.call_count == 0
+        assert (stats["pages"], stats["pages_skipped"]) == (1, 2)
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_reads_until_summary_chars_covered(self, mock_reader_class, _):
+        # 40 lines x 30 chars = 1200 chars per page: title lines are covered by page 1,
+        # but the 4000-char summary budget needs all three pages
+        pages = self._pages(["Twenty-nine character line xx\n" * 40] * 5)
+        mock_reader_class.return_value.pages = pages
+        stats = {}
+
+        extract_from_pdf(Path("/fake/sparse.pdf"), extractor=self._extractor(), stats=stats)
+
+        assert stats["pages"] == MAX_PAGES_TO_READ
+        assert pages[MAX_PAGES_TO_READ].extract_text.call_count == 0
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_without_summary_reads_only_first_page(self, mock_reader_class, _):
+        pages = self._pages(["Short line here\n" * 5] * 3)
+        mock_reader_class.return_value.pages = pages
+
+        extract_from_pdf(Path("/fake/short.pdf"), extractor=self._extractor(), fields=frozenset({"title"}))
+
+        assert pages[1].extract_text.call_count == 0
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_counts_ocr_calls_avoided(self, mock_reader_class, _):
+        image = Mock(data=b"img")
+        pages = self._pages([""] * 3, images=[image])
+        mock_reader_class.return_value.pages = pages
+        extractor = self._extractor()
+        stats = {}
+
+        extract_from_pdf(Path("/fake/scan.pdf"), extractor=extractor, stats=stats)
+
+        assert extractor.ocr_page_images.call_count == 1
+        assert (stats["ocr_pages"], stats["ocr_calls_avoided"]) == (1, 2)
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_long_summary_reads_whole_document(self, mock_reader_class, _):
+        pages = self._pages(["Twenty-nine character line xx\n" * 40] * 8)
+        mock_reader_class.return_value.pages = pages
+        extractor = self._extractor()
+        extractor.summarize_long.return_value = {"summary": "Whole document."}
+        stats = {}
+
+        _, _, _, summary = extract_from_pdf(
+            Path("/fake/report.pdf"), extractor=extractor, stats=stats, summary_tokens=32000,
+        )
+
+        assert summary == {"summary": "Whole document."}
+        assert (stats["pages"], stats["pages_skipped"]) == (8, 0)
+        text, budget = extractor.summarize_long.call_args[0]
+        assert len(text) > MAX_SUMMARY_CHARS and budget == 32000
+        extractor.summarize_text.assert_not_called()
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_long_summary_samples_pages_across_the_document(self, mock_reader_class, _):
+        pages = self._pages([f"Page {index:02d} has a line of twenty-nine\n" * 30 for index in range(20)])
+        mock_reader_class.return_value.pages = pages
+        extractor = self._extractor()
+        extractor.summarize_long.return_value = {"summary": ""}
+
+        extract_from_pdf(Path("/fake/book.pdf"), extractor=extractor, summary_tokens=1500)
+
+        # 1500 tokens ~ 6000 chars ~ 6 pages of 1020 chars, spread from the first page to the last
+        read = [index for index, page in enumerate(pages) if page.extract_text.call_count]
+        assert len(read) == 6 and (read[0], read[-1]) == (0, 19)
+        assert max(b - a for a, b in zip(read, read[1:])) <= 4
+        text = extractor.summarize_long.call_args[0][0]
+        assert [int(line[5:7]) for line in text.splitlines()[::30]] == read
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("llms.extractors.ollama.Client")
+    @patch("utils.pdf_content.PdfReader")
+    def test_long_summary_maps_the_last_page(self, mock_reader_class, mock_client_class, _):
+        pages = self._pages([f"Page {index:03d} of the long report, line of text\n" * 40 for index in range(400)])
+        mock_reader_class.return_value.pages = pages
+        prompts = []
+
+        def chat(**call):
+            prompts.append(call["messages"][1]["content"])
+            return {"message": {"content": '{"summary": "Part of a long report.", "title": "T", '
+                                           '"authors": "", "authors_list": []}'}}
+
+        mock_client_class.return_value.chat.side_effect = chat
+        from llms.extractors import OllamaExtractors
+        extractor = OllamaExtractors()
+
+        extract_from_pdf(Path("/fake/report.pdf"), extractor=extractor, summary_tokens=16000)
+
+        assert pages[399].extract_text.call_count == 1
+        assert any("Page 399" in prompt for prompt in prompts)
+        counts = extractor.long_summary_counters
+        assert counts["dropped"] <= 1 and counts["chunks"] >= 10
+
+
+class TestFields:
+    """extract_from_pdf skips LLM calls for fields that were not requested."""
+
+    @patch("utils.pdf_content.search_dates", return_value=None)
+    @patch("utils.pdf_content.PdfReader")
+    def test_title_only_skips_summary_and_authors(self, mock_reader_class, mock_search_dates):
+        page = Mock()
+        page.extract_text.return_value = "A Title\nJane Doe\n" * 10
+        mock_reader_class.return_value.pages = [page]
+        extractor = Mock()
+        extractor.llm_title.return_value = {"title": "A Title"}
+        stats = {}
+
+        title, authors, date, summary = extract_from_pdf(
+            Path("/fake/a.pdf"), extractor=extractor, fields=frozenset({"title"}), stats=stats
+        )
+
+        assert title == {"title": "A Title"}
+        assert (authors, date, summary) == (None, None, None)
+        extractor.summarize_text.assert_not_called()
+        extractor.llm_authors.assert_not_called()
+        mock_search_dates.assert_not_called()
+        assert stats["pages"] == 1
+        assert {"read_seconds", "llm_seconds"} <= set(stats)
+
+
+class TestTextBackends:
+    """Every installed text backend reads the same text layer."""
+
+    LINES = ["A Study of Text Backends", "Jane Doe and John Roe", "Abstract: we compare extractors."]
+
+    @pytest.mark.parametrize("backend", sorted(TEXT_BACKENDS))
+    def test_backend_reads_text_layer(self, tmp_path, backend):
+        pytest.importorskip({"pypdf": "pypdf", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer"}[backend])
+        pdf = make_text_pdf(tmp_path / "doc.pdf", self.LINES)
+
+        document = open_document(pdf, backend)
+
+        assert len(document.pages) == 1
+        assert clean_text(document.pages[0].extract_text()) == self.LINES
+        assert list(document.pages[0].images) == []
+
+    @pytest.mark.parametrize("backend", sorted(TEXT_BACKENDS))
+    def test_backend_reads_buffer(self, tmp_path, backend):
+        pytest.importorskip({"pypdf": "pypdf", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer"}[backend])
+        data = make_text_pdf(tmp_path / "doc.pdf", self.LINES).read_bytes()
+
+        document = open_document(tmp_path / "moved.pdf", backend, data)
+
+        assert clean_text(document.pages[0].extract_text()) == self.LINES
+        assert list(document.pages[0].images) == []
+
+    def test_cli_names_match_backends(self):
+        from utils.api import TEXT_BACKEND_NAMES
+
+        assert TEXT_BACKEND_NAMES == tuple(TEXT_BACKENDS)
+
+    def test_pdfium_documents_read_from_many_threads(self, tmp_path):
+        pytest.importorskip("pypdfium2")
+        from concurrent.futures import ThreadPoolExecutor
+
+        pdfs = [make_text_pdf(tmp_path / f"doc{i}.pdf", [f"Document number {i}"] + self.LINES) for i in range(8)]
+
+        def read(pdf):
+            document = open_document(pdf, "pypdfium2")
+            try:
+                return clean_text(document.pages[0].extract_text())[0]
+            finally:
+                close_document(document)
+
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(read, pdfs * 4)) == [f"Document number {i}" for i in range(8)] * 4
+
+    @patch("utils.pdf_content.open_document")
+    def test_document_closed_after_reading(self, mock_open_document):
+        page = Mock()
+        page.extract_text.side_effect = RuntimeError("corrupt page")
+        mock_open_document.return_value.pages = [page]
+
+        with pytest.raises(RuntimeError):
+            extract_from_pdf(Path("/fake/a.pdf"), extractor=Mock(), fields=frozenset())
+
+        mock_open_document.return_value.close.assert_called_once()
+
+    def test_unknown_backend(self, tmp_path):
+        with pytest.raises(ValueError, match="Unknown text backend"):
+            open_document(tmp_path / "doc.pdf", "nope")
+
+    @patch("utils.pdf_content.open_document")
+    def test_extract_from_pdf_uses_selected_backend(self, mock_open_document):
+        page = Mock()
+        page.extract_text.return_value = "Some title line\n" * 10
+        mock_open_document.return_value.pages = [page]
+
+        extract_from_pdf(Path("/fake/a.pdf"), extractor=Mock(), fields=frozenset(), text_backend="pdfminer")
+
+        mock_open_document.assert_called_once_with(Path("/fake/a.pdf"), "pdfminer", None)
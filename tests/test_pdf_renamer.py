@@ -1,13 +1,21 @@
 """Unit tests for bin/pdf-renamer.py processing loops."""
+import argparse
 import importlib.util
+import io
 import json
 import logging
+import os
 import sys
+import threading
+import time
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
+from utils.isolation import ParseOutOfMemory, ParseTimeout
+from utils.plan_apply import RenameJournal, rollback_journal
+
 # bin/pdf-renamer.py has a hyphen so it cannot be imported with normal import syntax.
 _BIN = Path(__file__).resolve().parent.parent / "bin" / "pdf-renamer.py"
 _spec = importlib.util.spec_from_file_location("pdf_renamer", _BIN)
@@ -31,9 +39,9 @@ EMPTY_TITLE_RESULT = (
 
 @pytest.fixture()
 def pdf_root(tmp_path):
-    """Create a temporary directory with two dummy PDF files."""
-    (tmp_path / "good.pdf").touch()
-    (tmp_path / "bad.pdf").touch()
+    """Create a temporary directory with two distinct dummy PDF files."""
+    (tmp_path / "good.pdf").write_bytes(b"%PDF-good")
+    (tmp_path / "bad.pdf").write_bytes(b"%PDF-bad")
     return tmp_path
 
 
@@ -42,7 +50,7 @@ class TestRunDryRun:
         """run_dry_run skips a file that raises an exception and processes the rest."""
         plan_file = tmp_path / "plan.json"
 
-        def fake_extract(path):
+        def fake_extract(path, **kwargs):
             if path.name == "bad.pdf":
                 raise Exception("failed to create seqence")
             return GOOD_RESULT
@@ -59,6 +67,26 @@ class TestRunDryRun:
         assert "ERROR" in captured.out
         assert "bad.pdf" in captured.out
 
+    def test_parse_timeout_recorded_in_plan(self, pdf_root, tmp_path, capsys):
+        """A file the parse worker gave up on stays in the plan with its status and no destination."""
+        plan_file = tmp_path / "plan.json"
+
+        def fake_extract(path, **kwargs):
+            if path.name == "bad.pdf":
+                raise ParseTimeout("parsing took longer than 120s")
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            count = renamer.run_dry_run(pdf_root, plan_file)
+
+        plan = {Path(e["source"]).name: e for e in json.loads(plan_file.read_text())}
+        assert count == 2
+        assert plan["good.pdf"]["status"] == "OK"
+        assert plan["bad.pdf"] == {
+            "source": str(pdf_root / "bad.pdf"), "status": "TIMEOUT", "error": "parsing took longer than 120s",
+        }
+        assert "TIMEOUT  bad.pdf" in capsys.readouterr().out
+
     def test_error_is_logged(self, pdf_root, tmp_path):
         """run_dry_run logs the exception with exc_info when a file fails."""
         plan_file = tmp_path / "plan.json"
@@ -72,6 +100,16 @@ class TestRunDryRun:
         logged_msg = mock_log.call_args[0][0]
         assert "boom" in logged_msg or "Failed" in logged_msg
 
+    def test_plan_has_unique_destinations(self, pdf_root, tmp_path):
+        """run_dry_run resolves two sources with the same title to distinct destinations."""
+        plan_file = tmp_path / "plan.json"
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_dry_run(pdf_root, plan_file)
+
+        destinations = [Path(e["destination"]).name for e in json.loads(plan_file.read_text())]
+        assert destinations == ["Good_Title.pdf", "Good_Title_Doe.pdf"]
+
     def test_all_succeed(self, pdf_root, tmp_path):
         """run_dry_run adds all files to the plan when none fail."""
         plan_file = tmp_path / "plan.json"
@@ -84,10 +122,46 @@ class TestRunDryRun:
         assert len(plan) == 2
 
 
+class TestDuplicates:
+    def test_identical_files_extracted_once(self, pdf_root, tmp_path, capsys):
+        """Byte-identical copies reuse the canonical file's extraction result."""
+        (pdf_root / "good_copy.pdf").write_bytes(b"%PDF-good")
+        plan_file = tmp_path / "plan.json"
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            renamer.run_dry_run(pdf_root, plan_file)
+
+        assert mock_extract.call_count == 2
+        plan = {Path(e["source"]).name: e for e in json.loads(plan_file.read_text())}
+        assert plan["good_copy.pdf"]["duplicate_of"] == str(pdf_root / "good.pdf")
+        assert "DUPLICATES" in capsys.readouterr().out
+
+    def test_dedupe_plans_move_to_duplicates_dir(self, pdf_root, tmp_path):
+        (pdf_root / "good_copy.pdf").write_bytes(b"%PDF-good")
+        plan_file = tmp_path / "plan.json"
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_dry_run(pdf_root, plan_file, dedupe=True)
+
+        plan = {Path(e["source"]).name: e for e in json.loads(plan_file.read_text())}
+        destination = Path(plan["good_copy.pdf"]["destination"])
+        assert destination.parent == pdf_root / renamer.DUPLICATES_DIR_NAME
+        assert Path(plan["good.pdf"]["destination"]).parent == pdf_root
+
+    def test_run_full_dedupe_moves_copy(self, pdf_root):
+        (pdf_root / "good_copy.pdf").write_bytes(b"%PDF-good")
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamed, skipped = renamer.run_full(pdf_root, dedupe=True)
+
+        assert (renamed, skipped) == (2, 1)
+        assert len(list((pdf_root / renamer.DUPLICATES_DIR_NAME).glob("*.pdf"))) == 1
+
+
 class TestRunFull:
     def test_continues_after_exception(self, pdf_root, capsys):
         """run_full skips a file that raises an exception and renames the rest."""
-        def fake_extract(path):
+        def fake_extract(path, **kwargs):
             if path.name == "bad.pdf":
                 raise Exception("failed to create seqence")
             return GOOD_RESULT
@@ -100,6 +174,20 @@ class TestRunFull:
         assert "ERROR" in captured.out
         assert "bad.pdf" in captured.out
 
+    def test_out_of_memory_file_left_in_place(self, pdf_root, capsys):
+        """run_full reports a file whose parse worker ran out of memory and renames the rest."""
+        def fake_extract(path, **kwargs):
+            if path.name == "bad.pdf":
+                raise ParseOutOfMemory("memory limit exceeded")
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamed, _ = renamer.run_full(pdf_root)
+
+        assert renamed == 1
+        assert (pdf_root / "bad.pdf").exists()
+        assert "OOM  bad.pdf" in capsys.readouterr().out
+
     def test_all_succeed(self, pdf_root, capsys):
         """run_full renames every PDF when none fail."""
         results = [
@@ -128,14 +216,563 @@ class TestRunFull:
         json_files = list(output_dir.glob("*.json"))
         assert len(json_files) == 2
 
-    def test_skips_when_destination_exists(self, pdf_root, capsys):
-        """run_full skips a file when the destination filename already exists."""
-        # Both PDFs return the same title → second rename would collide
+    def test_disambiguates_colliding_titles(self, pdf_root, capsys):
+        """run_full renames both files when two PDFs share a title, suffixing the second."""
         with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
             renamed, skipped = renamer.run_full(pdf_root)
 
-        # One succeeds, one is skipped due to collision
+        assert renamed == 2
+        assert skipped == 0
+        assert sorted(p.name for p in pdf_root.glob("*.pdf")) == ["Good_Title.pdf", "Good_Title_Doe.pdf"]
+
+    def test_renames_can_be_rolled_back(self, pdf_root, tmp_path):
+        """Renames and --dedupe moves are journaled, so rollback_journal restores the original names."""
+        (pdf_root / "copy.pdf").write_bytes(b"%PDF-good")
+        journal = RenameJournal(tmp_path / "journal.jsonl")
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_full(pdf_root, dedupe=True, journal=journal)
+        journal.close()
+
+        restored, skipped = rollback_journal(tmp_path / "journal.jsonl", io.StringIO())
+
+        assert (restored, skipped) == (3, 0)
+        assert sorted(p.name for p in pdf_root.glob("*.pdf")) == ["bad.pdf", "copy.pdf", "good.pdf"]
+
+    def test_second_run_renames_nothing(self, pdf_root):
+        """Running again over already-renamed files, hash suffixes included, leaves every name as it is."""
+        (pdf_root / "third.pdf").write_bytes(b"%PDF-third")
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_full(pdf_root)
+            first = sorted(p.name for p in pdf_root.glob("*.pdf"))
+            renamer.run_full(pdf_root)
+
+        assert len(first) == 3
+        assert sorted(p.name for p in pdf_root.glob("*.pdf")) == first
+
+    def test_does_not_overwrite_existing_file(self, pdf_root):
+        """A file already on disk with the proposed name is never overwritten."""
+        (pdf_root / "Good_Title.pdf").write_text("keep me")
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamed, _ = renamer.run_full(pdf_root)
+
+        assert (pdf_root / "Good_Title.pdf").read_text() == "keep me"
+        assert renamed == 3
+
+    def test_writes_sqlite_when_store_given(self, pdf_root, tmp_path):
+        """run_full records every renamed PDF in the metadata store."""
+        from utils.metadata_store import MetadataStore
+
+        results = [
+            ({"title": "Title One"}, {"authors": "", "authors_list": []}, None, {"summary": ""}),
+            ({"title": "Title Two"}, {"authors": "", "authors_list": []}, None, {"summary": ""}),
+        ]
+
+        with MetadataStore(tmp_path / "meta.db") as store, \
+                patch.object(renamer, "extract_from_pdf", side_effect=results):
+            renamer.run_full(pdf_root, store=store)
+            hits = store.search("title")
+
+        assert sorted(Path(h["destination"]).name for h in hits) == ["Title_One.pdf", "Title_Two.pdf"]
+
+    def test_failed_rename_is_not_recorded(self, pdf_root, tmp_path):
+        store = Mock()
+        result = ({"title": "Title One"}, {"authors": "", "authors_list": []}, None, {"summary": ""})
+
+        with patch.object(renamer, "extract_from_pdf", return_value=result), \
+                patch.object(renamer.DestinationIndex, "move", side_effect=PermissionError("read-only")):
+            renamer.run_full(pdf_root, output_dir=tmp_path / "json", store=store)
+
+        store.add.assert_not_called()
+        assert not list((tmp_path / "json").glob("*.json"))
+
+    @pytest.mark.parametrize("argv", [
+        ["--dry-run", "--sqlite", "meta.db"],
+        ["--dry-run", "--json", "out"],
+        ["--apply", "--sqlite", "meta.db"],
+    ])
+    def test_outputs_rejected_where_nothing_is_renamed(self, argv):
+        with patch.object(sys, "argv", ["pdf-renamer", *argv]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+
+class TestRunWatch:
+    def test_renames_new_pdf_and_ignores_own_output(self, tmp_path, capsys):
+        """run_watch renames an arriving PDF once and does not re-process the renamed file."""
+        session = renamer.RenameSession(tmp_path)
+        stop = threading.Event()
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            thread = threading.Thread(target=renamer.run_watch, args=(session, 0.2, stop))
+            thread.start()
+            try:
+                time.sleep(0.2)
+                (tmp_path / "arrived.pdf").write_bytes(b"%PDF-1.4\n%%EOF\n")
+                deadline = time.monotonic() + 5
+                while not session.renamed and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                time.sleep(0.5)
+            finally:
+                stop.set()
+                thread.join()
+
+        assert mock_extract.call_count == 1
+        assert (tmp_path / "Good_Title.pdf").exists()
+
+
+class TestManifest:
+    def test_second_run_skips_unchanged_files(self, pdf_root, tmp_path, capsys):
+        """A rerun with the same manifest neither re-extracts nor renames files already processed."""
+        from utils.manifest import Manifest
+
+        manifest_path = tmp_path / "state" / "manifest.json"
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamed, _ = renamer.run_full(pdf_root, manifest=Manifest(manifest_path))
+        assert renamed == 2
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            renamed, skipped = renamer.run_full(pdf_root, manifest=Manifest(manifest_path))
+
+        assert mock_extract.call_count == 0
+        assert (renamed, skipped) == (0, 2)
+        assert sorted(p.name for p in pdf_root.glob("*.pdf")) == ["Good_Title.pdf", "Good_Title_Doe.pdf"]
+
+    def test_unchanged_files_are_not_opened(self, tmp_path, capsys, mocker):
+        """Duplicate detection compares same-size unchanged files by their stored hash instead of reading them."""
+        from utils.manifest import Manifest
+
+        pdf_root = tmp_path / "pdfs"
+        pdf_root.mkdir()
+        for name in ("one.pdf", "two.pdf", "three.pdf"):
+            (pdf_root / name).write_bytes(f"%PDF-{name:>9}".encode())    # same size, different bytes
+        manifest_path = tmp_path / "manifest.json"
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_full(pdf_root, manifest=Manifest(manifest_path))
+
+        opened = mocker.patch("utils.duplicates.file_digest", side_effect=AssertionError("opened"))
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            renamed, skipped = renamer.run_full(pdf_root, manifest=Manifest(manifest_path))
+
+        opened.assert_not_called()
+        assert mock_extract.call_count == 0
+        assert (renamed, skipped) == (0, 3)
+
+    def test_dry_run_reuses_manifest_for_unchanged_files(self, pdf_root, tmp_path):
+        """A dry run extracts only files that are new or changed since the manifest was written."""
+        from utils.manifest import Manifest
+
+        manifest_path = tmp_path / "state" / "manifest.json"
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_dry_run(pdf_root, tmp_path / "plan1.json", manifest=Manifest(manifest_path))
+
+        (pdf_root / "bad.pdf").write_bytes(b"%PDF-changed")
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            count = renamer.run_dry_run(pdf_root, tmp_path / "plan2.json", manifest=Manifest(manifest_path))
+
+        assert count == 2
+        assert [call.args[0].name for call in mock_extract.call_args_list] == ["bad.pdf"]
+
+
+class TestTimeBudget:
+    @staticmethod
+    def _scheduler():
+        from utils.scheduler import CostModel, Scheduler
+
+        # Every file is estimated at 1s; the budget leaves room for one
+        model = CostModel({"llm_seconds": 1.0, "text_page_seconds": 0.0, "megabyte_seconds": 0.0})
+        return Scheduler(time_budget=1.5, model=model)
+
+    def test_rejected_with_watch(self):
+        with patch.object(sys, "argv", ["pdf-renamer", "--time-budget", "60", "--watch"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+    def test_dry_run_stops_and_resumes(self, pdf_root, tmp_path, capsys):
+        """A budget-limited dry run checkpoints the files it did not reach; --resume completes the plan."""
+        plan_file, checkpoint = tmp_path / "plan.json", tmp_path / "checkpoint.json"
+        scheduler = self._scheduler()
+
+        def slow_extract(path, **kwargs):
+            scheduler.started -= 1.0    # pretend each file takes a second
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=slow_extract):
+            count = renamer.run_dry_run(pdf_root, plan_file, scheduler=scheduler, checkpoint=checkpoint)
+
+        assert count == 1
+        assert json.loads(checkpoint.read_text())["pending"] == [str(pdf_root / "good.pdf")]
+        assert "Continue with --resume" in capsys.readouterr().out
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            count = renamer.run_dry_run(pdf_root, plan_file, checkpoint=checkpoint, resume=True)
+
+        assert [call.args[0].name for call in mock_extract.call_args_list] == ["good.pdf"]
+        plan = json.loads(plan_file.read_text())
+        assert count == 2
+        assert sorted(Path(e["destination"]).name for e in plan) == ["Good_Title.pdf", "Good_Title_Doe.pdf"]
+        assert not checkpoint.exists()
+
+    def test_full_run_resumes_only_pending_files(self, pdf_root, tmp_path):
+        checkpoint = tmp_path / "checkpoint.json"
+        scheduler = self._scheduler()
+
+        def slow_extract(path, **kwargs):
+            scheduler.started -= 1.0
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=slow_extract):
+            renamed, _ = renamer.run_full(pdf_root, scheduler=scheduler, checkpoint=checkpoint)
         assert renamed == 1
-        assert skipped == 1
-        captured = capsys.readouterr()
-        assert "SKIP" in captured.out
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            renamed, _ = renamer.run_full(pdf_root, checkpoint=checkpoint, resume=True)
+
+        assert renamed == 1
+        assert [call.args[0].name for call in mock_extract.call_args_list] == ["good.pdf"]
+        assert sorted(p.name for p in pdf_root.glob("*.pdf")) == ["Good_Title.pdf", "Good_Title_Doe.pdf"]
+
+
+class TestSharding:
+    def test_merged_shard_plans_match_single_run(self, tmp_path):
+        """Planning in shards and merging gives the same plan as one dry run over everything."""
+        pdf_root = tmp_path / "pdfs"
+        pdf_root.mkdir()
+        for i in range(12):
+            (pdf_root / f"paper_{i:02d}.pdf").write_bytes(f"%PDF-{i}".encode())
+
+        def fake_extract(path, **kwargs):
+            # Only three distinct titles, so shards collide with each other
+            return ({"title": f"Title {int(path.stem[-2:]) % 3}"}, {"authors": "", "authors_list": []}, None, None)
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamer.run_dry_run(pdf_root, tmp_path / "single.json")
+            shard_plans = []
+            for index in (1, 2, 3):
+                shard_plans.append(tmp_path / f"plan.shard-{index}-of-3.json")
+                renamer.run_dry_run(pdf_root, shard_plans[-1], shard=(index, 3))
+
+        assert sum(len(json.loads(p.read_text())) for p in shard_plans) == 12
+        renamer.run_merge_plans(shard_plans, tmp_path / "merged.json")
+
+        merged = json.loads((tmp_path / "merged.json").read_text())
+        single = json.loads((tmp_path / "single.json").read_text())
+        assert [(e["source"], e["destination"]) for e in merged] == [(e["source"], e["destination"]) for e in single]
+
+
+class TestReportConcurrency:
+    def test_prints_limit_of_hosts_that_were_called(self, capsys):
+        from utils.concurrency import limiter_for
+
+        used, idle = limiter_for("http://report-used:1"), limiter_for("http://report-idle:1")
+        with used.slot("model"):
+            pass
+
+        renamer.report_concurrency()
+
+        out = capsys.readouterr().out
+        assert "CONCURRENCY  http://report-used:1: limit 4 " in out
+        assert idle.name not in out
+
+
+class TestCascadeOption:
+    def test_cascade_arg(self):
+        assert renamer.cascade_arg("title=small, large") == ("title", ["small", "large"])
+        with pytest.raises(argparse.ArgumentTypeError):
+            renamer.cascade_arg("title")
+
+    def test_unknown_task_exits(self):
+        with pytest.raises(SystemExit, match="unknown cascade task"):
+            renamer.make_extractor("http://127.0.0.1:1", [("date", ["small"])])
+
+    def test_report_escalation_rate(self, capsys):
+        extractor = Mock(cascade_report=Mock(return_value={
+            "title": {"documents": 4, "escalated": 1, "stopped_at": {"small": 3, "large": 1}},
+        }))
+
+        renamer.report_cascades(extractor)
+
+        assert "CASCADE  title: 1/4 escalated (25%); answered by small 3, large 1" in capsys.readouterr().out
+
+
+class TestSummaryMode:
+    def test_report_counts_summary_sources(self, capsys):
+        from collections import Counter
+
+        extractor = Mock(summary_mode="local", summary_counters=Counter(abstract=3, textrank=2, llm=1))
+
+        renamer.report_summaries(extractor)
+
+        assert "SUMMARIES  3 from the document's abstract, 2 by TextRank, 1 by the LLM" in capsys.readouterr().out
+
+    def test_local_mode_needs_numpy(self):
+        with patch.object(renamer, "textrank_available", return_value=False):
+            with pytest.raises(SystemExit, match="numpy"):
+                renamer.make_extractor("http://127.0.0.1:1", summary_mode="local")
+
+
+class TestView:
+    def test_links_instead_of_renaming(self, pdf_root, tmp_path, capsys):
+        """Originals stay put; re-runs leave links alone and drop links of deleted files."""
+        from utils.view import View
+
+        view_root = tmp_path / "view"
+        titles = {"good.pdf": "Good Title", "bad.pdf": "Other Title"}
+
+        def fake_extract(path, **kwargs):
+            return ({"title": titles[path.name]}, {"authors": "", "authors_list": []}, None, {"summary": ""})
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamed, _ = renamer.run_full(pdf_root, view=View(view_root))
+            assert renamed == 2
+            assert sorted(p.name for p in pdf_root.glob("*.pdf")) == ["bad.pdf", "good.pdf"]
+            assert os.readlink(view_root / "Good_Title.pdf") == str(pdf_root / "good.pdf")
+
+            (pdf_root / "bad.pdf").unlink()
+            view = View(view_root)
+            renamed, skipped = renamer.run_full(pdf_root, view=view)
+
+        assert (renamed, skipped) == (0, 1)
+        assert (view.unchanged, view.removed) == (1, 1)
+        assert sorted(p.name for p in view_root.glob("*.pdf")) == ["Good_Title.pdf"]
+        assert "1 already in place, 1 removed" in capsys.readouterr().out
+
+
+class TestMemprofile:
+    def test_profiles_each_document(self, pdf_root, tmp_path, capsys):
+        from utils.memprofile import MemoryProfiler
+
+        profiler = MemoryProfiler(tmp_path / "logs" / "process.memprofile.txt")
+        profiler.start()
+        try:
+            with patch.object(renamer, "extract_from_pdf", side_effect=[GOOD_RESULT, EMPTY_TITLE_RESULT]):
+                renamer.run_full(pdf_root)
+        finally:
+            profiler.stop()
+        renamer.report_memory(profiler)
+
+        records = profiler.records_path.read_text().splitlines()
+        assert sorted(json.loads(line)["document"] for line in records) == sorted(
+            str(pdf_root / name) for name in ("bad.pdf", "good.pdf")
+        )
+        assert "MEMORY  2 documents profiled, no steady growth" in capsys.readouterr().out
+
+    def test_rejected_outside_processing_modes(self):
+        with patch.object(sys, "argv", ["pdf-renamer", "--memprofile", "--serve"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+
+class TestTextBackendOption:
+    def test_unknown_backend_is_a_usage_error(self, capsys):
+        with patch.object(sys, "argv", ["pdf-renamer", "--text-backend", "nope"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+        assert "invalid choice: 'nope'" in capsys.readouterr().err
+
+
+class TestPrefetch:
+    def test_extraction_parses_prefetched_bytes(self, pdf_root, tmp_path, capsys):
+        from utils.duplicates import file_digest
+        from utils.prefetch import Prefetcher
+
+        manifest = renamer.Manifest(tmp_path / "manifest.json")
+        prefetcher = Prefetcher()
+        received = {}
+
+        def fake_extract(path, **kwargs):
+            received[path.name] = kwargs["data"]
+            if path.name == "bad.pdf":
+                time.sleep(0.2)     # an LLM call, during which good.pdf is read ahead
+                return EMPTY_TITLE_RESULT
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamer.run_full(pdf_root, manifest=manifest, prefetcher=prefetcher)
+        renamer.report_prefetch(prefetcher)
+
+        # The first file may be taken before the background read starts, and is then read on demand
+        assert received["bad.pdf"] in (None, b"%PDF-bad")
+        assert received["good.pdf"] == b"%PDF-good"
+        renamed = pdf_root / "Good_Title.pdf"
+        assert manifest.files[str(renamed)]["hash"] == file_digest(renamed)
+        assert prefetcher.hits + prefetcher.misses == 2
+        assert "PREFETCH  " in capsys.readouterr().out
+
+    def test_rejected_with_watch(self):
+        with patch.object(sys, "argv", ["pdf-renamer", "--prefetch", "4", "--watch"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+
+class TestLongSummaries:
+    def test_token_budget_reaches_extraction(self, pdf_root, tmp_path):
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT) as mock_extract:
+            renamer.run_dry_run(pdf_root, tmp_path / "plan.jsonl", summary_tokens=8000)
+
+        assert {call.kwargs["summary_tokens"] for call in mock_extract.call_args_list} == {8000}
+
+    def test_report(self, capsys):
+        from collections import Counter
+
+        extractor = Mock(long_summary_counters=Counter(documents=2, chunks=9, cached=3, dropped=1, tokens=12000))
+
+        renamer.report_long_summaries(extractor)
+
+        assert "LONG SUMMARIES  2 documents from 9 chunks (3 cached, 1 left out" in capsys.readouterr().out
+
+    def test_rejects_budget_below_one_chunk(self):
+        with patch.object(sys, "argv", ["pdf-renamer", "--long-summaries", "--summary-tokens", "100"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+
+class TestEmitNdjson:
+    @staticmethod
+    def _records(stream):
+        return {Path(record["source"]).name: record for record in map(json.loads, stream.getvalue().splitlines())}
+
+    def test_full_run_writes_a_record_per_file(self, pdf_root):
+        import io
+        from utils.ndjson import NdjsonWriter
+
+        stream = io.StringIO()
+
+        def fake_extract(path, **kwargs):
+            if path.name == "bad.pdf":
+                raise ParseTimeout("parsing took longer than 120s")
+            kwargs["stats"].update(pages=2, read_seconds=0.123456)
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamer.run_full(pdf_root, emitter=NdjsonWriter(stream))
+
+        records = self._records(stream)
+        good = records["good.pdf"]
+        assert (good["status"], good["destination"]) == ("OK", str(pdf_root / "Good_Title.pdf"))
+        assert good["title"] == {"title": "Good Title"}
+        assert good["stats"] == {"pages": 2, "read_seconds": 0.123}
+        assert good["seconds"] >= 0
+        assert records["bad.pdf"]["status"] == "TIMEOUT"
+        assert "destination" not in records["bad.pdf"]
+
+    def test_duplicates_and_errors_get_their_status(self, pdf_root):
+        import io
+        from utils.ndjson import NdjsonWriter
+
+        (pdf_root / "zz-copy.pdf").write_bytes(b"%PDF-good")
+        stream = io.StringIO()
+
+        def fake_extract(path, **kwargs):
+            if path.name == "bad.pdf":
+                raise Exception("failed to create seqence")
+            return GOOD_RESULT
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamer.run_full(pdf_root, dedupe=True, emitter=NdjsonWriter(stream))
+
+        records = self._records(stream)
+        assert records["zz-copy.pdf"]["status"] == "DUPLICATE"
+        assert records["zz-copy.pdf"]["duplicate_of"] == str(pdf_root / "good.pdf")
+        assert records["bad.pdf"] == {
+            "source": str(pdf_root / "bad.pdf"), "status": "ERROR", "error": "failed to create seqence",
+            "seconds": records["bad.pdf"]["seconds"], "stats": {},
+        }
+
+    def test_dry_run_records_are_plan_entries(self, pdf_root, tmp_path):
+        import io
+        from utils.ndjson import NdjsonWriter
+
+        plan_file = tmp_path / "plan.json"
+        stream = io.StringIO()
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            renamer.run_dry_run(pdf_root, plan_file, emitter=NdjsonWriter(stream))
+
+        plan = {Path(entry["source"]).name: entry for entry in json.loads(plan_file.read_text())}
+        records = self._records(stream)
+        assert records.keys() == plan.keys()
+        for name, record in records.items():
+            assert {key: value for key, value in record.items() if key not in ("seconds", "stats")} == plan[name]
+
+    def test_rejected_with_apply(self):
+        with patch.object(sys, "argv", ["pdf-renamer", "--emit", "ndjson", "--apply"]):
+            with pytest.raises(SystemExit):
+                renamer.parse_args()
+
+
+class TestNoClobber:
+    def test_file_created_after_listing_is_not_replaced(self, pdf_root, capsys):
+        def fake_extract(path, **kwargs):
+            # Appears once the directory has been listed, e.g. copied in by a sync client
+            (pdf_root / "Good_Title.pdf").write_bytes(b"%PDF-synced")
+            if path.name == "good.pdf":
+                return GOOD_RESULT
+            return {"title": "Other Title"}, {"authors": "", "authors_list": []}, None, {"summary": ""}
+
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            renamed, _ = renamer.run_full(pdf_root)
+
+        assert renamed == 2
+        assert (pdf_root / "Good_Title.pdf").read_bytes() == b"%PDF-synced"
+        assert (pdf_root / "Good_Title_Doe.pdf").read_bytes() == b"%PDF-good"
+        assert "1 renamed to avoid collisions" in capsys.readouterr().out
+
+
+class TestWatchCollisions:
+    @staticmethod
+    def _watch(session, arrivals):
+        """Run the watcher with each arrival written and reported ready in turn."""
+        def fake_watch(root, on_ready, settle_seconds, stop):
+            for path, data in arrivals:
+                path.write_bytes(data)
+                on_ready(path)
+
+        with patch.object(renamer, "watch_directory", side_effect=fake_watch):
+            renamer.run_watch(session)
+
+    def test_arrivals_sharing_a_title_both_kept(self, tmp_path, capsys, caplog):
+        session = renamer.RenameSession(tmp_path)
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            self._watch(session, [(tmp_path / "one.pdf", b"%PDF-one"), (tmp_path / "two.pdf", b"%PDF-two")])
+
+        assert (tmp_path / "Good_Title.pdf").read_bytes() == b"%PDF-one"
+        assert (tmp_path / "Good_Title_Doe.pdf").read_bytes() == b"%PDF-two"
+        # Resolved by the index, not by the rename finding the name taken
+        assert "appeared after the directory was listed" not in caplog.text
+
+    def test_arrivals_are_journaled(self, tmp_path, capsys):
+        journal = RenameJournal(tmp_path / "journal.jsonl")
+        session = renamer.RenameSession(tmp_path, journal=journal)
+
+        with patch.object(renamer, "extract_from_pdf", return_value=GOOD_RESULT):
+            self._watch(session, [(tmp_path / "one.pdf", b"%PDF-one")])
+        journal.close()
+
+        records = [json.loads(line) for line in (tmp_path / "journal.jsonl").read_text().splitlines()]
+        assert records == [{"source": str(tmp_path / "one.pdf"), "destination": str(tmp_path / "Good_Title.pdf")}]
+
+    def test_failed_arrival_is_not_overwritten(self, tmp_path, capsys, caplog):
+        session = renamer.RenameSession(tmp_path)
+
+        def fake_extract(path, **kwargs):
+            if path.name == "first.pdf":
+                return {"title": "Opening"}, {"authors": "", "authors_list": []}, None, {"summary": ""}
+            if path.name == "Good_Title.pdf":
+                raise Exception("unreadable")
+            return GOOD_RESULT
+
+        arrivals = [
+            (tmp_path / "first.pdf", b"%PDF-first"),    # the index lists pdf_root while processing this one
+            (tmp_path / "Good_Title.pdf", b"%PDF-broken"),
+            (tmp_path / "new.pdf", b"%PDF-new"),
+        ]
+        with patch.object(renamer, "extract_from_pdf", side_effect=fake_extract):
+            self._watch(session, arrivals)
+
+        assert (session.errors, session.renamed) == (1, 2)
+        assert (tmp_path / "Good_Title.pdf").read_bytes() == b"%PDF-broken"
+        assert (tmp_path / "Good_Title_Doe.pdf").read_bytes() == b"%PDF-new"
+        assert session.destinations.collisions == 1
+        assert "appeared after the directory was listed" not in caplog.text
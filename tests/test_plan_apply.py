@@ -0,0 +1,219 @@
+"""Unit tests and benchmark for utils/plan_apply.py."""
+import io
+import json
+import os
+import time
+
+import pytest
+
+from utils import plan_apply
+from utils.plan_apply import DirectoryIndex, apply_plan, rollback_journal
+
+BENCH_ENTRIES = int(os.environ.get("PDF_RENAMER_BENCH_ENTRIES", "100000"))
+
+
+def _plan(tmp_path, pairs):
+    return [
+        {"source": str(tmp_path / src), "destination": str(tmp_path / dst)}
+        for src, dst in pairs
+    ]
+
+
+class TestDirectoryIndex:
+    def test_lists_directory_once(self, tmp_path, mocker):
+        (tmp_path / "a.pdf").touch()
+        spy = mocker.spy(os, "scandir")
+        index = DirectoryIndex()
+
+        assert index.exists(tmp_path / "a.pdf")
+        assert not index.exists(tmp_path / "b.pdf")
+        assert spy.call_count == 1
+
+    def test_rename_updates_index(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        index = DirectoryIndex()
+        index.rename(tmp_path / "a.pdf", tmp_path / "b.pdf")
+        index.close()
+
+        assert not index.exists(tmp_path / "a.pdf")
+        assert index.exists(tmp_path / "b.pdf")
+        assert (tmp_path / "b.pdf").exists()
+
+    def test_rename_does_not_replace_file_created_after_listing(self, tmp_path):
+        (tmp_path / "a.pdf").write_text("a")
+        index = DirectoryIndex()
+        index.exists(tmp_path / "b.pdf")    # lists the directory
+        (tmp_path / "b.pdf").write_text("arrived later")
+
+        with pytest.raises(FileExistsError):
+            index.rename(tmp_path / "a.pdf", tmp_path / "b.pdf")
+        index.close()
+
+        assert (tmp_path / "b.pdf").read_text() == "arrived later"
+        assert index.exists(tmp_path / "a.pdf") and index.exists(tmp_path / "b.pdf")
+
+    def test_missing_directory_is_empty(self, tmp_path):
+        assert DirectoryIndex().names(tmp_path / "nope") == set()
+
+
+class TestApplyPlan:
+    def test_renames_and_journals(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        journal = tmp_path / "journal.jsonl"
+
+        renamed, skipped = apply_plan(_plan(tmp_path, [("a.pdf", "Title.pdf")]), journal, io.StringIO())
+
+        assert (renamed, skipped) == (1, 0)
+        assert (tmp_path / "Title.pdf").exists()
+        records = [json.loads(line) for line in journal.read_text().splitlines()]
+        assert records == [{"source": str(tmp_path / "a.pdf"), "destination": str(tmp_path / "Title.pdf")}]
+
+    def test_skips_missing_source(self, tmp_path):
+        out = io.StringIO()
+        renamed, skipped = apply_plan(_plan(tmp_path, [("gone.pdf", "X.pdf")]), tmp_path / "j.jsonl", out)
+
+        assert (renamed, skipped) == (0, 1)
+        assert "SKIP (not found)" in out.getvalue()
+
+    def test_skips_entries_that_are_not_ok(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        (tmp_path / "slow.pdf").touch()
+        plan = _plan(tmp_path, [("a.pdf", "A.pdf")]) + [{"source": str(tmp_path / "slow.pdf"), "status": "TIMEOUT"}]
+        out = io.StringIO()
+
+        renamed, skipped = apply_plan(plan, tmp_path / "j.jsonl", out)
+
+        assert (renamed, skipped) == (1, 1)
+        assert "SKIP (TIMEOUT)" in out.getvalue()
+        assert (tmp_path / "slow.pdf").exists()
+
+    def test_skips_existing_destination(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        (tmp_path / "X.pdf").touch()
+        out = io.StringIO()
+        renamed, skipped = apply_plan(_plan(tmp_path, [("a.pdf", "X.pdf")]), tmp_path / "j.jsonl", out)
+
+        assert (renamed, skipped) == (0, 1)
+        assert "SKIP (exists)" in out.getvalue()
+        assert (tmp_path / "a.pdf").exists()
+
+    def test_skips_collision_within_plan(self, tmp_path):
+        """A destination claimed earlier in the same plan counts as existing."""
+        (tmp_path / "a.pdf").touch()
+        (tmp_path / "b.pdf").touch()
+        plan = _plan(tmp_path, [("a.pdf", "X.pdf"), ("b.pdf", "X.pdf")])
+
+        renamed, skipped = apply_plan(plan, tmp_path / "j.jsonl", io.StringIO())
+
+        assert (renamed, skipped) == (1, 1)
+        assert (tmp_path / "b.pdf").exists()
+
+    def test_destination_created_after_listing_is_kept_and_cancelled(self, tmp_path, mocker):
+        """A destination that appears after the journal batch is written is not replaced, and rollback skips it."""
+        (tmp_path / "a.pdf").write_text("a")
+        journal = tmp_path / "j.jsonl"
+        write_batch = plan_apply._write_journal_batch
+
+        def write_then_arrive(*args, **kwargs):
+            write_batch(*args, **kwargs)
+            (tmp_path / "A.pdf").touch(exist_ok=True)
+
+        mocker.patch("utils.plan_apply._write_journal_batch", side_effect=write_then_arrive)
+        out = io.StringIO()
+        renamed, skipped = apply_plan(_plan(tmp_path, [("a.pdf", "A.pdf")]), journal, out)
+
+        assert (renamed, skipped) == (0, 1)
+        assert "SKIP (exists)" in out.getvalue()
+        assert (tmp_path / "a.pdf").read_text() == "a" and (tmp_path / "A.pdf").read_text() == ""
+        assert json.loads(journal.read_text().splitlines()[-1])["cancelled"] is True
+
+        (tmp_path / "a.pdf").unlink()    # even with the original name free, the arrival is not "restored"
+        assert rollback_journal(journal, io.StringIO()) == (0, 0)
+        assert (tmp_path / "A.pdf").exists() and not (tmp_path / "a.pdf").exists()
+
+    def test_output_is_batched(self, tmp_path, mocker):
+        mocker.patch("utils.plan_apply.OUTPUT_BATCH_LINES", 10)
+        for i in range(25):
+            (tmp_path / f"{i}.pdf").touch()
+        out = mocker.Mock()
+        plan = _plan(tmp_path, [(f"{i}.pdf", f"T{i}.pdf") for i in range(25)])
+
+        apply_plan(plan, tmp_path / "j.jsonl", out)
+
+        assert out.write.call_count == 3
+
+
+class TestRollback:
+    def test_restores_original_names(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        (tmp_path / "b.pdf").touch()
+        journal = tmp_path / "j.jsonl"
+        apply_plan(_plan(tmp_path, [("a.pdf", "A.pdf"), ("b.pdf", "B.pdf")]), journal, io.StringIO())
+
+        restored, skipped = rollback_journal(journal, io.StringIO())
+
+        assert (restored, skipped) == (2, 0)
+        assert (tmp_path / "a.pdf").exists() and (tmp_path / "b.pdf").exists()
+        assert not journal.exists()
+        assert (tmp_path / "j.jsonl.rolledback").exists()
+
+    def test_earlier_rolled_back_journal_is_kept(self, tmp_path):
+        (tmp_path / "a.pdf").touch()
+        journal = tmp_path / "j.jsonl"
+        for _ in range(2):
+            apply_plan(_plan(tmp_path, [("a.pdf", "A.pdf")]), journal, io.StringIO())
+            rollback_journal(journal, io.StringIO())
+
+        assert (tmp_path / "j.jsonl.rolledback").exists()
+        assert (tmp_path / "j.jsonl.rolledback.2").exists()
+        assert not journal.exists()
+
+    def test_reverses_chained_renames_in_order(self, tmp_path):
+        """x→y then y-named file→z must roll back newest first."""
+        (tmp_path / "x.pdf").touch()
+        journal = tmp_path / "j.jsonl"
+        apply_plan(_plan(tmp_path, [("x.pdf", "y.pdf")]), journal, io.StringIO())
+        apply_plan(_plan(tmp_path, [("y.pdf", "z.pdf")]), journal, io.StringIO())
+
+        restored, _ = rollback_journal(journal, io.StringIO())
+
+        assert restored == 2
+        assert (tmp_path / "x.pdf").exists()
+
+    def test_skips_unperformed_intent(self, tmp_path):
+        """A journaled intent whose rename never happened is ignored."""
+        (tmp_path / "a.pdf").touch()
+        journal = tmp_path / "j.jsonl"
+        journal.write_text(json.dumps({
+            "source": str(tmp_path / "a.pdf"), "destination": str(tmp_path / "A.pdf"),
+        }) + "\n")
+
+        restored, skipped = rollback_journal(journal, io.StringIO())
+
+        assert (restored, skipped) == (0, 1)
+        assert (tmp_path / "a.pdf").exists()
+
+
+@pytest.mark.benchmark
+def test_benchmark_apply_synthetic_plan(tmp_path, capsys):
+    """Apply and roll back a large synthetic plan, reporting entries/sec."""
+    for i in range(BENCH_ENTRIES):
+        (tmp_path / f"scan_{i:06d}.pdf").touch()
+    plan = _plan(tmp_path, [(f"scan_{i:06d}.pdf", f"Title_{i:06d}.pdf") for i in range(BENCH_ENTRIES)])
+    journal = tmp_path / "j.jsonl"
+
+    start = time.perf_counter()
+    renamed, _ = apply_plan(plan, journal, io.StringIO())
+    apply_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored, _ = rollback_journal(journal, io.StringIO())
+    rollback_secs = time.perf_counter() - start
+
+    assert renamed == restored == BENCH_ENTRIES
+    with capsys.disabled():
+        print(
+            f"\napply: {BENCH_ENTRIES} entries in {apply_secs:.2f}s "
+            f"({BENCH_ENTRIES / apply_secs:,.0f}/s); "
+            f"rollback: {rollback_secs:.2f}s ({BENCH_ENTRIES / rollback_secs:,.0f}/s)"
+        )
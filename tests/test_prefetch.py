@@ -0,0 +1,138 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from utils import prefetch
+from utils.prefetch import Prefetcher
+
+
+def _files(tmp_path, count, size=100):
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"{index}.pdf"
+        path.write_bytes(bytes([index]) * size)
+        paths.append(path)
+    return paths
+
+
+def _settle(prefetcher, expected, timeout=5.0):
+    """Wait until the background thread has read expected files."""
+    deadline = time.monotonic() + timeout
+    while prefetcher.prefetched < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+
+class TestPrefetcher:
+    def test_hands_over_files_read_ahead(self, tmp_path):
+        paths = _files(tmp_path, 3)
+        prefetcher = Prefetcher(max_files=4)
+        prefetcher.start(paths)
+        try:
+            _settle(prefetcher, 3)
+            assert [prefetcher.take(path) for path in paths] == [path.read_bytes() for path in paths]
+        finally:
+            prefetcher.close()
+
+        stats = prefetcher.snapshot()
+        assert (stats["hits"], stats["misses"], stats["waits"]) == (3, 0, 0)
+        assert stats["saved_seconds"] >= 0
+
+    def test_reads_at_most_max_files_ahead(self, tmp_path):
+        paths = _files(tmp_path, 6)
+        prefetcher = Prefetcher(max_files=2)
+        prefetcher.start(paths)
+        try:
+            _settle(prefetcher, 2)
+            assert prefetcher.prefetched == 2
+            prefetcher.take(paths[0])
+            _settle(prefetcher, 3)
+            assert prefetcher.prefetched == 3
+        finally:
+            prefetcher.close()
+
+    def test_bounded_by_bytes(self, tmp_path):
+        paths = _files(tmp_path, 4, size=100)
+        prefetcher = Prefetcher(max_files=4, max_bytes=250)
+        prefetcher.start(paths)
+        try:
+            _settle(prefetcher, 2)
+            assert prefetcher.prefetched == 2
+        finally:
+            prefetcher.close()
+
+    def test_large_file_only_hinted(self, tmp_path):
+        small, large = _files(tmp_path, 1, size=10)[0], tmp_path / "large.pdf"
+        large.write_bytes(b"x" * 1000)
+        prefetcher = Prefetcher(max_bytes=500)
+        with patch.object(prefetch, "_hint") as hint:
+            prefetcher.start([large, small])
+            _settle(prefetcher, 1)
+            assert prefetcher.take(large) is None
+            assert prefetcher.take(small) == small.read_bytes()
+            prefetcher.close()
+
+        hint.assert_called_once_with(large)
+        assert (prefetcher.hinted, prefetcher.misses, prefetcher.hits) == (1, 1, 1)
+
+    def test_skipped_files_are_not_read(self, tmp_path):
+        paths = _files(tmp_path, 3)
+        prefetcher = Prefetcher()
+        prefetcher.start(paths, skip=lambda path: path == paths[1])
+        try:
+            _settle(prefetcher, 2)
+            assert prefetcher.take(paths[1]) is None
+            assert prefetcher.prefetched == 2
+        finally:
+            prefetcher.close()
+
+    def test_take_waits_for_read_in_progress(self, tmp_path):
+        path, = _files(tmp_path, 1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_read(p):
+            started.set()
+            release.wait(5)
+            return p.read_bytes()
+
+        prefetcher = Prefetcher()
+        with patch.object(prefetch, "_read", side_effect=slow_read):
+            prefetcher.start([path])
+            assert started.wait(5)
+            threading.Timer(0.1, release.set).start()
+            data = prefetcher.take(path)
+            prefetcher.close()
+
+        assert data == path.read_bytes()
+        assert prefetcher.waits == 1
+        assert prefetcher.wait_seconds >= 0.05
+
+    def test_files_passed_by_the_batch_are_dropped(self, tmp_path):
+        paths = _files(tmp_path, 3)
+        prefetcher = Prefetcher(max_files=3)
+        prefetcher.start(paths)
+        try:
+            _settle(prefetcher, 3)
+            assert prefetcher.take(paths[2]) == paths[2].read_bytes()
+            assert prefetcher.take(paths[0]) is None
+            assert prefetcher._held == 0
+        finally:
+            prefetcher.close()
+
+    def test_unreadable_file_left_to_the_caller(self, tmp_path):
+        missing = tmp_path / "missing.pdf"
+        path, = _files(tmp_path, 1)
+        prefetcher = Prefetcher()
+        prefetcher.start([missing, path])
+        try:
+            _settle(prefetcher, 1)
+            assert prefetcher.take(missing) is None
+            assert prefetcher.take(path) == path.read_bytes()
+        finally:
+            prefetcher.close()
+
+    def test_rejects_zero_files(self):
+        with pytest.raises(ValueError):
+            Prefetcher(max_files=0)
@@ -0,0 +1,162 @@
+import json
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from tests.conftest import make_text_pdf
+from utils.scheduler import PROBE_BYTES, CostModel, Job, Scheduler, load_checkpoint, probe, save_checkpoint
+
+
+def make_scan_pdf(path: Path, pages: int = 1) -> Path:
+    images = [Image.new("L", (200, 200), 255) for _ in range(pages)]
+    images[0].save(path, format="PDF", save_all=True, append_images=images[1:])
+    return path
+
+
+class TestProbe:
+    def test_text_pdf(self, tmp_path):
+        job = probe(make_text_pdf(tmp_path / "a.pdf", ["Some title"]))
+
+        assert (job.pages, job.has_text) == (1, True)
+        assert job.size == (tmp_path / "a.pdf").stat().st_size
+
+    def test_scanned_pdf_has_no_text_layer(self, tmp_path):
+        job = probe(make_scan_pdf(tmp_path / "scan.pdf", pages=3))
+
+        assert (job.pages, job.has_text) == (3, False)
+
+    def test_page_count_falls_back_to_size(self, tmp_path):
+        path = tmp_path / "packed.pdf"
+        path.write_bytes(b"%PDF-1.5\n" + b"\0" * 350 * 1024)
+
+        assert probe(path).pages == 3
+
+    def test_large_file_read_only_at_both_ends(self, tmp_path):
+        path = tmp_path / "big.pdf"
+        middle = b"/Type /Page /Font" * (4 * PROBE_BYTES // 17)
+        path.write_bytes(b"%PDF-1.7\n" + middle + b"1 0 obj << /Type /Pages /Kids [2 0 R] /Count 42 >> endobj\n")
+        read = []
+
+        def counting_open(*args):
+            f = open(*args)
+            real_read = f.read
+            f.read = lambda size=-1: read.append(len(data := real_read(size))) or data
+            return f
+
+        with patch("utils.scheduler.open", side_effect=counting_open, create=True):
+            job = probe(path)
+
+        assert job.pages == 42
+        assert sum(read) == 2 * PROBE_BYTES < job.size
+
+    def test_page_objects_scaled_to_file_size(self, tmp_path):
+        path = tmp_path / "big.pdf"
+        page = b"<< /Type /Page >>".ljust(1024, b" ")
+        path.write_bytes(page * (8 * PROBE_BYTES // 1024))
+
+        assert probe(path).pages == pytest.approx(8 * PROBE_BYTES // 1024, rel=0.01)
+
+
+class TestCostModel:
+    def test_scan_costs_more_than_text(self):
+        model = CostModel()
+        text = Job(Path("t.pdf"), 10**6, 0, 10, True)
+        scan = Job(Path("s.pdf"), 10**6, 0, 300, False)
+
+        assert model.estimate(scan) > 5 * model.estimate(text)
+
+    def test_observations_update_timings(self):
+        model = CostModel({"ocr_page_seconds": 10.0, "megabyte_seconds": 0.0})
+        scan = Job(Path("s.pdf"), 0, 0, 300, False)
+        before = model.estimate(scan)
+
+        for _ in range(20):
+            model.observe(scan, {"pages": 1, "ocr_pages": 1, "read_seconds": 2.0, "llm_seconds": 1.0})
+
+        assert model.timings["ocr_page_seconds"] == pytest.approx(2.0, rel=0.01)
+        assert model.timings["pages_read"] == pytest.approx(1.0, rel=0.01)
+        assert model.estimate(scan) < before / 3
+
+    def test_cache_hits_are_ignored(self):
+        model = CostModel()
+        model.observe(Job(Path("a.pdf"), 0, 0, 1, True), {})
+
+        assert (model.observed, model.timings) == (0, CostModel.DEFAULTS)
+
+
+class TestScheduler:
+    @pytest.fixture()
+    def files(self, tmp_path):
+        small = make_text_pdf(tmp_path / "c_small.pdf", ["Title"])
+        scan = make_scan_pdf(tmp_path / "a_scan.pdf", pages=2)
+        copy = tmp_path / "b_copy.pdf"
+        copy.write_bytes(small.read_bytes())
+        os.utime(scan, (1, 1))
+        return {"small": small, "scan": scan, "copy": copy}
+
+    def test_name_order(self, files):
+        jobs = Scheduler().plan(sorted(files.values()))
+
+        assert [job.path.name for job in jobs] == ["a_scan.pdf", "b_copy.pdf", "c_small.pdf"]
+
+    def test_cheapest_first_keeps_copies_after_their_original(self, files):
+        jobs = Scheduler("cheapest").plan(sorted(files.values()), {files["copy"]: files["small"]})
+
+        assert [job.path.name for job in jobs] == ["c_small.pdf", "b_copy.pdf", "a_scan.pdf"]
+
+    def test_newest_first(self, files):
+        jobs = Scheduler("newest").plan([files["scan"], files["small"]])
+
+        assert jobs[-1].path == files["scan"]
+
+    def test_name_order_without_budget_does_not_read_files(self, files):
+        with patch("utils.scheduler.probe") as probe_file:
+            jobs = Scheduler().plan(sorted(files.values()))
+
+        probe_file.assert_not_called()
+        assert all(job.cost > 0 for job in jobs)
+
+    def test_skipped_files_are_not_probed(self, files):
+        with patch("utils.scheduler.probe", wraps=probe) as probe_file:
+            jobs = Scheduler("cheapest").plan(sorted(files.values()), skip=lambda path: path == files["scan"])
+
+        assert files["scan"] not in [call.args[0] for call in probe_file.call_args_list]
+        assert probe_file.call_count == 2
+        assert jobs[0].path == files["scan"] and jobs[0].cost == 0
+
+    def test_unknown_order(self):
+        with pytest.raises(ValueError):
+            Scheduler("random")
+
+    def test_time_budget(self):
+        scheduler = Scheduler(time_budget=10)
+        job = Job(Path("a.pdf"), 0, 0, 1, True, cost=4)
+
+        assert scheduler.fits(job)
+        scheduler.started -= 7
+        assert not scheduler.fits(job)
+
+
+class TestCheckpoint:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        model = CostModel({"llm_seconds": 3.5})
+
+        save_checkpoint(path, "full", tmp_path, [tmp_path / "x.pdf"], model)
+        state = load_checkpoint(path, "full", tmp_path)
+
+        assert state["pending"] == [tmp_path / "x.pdf"]
+        assert state["timings"]["llm_seconds"] == 3.5
+
+    def test_rejects_other_mode_or_root(self, tmp_path):
+        path = tmp_path / "checkpoint.json"
+        save_checkpoint(path, "dry-run", tmp_path, [], CostModel())
+
+        with pytest.raises(ValueError):
+            load_checkpoint(path, "full", tmp_path)
+        with pytest.raises(ValueError):
+            load_checkpoint(path, "dry-run", tmp_path / "other")
+        assert json.loads(path.read_text())["mode"] == "dry-run"
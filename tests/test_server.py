@@ -0,0 +1,220 @@
+"""Unit tests for utils/server.py, run against a stand-in Ollama server."""
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+
+from llms.extractors import OllamaExtractors
+from tests.conftest import FakeOllama, make_text_pdf
+from utils.api import ExtractionResult
+from utils.server import Busy, ExtractionService, make_server
+
+
+def _lines(n: int) -> list[str]:
+    return ["Fake Title", "Jane Doe, Example University"] + [f"Body sentence number {i} of the paper." for i in range(n)]
+
+
+@pytest.fixture()
+def running():
+    """Start servers built by the test and shut them down afterwards."""
+    started = []
+
+    def start(service: ExtractionService) -> str:
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append((server, service))
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server, service in started:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def _post(url: str, body: bytes, content_type: str, headers: dict | None = None) -> tuple[int, dict]:
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type, **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _raw_status(url: str, head: str) -> int:
+    """Send request headers only (no body) and return the response status code."""
+    host, port = url.removeprefix("http://").split(":")
+    with socket.create_connection((host, int(port)), timeout=5) as sock:
+        sock.sendall(head.encode() + b"\r\n\r\n")
+        return int(sock.makefile("rb").readline().split()[1])
+
+
+class TestExtractionService:
+    def test_rejects_beyond_admission_limit(self):
+        release = threading.Event()
+
+        def blocking(*args, **kwargs):
+            release.wait(5)
+            return ExtractionResult(args[0])
+
+        service = ExtractionService(extractor=Mock(), workers=1, max_pending=2)
+        with patch("utils.server.extract_one", side_effect=blocking):
+            futures = [service.submit("a.pdf"), service.submit("b.pdf")]
+            with pytest.raises(Busy):
+                service.submit("c.pdf")
+            assert service.status()["rejected"] == 1
+            release.set()
+            for future in futures:
+                future.result()
+        # Slots are returned once work completes
+        assert service.status()["pending"] == 0
+        service.close()
+
+
+class TestServer:
+    def test_upload_returns_json_result(self, tmp_path, fake_ollama, running):
+        pdf = make_text_pdf(tmp_path / "paper.pdf", _lines(5))
+        url = running(ExtractionService(OllamaExtractors(host=fake_ollama.host), workers=2))
+
+        status, body = _post(url + "/extract", pdf.read_bytes(), "application/pdf", {"X-Filename": "paper.pdf"})
+
+        assert status == 200
+        assert body["title"] == "Fake Title"
+        assert body["authors"] == ["Jane Doe"]
+        assert body["summary"] == "A fake summary."
+        assert body["path"] == "paper.pdf"
+        assert body["error"] is None
+        assert body["total_seconds"] > 0
+
+    def test_path_request(self, tmp_path, fake_ollama, running):
+        pdf = make_text_pdf(tmp_path / "paper.pdf", _lines(5))
+        url = running(ExtractionService(OllamaExtractors(host=fake_ollama.host)))
+
+        status, body = _post(url + "/extract", json.dumps({"path": str(pdf)}).encode(), "application/json")
+
+        assert status == 200
+        assert body["path"] == str(pdf)
+        assert pdf.exists()  # caller's file is never deleted
+
+    def test_bad_requests(self, tmp_path, running):
+        url = running(ExtractionService(extractor=Mock()))
+
+        assert _post(url + "/extract", b"{}", "application/json")[0] == 400
+        assert _post(url + "/extract", json.dumps({"path": str(tmp_path / "missing.pdf")}).encode(),
+                     "application/json")[0] == 400
+        assert _post(url + "/extract", b"hello", "text/plain")[0] == 415
+        assert _post(url + "/nowhere", b"", "application/pdf")[0] == 404
+
+    @pytest.mark.parametrize("length", ["-1", "abc", "1_000"])
+    def test_malformed_content_length_is_400(self, running, length):
+        url = running(ExtractionService(extractor=Mock()))
+
+        head = f"POST /extract HTTP/1.1\r\nContent-Type: application/pdf\r\nContent-Length: {length}"
+        assert _raw_status(url, head) == 400
+
+    def test_oversized_upload_refused_before_reading(self, running):
+        url = running(ExtractionService(extractor=Mock()))
+
+        head = f"POST /extract HTTP/1.1\r\nContent-Type: application/pdf\r\nContent-Length: {10**9}"
+        assert _raw_status(url, head) == 413
+        head = "POST /extract HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: 100000"
+        assert _raw_status(url, head) == 413
+
+    def test_busy_upload_refused_before_reading(self, running):
+        service = ExtractionService(extractor=Mock(), max_pending=1)
+        url = running(service)
+        service.admit()
+        try:
+            # The body is never sent: the answer must not wait for it
+            head = "POST /extract HTTP/1.1\r\nContent-Type: application/pdf\r\nContent-Length: 50000000"
+            assert _raw_status(url, head) == 503
+        finally:
+            service.release()
+        assert service.status()["pending"] == 0
+
+    def test_upload_streamed_in_chunks(self, tmp_path, running):
+        received = []
+
+        def extract(path, *args, **kwargs):
+            received.append(path.read_bytes())
+            return ExtractionResult(path)
+
+        url = running(ExtractionService(extractor=Mock()))
+        body = bytes(range(256)) * 1000
+        with patch("utils.server.extract_one", side_effect=extract), patch("utils.server.UPLOAD_CHUNK_BYTES", 4096):
+            assert _post(url + "/extract", body, "application/pdf")[0] == 200
+
+        assert received == [body]
+
+    def test_unreadable_upload_is_422(self, running):
+        url = running(ExtractionService(extractor=Mock()))
+        status, body = _post(url + "/extract", b"not a pdf", "application/pdf")
+        assert status == 422
+        assert body["error"]
+
+    def test_health(self, running):
+        url = running(ExtractionService(extractor=Mock(), workers=3, max_pending=7))
+        with urllib.request.urlopen(url + "/health", timeout=5) as response:
+            body = json.loads(response.read())
+        assert (body["workers"], body["max_pending"], body["pending"]) == (3, 7, 0)
+        assert all("limit" in limiter for limiter in body["llm_concurrency"].values())
+
+    def test_busy_returns_503_with_retry_after(self, tmp_path, running):
+        release = threading.Event()
+
+        def blocking(*args, **kwargs):
+            release.wait(5)
+            return ExtractionResult(args[0])
+
+        pdf = make_text_pdf(tmp_path / "paper.pdf", _lines(1))
+        url = running(ExtractionService(extractor=Mock(), workers=1, max_pending=1))
+        body = json.dumps({"path": str(pdf)}).encode()
+        with patch("utils.server.extract_one", side_effect=blocking), ThreadPoolExecutor(1) as pool:
+            first = pool.submit(_post, url + "/extract", body, "application/json")
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                with urllib.request.urlopen(url + "/health", timeout=5) as response:
+                    if json.loads(response.read())["pending"]:
+                        break
+                time.sleep(0.01)
+            request = urllib.request.Request(url + "/extract", data=body, headers={"Content-Type": "application/json"})
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                urllib.request.urlopen(request, timeout=5)
+            release.set()
+            assert first.result()[0] == 200
+        assert excinfo.value.code == 503
+        assert excinfo.value.headers["Retry-After"]
+
+    def test_throughput_with_concurrent_clients(self, tmp_path, running):
+        """Concurrent uploads overlap their LLM calls on the shared pool.
+
+        The CPU-bound date scan is left out so the test measures request overlap.
+        """
+        latency, documents, workers = 0.1, 12, 4
+        fake = FakeOllama(latency=latency)
+        try:
+            pdfs = [make_text_pdf(tmp_path / f"p{i}.pdf", _lines(5)).read_bytes() for i in range(documents)]
+            service = ExtractionService(
+                OllamaExtractors(host=fake.host), workers=workers, max_pending=documents,
+                fields=frozenset({"title", "authors", "summary"}),
+            )
+            url = running(service)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(documents) as clients:
+                statuses = [s for s, _ in clients.map(lambda b: _post(url + "/extract", b, "application/pdf"), pdfs)]
+            elapsed = time.perf_counter() - started
+        finally:
+            fake.close()
+
+        assert statuses == [200] * documents
+        assert len(fake.requests) == documents * 3  # title, authors, summary
+        serial = documents * 3 * latency
+        print(f"\n{documents} documents in {elapsed:.2f}s ({documents / elapsed:.1f} docs/s, serial {serial:.2f}s)")
+        assert elapsed < serial / 2
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest
+
+from utils.sharding import merge_plans, parse_shard, select_shard, shard_key, shard_path
+
+
+def _entry(source: Path, destination: Path, title: str, surname: str = "", **extra) -> dict:
+    authors = {"authors": surname, "authors_list": [surname] if surname else []}
+    return {
+        "source": str(source), "destination": str(destination), "status": "OK",
+        "title": {"title": title}, "authors": authors, "date": None, "summary": None, **extra,
+    }
+
+
+@pytest.fixture()
+def library(tmp_path):
+    for i in range(40):
+        (tmp_path / f"paper_{i:02d}.pdf").write_bytes(f"%PDF-{i}".encode())
+    return tmp_path
+
+
+class TestParseShard:
+    def test_valid(self):
+        assert parse_shard("2/4") == (2, 4)
+
+    @pytest.mark.parametrize("text", ["0/4", "5/4", "2", "a/b", "-1/3"])
+    def test_invalid(self, text):
+        with pytest.raises(ValueError):
+            parse_shard(text)
+
+
+class TestSelectShard:
+    def test_shards_partition_the_files(self, library):
+        pdfs = sorted(library.glob("*.pdf"))
+        shards = [select_shard(pdfs, i, 3) for i in (1, 2, 3)]
+
+        assert sorted(p for shard in shards for p in shard) == pdfs
+        assert all(shards)
+
+    def test_identical_copies_share_a_shard(self, library):
+        (library / "copy.pdf").write_bytes((library / "paper_07.pdf").read_bytes())
+
+        assert shard_key(library / "copy.pdf") == shard_key(library / "paper_07.pdf")
+
+    def test_key_does_not_depend_on_location(self, library, tmp_path_factory):
+        elsewhere = tmp_path_factory.mktemp("mount") / "paper_03.pdf"
+        elsewhere.write_bytes((library / "paper_03.pdf").read_bytes())
+
+        assert shard_key(elsewhere) == shard_key(library / "paper_03.pdf")
+
+
+def test_shard_path():
+    assert shard_path(Path("out/rename_plan.json"), 2, 4) == Path("out/rename_plan.shard-2-of-4.json")
+
+
+class TestMergePlans:
+    def test_resolves_collisions_between_shards(self, tmp_path):
+        a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        a.touch(), b.touch()
+        # Each shard picked the plain name on its own
+        shard_1 = [_entry(b, tmp_path / "Intro.pdf", "Intro", "Smith")]
+        shard_2 = [_entry(a, tmp_path / "Intro.pdf", "Intro", "Jones")]
+
+        merged = merge_plans([shard_1, shard_2])
+
+        assert [(Path(e["source"]).name, Path(e["destination"]).name) for e in merged] == [
+            ("a.pdf", "Intro.pdf"), ("b.pdf", "Intro_Smith.pdf"),
+        ]
+
+    def test_is_independent_of_plan_order(self, tmp_path):
+        a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        a.touch(), b.touch()
+        plans = [[_entry(a, tmp_path / "T.pdf", "T")], [_entry(b, tmp_path / "T.pdf", "T")]]
+
+        assert merge_plans(plans) == merge_plans(plans[::-1])
+
+    def test_keeps_failed_entries_and_duplicate_directory(self, tmp_path):
+        a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        a.touch(), b.touch()
+        failed = {"source": str(a), "status": "TIMEOUT", "error": "parsing took longer than 120s"}
+        copy = _entry(b, tmp_path / "duplicates" / "T.pdf", "T", duplicate_of=str(a))
+
+        merged = merge_plans([[failed], [copy]])
+
+        assert merged == [failed, copy]
@@ -0,0 +1,67 @@
+"""Startup-latency guards for bin/pdf-renamer.py, based on python -X importtime."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_BIN = Path(__file__).resolve().parent.parent / "bin" / "pdf-renamer.py"
+
+# Imported only by the modes that extract metadata
+HEAVY_MODULES = ("dateparser", "pypdf", "ollama", "pydantic", "tqdm", "llms.extractors", "utils.pdf_content")
+# Cumulative import time budget for the script's own imports (excludes interpreter/site startup)
+IMPORT_BUDGET_SECONDS = 0.25
+
+
+def import_times(*args: str, cwd: Path) -> dict[str, tuple[int, int]]:
+    """Run the script under -X importtime and return {module: (nesting depth, cumulative microseconds)}."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", str(_BIN), *args],
+        cwd=cwd, capture_output=True, text=True, timeout=60,
+    )
+    assert completed.returncode == 0, completed.stderr
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            times[name.strip()] = (depth, int(cumulative))
+    return times
+
+
+@pytest.fixture()
+def empty_plan(tmp_path):
+    plan = tmp_path / "plan.json"
+    plan.write_text(json.dumps([]))
+    return plan
+
+
+class TestLazyImports:
+    def test_help_skips_extraction_stack(self, tmp_path):
+        times = import_times("--help", cwd=tmp_path)
+        assert not [m for m in HEAVY_MODULES if m in times]
+
+    def test_apply_skips_extraction_stack(self, tmp_path, empty_plan):
+        times = import_times(
+            "--apply", "--plan-file", str(empty_plan), "--journal-file", str(tmp_path / "journal.jsonl"),
+            "--log-path", str(tmp_path / "process.log"), cwd=tmp_path,
+        )
+        assert not [m for m in HEAVY_MODULES if m in times]
+
+
+@pytest.mark.benchmark
+class TestImportTimeBudget:
+    def test_apply_imports_within_budget(self, tmp_path, empty_plan):
+        times = import_times(
+            "--apply", "--plan-file", str(empty_plan), "--journal-file", str(tmp_path / "journal.jsonl"),
+            "--log-path", str(tmp_path / "process.log"), cwd=tmp_path,
+        )
+        # Project modules imported directly by the script, including everything they pull in
+        own = {name: t for name, (depth, t) in times.items() if depth == 0 and name.startswith(("utils", "llms"))}
+        total = sum(own.values()) / 1e6
+        slowest = sorted(own.items(), key=lambda item: -item[1])[:3]
+        print(f"\nproject imports: {total * 1000:.1f} ms; slowest: {slowest}")
+        assert total < IMPORT_BUDGET_SECONDS
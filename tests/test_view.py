@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+
+from utils.view import UNKNOWN_AUTHOR, VIEW_INDEX_NAME, View
+
+AUTHORS = {"authors": "Jane Doe", "authors_list": ["Jane Doe"]}
+DATE = {"date": "2019-05-01 00:00:00", "date_line": "May 2019"}
+
+
+@pytest.fixture()
+def sources(tmp_path):
+    root = tmp_path / "pdfs"
+    root.mkdir()
+    paths = [root / "a.pdf", root / "b.pdf"]
+    for path in paths:
+        path.write_bytes(b"%PDF-" + path.name.encode())
+    return paths
+
+
+class TestView:
+    def test_symlink_to_original(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+
+        link, changed = view.place(sources[0], "Clean_Title")
+
+        assert changed
+        assert link == tmp_path / "view" / "Clean_Title.pdf"
+        assert os.readlink(link) == str(sources[0].resolve())
+        assert link.read_bytes() == sources[0].read_bytes()
+        assert sources[0].exists()
+
+    def test_hard_link_shares_inode(self, tmp_path, sources):
+        view = View(tmp_path / "view", link="hard")
+
+        link, _ = view.place(sources[0], "Clean_Title")
+
+        assert not link.is_symlink()
+        assert link.stat().st_ino == sources[0].stat().st_ino
+
+    @pytest.mark.parametrize("layout, parts", [
+        ("year", ("2019",)), ("author", ("Doe",)), ("year-author", ("2019", "Doe")),
+    ])
+    def test_layouts(self, tmp_path, sources, layout, parts):
+        view = View(tmp_path / "view", layout=layout)
+
+        link, _ = view.place(sources[0], "Clean_Title", AUTHORS, DATE)
+
+        assert link == (tmp_path / "view").joinpath(*parts, "Clean_Title.pdf")
+
+    def test_unknown_author_directory(self, tmp_path, sources):
+        view = View(tmp_path / "view", layout="author")
+
+        link, _ = view.place(sources[0], "Clean_Title")
+
+        assert link.parent.name == UNKNOWN_AUTHOR
+
+    def test_colliding_titles_disambiguated(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+
+        first, _ = view.place(sources[0], "Same")
+        second, _ = view.place(sources[1], "Same", AUTHORS)
+
+        assert (first.name, second.name) == ("Same.pdf", "Same_Doe.pdf")
+
+    def test_rerun_leaves_links_alone(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+        link, _ = view.place(sources[0], "Clean_Title")
+        view.save()
+        before = os.lstat(link).st_ino
+
+        again = View(tmp_path / "view")
+        same, changed = again.place(sources[0], "Clean_Title")
+
+        assert (same, changed) == (link, False)
+        assert os.lstat(link).st_ino == before
+        assert again.unchanged == 1
+
+    def test_new_title_moves_link(self, tmp_path, sources):
+        view = View(tmp_path / "view", layout="year")
+        old, _ = view.place(sources[0], "Old_Title", date=DATE)
+
+        new, changed = view.place(sources[0], "New_Title")
+
+        assert changed
+        assert not old.exists() and not old.parent.exists()  # emptied layout directory removed
+        assert new.parent.name == "unknown-year"
+
+    def test_broken_or_replaced_link_recreated(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+        link, _ = view.place(sources[0], "Clean_Title")
+        link.unlink()
+
+        again, changed = view.place(sources[0], "Clean_Title")
+
+        assert changed and again.is_symlink()
+
+    def test_switching_link_kind_relinks(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+        view.place(sources[0], "Clean_Title")
+        view.save()
+        hard = View(tmp_path / "view", link="hard")
+
+        link, changed = hard.place(sources[0], "Clean_Title")
+
+        assert changed and not link.is_symlink()
+        assert link.name == "Clean_Title.pdf"
+
+    def test_prune_removes_links_of_missing_sources(self, tmp_path, sources):
+        view = View(tmp_path / "view")
+        kept, _ = view.place(sources[0], "Kept")
+        gone, _ = view.place(sources[1], "Gone")
+        sources[1].unlink()
+
+        assert view.prune([sources[0]]) == 1
+
+        assert kept.is_symlink() and not gone.is_symlink()
+        view.save()
+        index = json.loads((tmp_path / "view" / VIEW_INDEX_NAME).read_text())
+        assert list(index["entries"]) == [os.path.abspath(sources[0])]
+
+    def test_rejects_unknown_layout(self, tmp_path):
+        with pytest.raises(ValueError, match="layout"):
+            View(tmp_path / "view", layout="decade")
@@ -0,0 +1,98 @@
+"""Unit tests for utils/watcher.py."""
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from utils.watcher import Debouncer, _load_inotify, is_candidate, watch_directory
+
+PDF_BYTES = b"%PDF-1.4\n1 0 obj <<>> endobj\ntrailer <<>>\n%%EOF\n"
+
+
+class TestIsCandidate:
+    @pytest.mark.parametrize("name", ["paper.pdf", "A Tutorial.pdf"])
+    def test_accepts_pdfs(self, name):
+        assert is_candidate(Path(name))
+
+    @pytest.mark.parametrize("name", [
+        ".paper.pdf.~3f2a", ".paper.pdf", "paper.pdf.part", "paper.pdf.crdownload", "notes.txt",
+    ])
+    def test_rejects_temp_and_other_files(self, name):
+        assert not is_candidate(Path(name))
+
+
+class TestDebouncer:
+    def test_released_after_settle(self, tmp_path):
+        path = tmp_path / "a.pdf"
+        path.write_bytes(PDF_BYTES)
+        debouncer = Debouncer(settle_seconds=2.0)
+        debouncer.touch(path, now=0.0)
+
+        assert debouncer.ready(now=1.0) == []
+        assert debouncer.ready(now=2.5) == [path]
+        assert debouncer.ready(now=5.0) == []
+
+    def test_growing_file_resets_timer(self, tmp_path):
+        path = tmp_path / "a.pdf"
+        path.write_bytes(b"%PDF-1.4 partial")
+        debouncer = Debouncer(settle_seconds=2.0)
+        debouncer.touch(path, now=0.0)
+        path.write_bytes(PDF_BYTES)
+
+        assert debouncer.ready(now=1.5) == []
+        assert debouncer.ready(now=3.0) == []
+        assert debouncer.ready(now=3.6) == [path]
+
+    def test_waits_for_eof_marker(self, tmp_path):
+        path = tmp_path / "a.pdf"
+        path.write_bytes(b"%PDF-1.4 no trailer yet")
+        debouncer = Debouncer(settle_seconds=1.0)
+        debouncer.touch(path, now=0.0)
+
+        assert debouncer.ready(now=2.0) == []
+        assert debouncer.ready(now=11.0) == [path]
+
+    def test_deleted_file_is_dropped(self, tmp_path):
+        path = tmp_path / "a.pdf"
+        path.write_bytes(PDF_BYTES)
+        debouncer = Debouncer(settle_seconds=1.0)
+        debouncer.touch(path, now=0.0)
+        path.unlink()
+
+        assert debouncer.ready(now=5.0) == []
+        assert debouncer.pending == {}
+
+
+def _watch(tmp_path, use_inotify):
+    seen: list[Path] = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch_directory,
+        args=(tmp_path, seen.append),
+        kwargs={"settle_seconds": 0.2, "poll_interval": 0.05, "stop": stop, "use_inotify": use_inotify},
+    )
+    thread.start()
+    return seen, stop, thread
+
+
+@pytest.mark.parametrize("use_inotify", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(_load_inotify() is None, reason="inotify unavailable")),
+])
+def test_watch_reports_new_pdf_once(tmp_path, use_inotify):
+    (tmp_path / "existing.pdf").write_bytes(PDF_BYTES)
+    seen, stop, thread = _watch(tmp_path, use_inotify)
+    try:
+        time.sleep(0.1)
+        (tmp_path / ".new.pdf.~tmp").write_bytes(PDF_BYTES)
+        (tmp_path / ".new.pdf.~tmp").rename(tmp_path / "new.pdf")
+        deadline = time.monotonic() + 5
+        while not seen and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert seen == [tmp_path / "new.pdf"]
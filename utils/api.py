@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from utils.fingerprint import NearDuplicateIndex
+
+# The extraction stack (pypdf, dateparser, ollama, pydantic) takes about a second
+# to import; it is loaded on first use so importing this module stays cheap.
+if TYPE_CHECKING:
+    from llms.extractors import OllamaExtractors
+
+DEFAULT_WORKERS = 4
+# The keys of utils.pdf_content.TEXT_BACKENDS, available without importing it (tests/test_api.py checks they match)
+TEXT_BACKEND_NAMES = ("pypdf", "pypdfium2", "pdfminer")
+IN_FLIGHT_PER_WORKER = 2    # submitted-but-unfinished documents per worker; bounds memory for long inputs
+
+
+@dataclass(slots=True)
+class ExtractionResult:
+    """Metadata extracted from one PDF, flattened to plain values.
+
+    Fields that were not requested, or could not be extracted, are None
+    (authors is an empty tuple). On failure error holds the message and the
+    metadata fields are unset.
+    """
+
+    path: Path
+    title: str | None = None
+    authors: tuple[str, ...] = ()
+    date: str | None = None
+    summary: str | None = None
+    error: str | None = None
+    pages: int = 0
+    ocr_pages: int = 0
+    ocr_calls_avoided: int = 0
+    read_seconds: float = 0.0
+    llm_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def extract_from_pdf(*args, **kwargs) -> tuple:
+    """utils.pdf_content.extract_from_pdf, imported on first call."""
+    from utils.pdf_content import extract_from_pdf
+
+    return extract_from_pdf(*args, **kwargs)
+
+
+def _resolve_fields(fields: Iterable[str] | None) -> frozenset[str]:
+    """Return fields as a frozenset (all fields if None), rejecting unknown names."""
+    from utils.pdf_content import ALL_FIELDS
+
+    if fields is None:
+        return ALL_FIELDS
+    fields = frozenset(fields)
+    unknown = fields - ALL_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def extract_one(
+    path: Path,
+    fields: frozenset[str] | None,
+    extractor: OllamaExtractors,
+    near_duplicates: NearDuplicateIndex | None = None,
+    text_backend: str | None = None,
+    summary_tokens: int | None = None,
+) -> ExtractionResult:
+    """Extract one PDF into an ExtractionResult, capturing any error instead of raising."""
+    started = time.perf_counter()
+    result = ExtractionResult(path)
+    stats: dict = {}
+    try:
+        title, authors, date, summary = extract_from_pdf(
+            path, near_duplicates=near_duplicates, extractor=extractor, fields=_resolve_fields(fields),
+            stats=stats, text_backend=text_backend, summary_tokens=summary_tokens,
+        )
+        result.title = title["title"] if title else None
+        result.authors = tuple(authors["authors_list"]) if authors else ()
+        result.date = date["date"] if date else None
+        result.summary = summary["summary"] if summary else None
+    except Exception as e:
+        logging.error(f"Failed to extract {path}: {e}", exc_info=True)
+        result.error = str(e) or type(e).__name__
+    result.pages = stats.get("pages", 0)
+    result.ocr_pages = stats.get("ocr_pages", 0)
+    result.ocr_calls_avoided = stats.get("ocr_calls_avoided", 0)
+    result.read_seconds = stats.get("read_seconds", 0.0)
+    result.llm_seconds = stats.get("llm_seconds", 0.0)
+    result.total_seconds = time.perf_counter() - started
+    return result
+
+
+def extract_many(
+    paths: Iterable[Path],
+    workers: int = DEFAULT_WORKERS,
+    fields: Iterable[str] | None = None,
+    extractor: OllamaExtractors | None = None,
+    near_duplicates: NearDuplicateIndex | None = None,
+    text_backend: str | None = None,
+    summary_tokens: int | None = None,
+) -> Iterator[ExtractionResult]:
+    """Extract metadata from many PDFs, yielding each result as soon as it is ready.
+
+    paths is consumed lazily and at most workers * IN_FLIGHT_PER_WORKER
+    documents are in progress at once, so arbitrarily long inputs (including
+    generators) run in bounded memory. Results arrive in completion order, not
+    input order. A failing document yields a result with error set instead of
+    stopping the stream.
+
+    :param paths: PDF paths to process
+    :type paths: Iterable[Path]
+    :param workers: Number of documents processed concurrently; their LLM requests
+                    are further limited per host by utils.concurrency
+    :type workers: int
+    :param fields: Subset of "title", "authors", "date", "summary" (default: all); LLM
+                   calls for the others are skipped
+    :type fields: Iterable[str]
+    :param extractor: OllamaExtractors shared by all workers (one is created if omitted)
+    :type extractor: OllamaExtractors | None
+    :param near_duplicates: Optional index shared across the batch
+    :type near_duplicates: NearDuplicateIndex | None
+    :param text_backend: Text backend name from utils.pdf_content.TEXT_BACKENDS (default: pypdf)
+    :type text_backend: str | None
+    :param summary_tokens: Summarize long documents by map-reduce within this token budget
+                           (default: summarize the first few pages only)
+    :type summary_tokens: int | None
+    :return: Iterator of ExtractionResult in completion order
+    :rtype: Iterator[ExtractionResult]
+    """
+    fields = _resolve_fields(fields)
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if extractor is None:
+        from llms.extractors import OllamaExtractors
+
+        extractor = OllamaExtractors()
+    max_in_flight = workers * IN_FLIGHT_PER_WORKER
+
+    source = iter(paths)
+    in_flight: set[Future] = set()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as pool:
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    path = next(source, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    in_flight.add(pool.submit(
+                        extract_one, Path(path), fields, extractor, near_duplicates, text_backend, summary_tokens
+                    ))
+                if not in_flight:
+                    return
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Consumer stopped early: drop queued documents, let running ones finish
+            for future in in_flight:
+                future.cancel()
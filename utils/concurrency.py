@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+INITIAL_LIMIT = 4.0         # in-flight requests allowed before anything has been observed
+MIN_LIMIT = 1.0
+MAX_LIMIT = 64.0
+LATENCY_TOLERANCE = 2.0     # a call slower than this multiple of its baseline latency signals queueing
+BACKOFF_FACTOR = 0.5        # multiplicative decrease on queueing or an error
+BASELINE_WINDOW = 100       # calls of one kind and size over which the fastest is taken as the baseline
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent requests to one server.
+
+    Every call through slot() is timed against a baseline: the fastest of the
+    last BASELINE_WINDOW calls of the same kind and size. Baselines are kept
+    per model and per power-of-two prompt-size bucket, because models differ
+    widely in speed and long prompts take longer than short ones. A windowed
+    minimum follows a lasting change in service time without absorbing
+    gradual queueing.
+
+    A call within LATENCY_TOLERANCE times its baseline raises the limit by
+    1/limit, about one extra request per round of calls, but only while the
+    limit is actually in use. A slower call or an error means the server is
+    queueing work internally, and the limit is multiplied by BACKOFF_FACTOR.
+    Calls that were already running when the limit was cut do not cut it
+    again, so one burst of slow replies backs off once.
+
+    Thread-safe; callers beyond the limit block until a slot frees up.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        initial: float = INITIAL_LIMIT,
+        minimum: float = MIN_LIMIT,
+        maximum: float = MAX_LIMIT,
+    ) -> None:
+        self.name = name
+        self.limit = min(max(initial, minimum), maximum)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls, self.errors, self.backoffs, self.waits = 0, 0, 0, 0
+        self._latencies: dict[tuple[str, int], deque[float]] = {}
+        self._waiting = 0
+        self._started = 0           # sequence number of the next call
+        self._recovery_from = 0     # calls numbered below this started before the last backoff
+        self._cond = threading.Condition()
+
+    def acquire(self) -> int:
+        """Block until a request may start; return its sequence number for release()."""
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                self.waits += 1
+                self._waiting += 1
+                while self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                self._waiting -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            sequence = self._started
+            self._started += 1
+            return sequence
+
+    def release(self, sequence: int, kind: str, latency: float | None, size: int = 0) -> None:
+        """Finish the request acquire() numbered sequence and adjust the limit.
+
+        :param kind: What was called (the model name); latencies are compared per kind
+        :param latency: Seconds the request took, or None if it failed
+        :param size: Size of the request (e.g. prompt characters); latencies are
+                     compared within power-of-two size buckets
+        """
+        with self._cond:
+            saturated = self._waiting > 0 or self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            self.calls += 1
+            if latency is None:
+                self.errors += 1
+                congested = True
+            else:
+                recent = self._latencies.setdefault((kind, size.bit_length()), deque(maxlen=BASELINE_WINDOW))
+                recent.append(latency)
+                congested = latency > min(recent) * LATENCY_TOLERANCE
+            if congested:
+                if sequence >= self._recovery_from:
+                    self._back_off()
+            elif saturated:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _back_off(self) -> None:
+        previous = self.limit
+        self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+        self.backoffs += 1
+        self._recovery_from = self._started
+        logging.debug(f"Concurrency limit for {self.name} cut from {previous:.1f} to {self.limit:.1f}")
+
+    @contextmanager
+    def slot(self, kind: str, size: int = 0) -> Iterator[None]:
+        """Hold one request slot for the with block, timing it; an exception counts as an error."""
+        sequence = self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.release(sequence, kind, None, size)
+            raise
+        self.release(sequence, kind, time.perf_counter() - started, size)
+
+    def baseline(self, kind: str, size: int = 0) -> float | None:
+        """Current baseline latency for kind at size, or None before its first call in that size bucket."""
+        with self._cond:
+            recent = self._latencies.get((kind, size.bit_length()))
+            return min(recent) if recent else None
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "calls": self.calls,
+                "errors": self.errors,
+                "backoffs": self.backoffs,
+                "waits": self.waits,
+            }
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(host: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter for host, so every client of one server shares it."""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveLimiter(host)
+        return limiter
+
+
+def limiters() -> dict[str, AdaptiveLimiter]:
+    """All limiters created in this process, by host."""
+    with _limiters_lock:
+        return dict(_limiters)
@@ -0,0 +1,190 @@
+import errno
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+
+from utils.file_name import make_filename_safe
+
+HASH_SUFFIX_CHARS = 8    # hex digits of the source-name hash used as a last-resort suffix
+_HASH_SUFFIX_PATTERN = rf"_([0-9a-f]{{{HASH_SUFFIX_CHARS}}})(?:_\d+)?"
+_YEAR_PATTERN = re.compile(r"\b(1[89]\d{2}|20\d{2})\b")
+
+
+def _year_from_date(date: dict | None) -> str:
+    """Return the four-digit year found in a likely_title() date dict, or ""."""
+    if not date:
+        return ""
+    match = _YEAR_PATTERN.search(date.get("date") or "") or _YEAR_PATTERN.search(date.get("date_line") or "")
+    return match.group(1) if match else ""
+
+
+def _first_author_surname(authors: dict | None) -> str:
+    """Return a filename-safe surname of the first listed author, or ""."""
+    if not authors or not authors.get("authors_list"):
+        return ""
+    parts = authors["authors_list"][0].split()
+    return make_filename_safe(parts[-1]) if parts else ""
+
+
+def rename_no_clobber(
+    source: str | Path, destination: str | Path, src_dir_fd: int | None = None, dst_dir_fd: int | None = None
+) -> None:
+    """Rename source to destination, raising FileExistsError instead of replacing a file.
+
+    The destination is created as a hard link first, which fails atomically if
+    the name is taken, and the source is then removed. On filesystems without
+    hard links the existence check happens just before a plain rename. A
+    rename that only changes case (same file on a case-insensitive
+    filesystem) is a plain rename. With src_dir_fd and dst_dir_fd, source and
+    destination are names relative to those open directories.
+    """
+    try:
+        os.link(source, destination, src_dir_fd=src_dir_fd, dst_dir_fd=dst_dir_fd)
+    except FileExistsError:
+        if not os.path.samestat(os.stat(source, dir_fd=src_dir_fd), os.stat(destination, dir_fd=dst_dir_fd)):
+            raise
+        os.rename(source, destination, src_dir_fd=src_dir_fd, dst_dir_fd=dst_dir_fd)
+        return
+    except OSError as e:
+        logging.debug(f"Hard link {destination} failed ({e}); renaming after an existence check")
+        try:
+            os.stat(destination, dir_fd=dst_dir_fd, follow_symlinks=False)
+        except FileNotFoundError:
+            os.rename(source, destination, src_dir_fd=src_dir_fd, dst_dir_fd=dst_dir_fd)
+            return
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(destination)) from None
+    os.unlink(source, dir_fd=src_dir_fd)
+
+
+class DestinationIndex:
+    """Tracks every destination name claimed during a run.
+
+    Each directory is listed once on first use; afterwards collisions are
+    detected in memory, both against files already on disk and against
+    destinations claimed earlier in the same run. Colliding titles get a
+    deterministic suffix: first author surname, then year, then a short hash
+    of the source file name. A source already named <title>_<hash> keeps its
+    hash, so renaming the same directory again is a no-op. Matching is case-insensitive by default because
+    synced folders are frequently mirrored to case-insensitive clients.
+    """
+
+    def __init__(self, case_insensitive: bool = True) -> None:
+        self.case_insensitive = case_insensitive
+        self._taken: dict[str, set[str]] = {}
+        self.collisions = 0
+
+    def _key(self, name: str) -> str:
+        return name.casefold() if self.case_insensitive else name
+
+    def _names(self, directory: Path) -> set[str]:
+        key = os.fspath(directory)
+        if key not in self._taken:
+            try:
+                with os.scandir(directory) as it:
+                    self._taken[key] = {self._key(entry.name) for entry in it}
+            except FileNotFoundError:
+                self._taken[key] = set()
+        return self._taken[key]
+
+    def is_taken(self, path: Path) -> bool:
+        return self._key(path.name) in self._names(path.parent)
+
+    def release(self, path: Path) -> None:
+        """Mark a name as free again (e.g. a source that has been renamed away)."""
+        self._names(path.parent).discard(self._key(path.name))
+
+    def reserve(self, path: Path) -> None:
+        self._names(path.parent).add(self._key(path.name))
+
+    def _digest(self, source: Path, stem: str) -> str:
+        """The hash suffix for source: the one already in its name for this title, else a hash of the name."""
+        flags = re.IGNORECASE if self.case_insensitive else 0
+        match = re.fullmatch(re.escape(stem) + _HASH_SUFFIX_PATTERN, source.stem, flags)
+        if match:
+            return match.group(1).lower()
+        return hashlib.sha1(source.name.encode("utf-8")).hexdigest()[:HASH_SUFFIX_CHARS]
+
+    def candidates(self, source: Path, stem: str, authors: dict | None, date: dict | None):
+        """Yield destination stems in the order they are tried."""
+        yield stem
+        surname = _first_author_surname(authors)
+        year = _year_from_date(date)
+        if surname:
+            yield f"{stem}_{surname}"
+        if year:
+            yield f"{stem}_{surname}_{year}" if surname else f"{stem}_{year}"
+        digest = self._digest(source, stem)
+        yield f"{stem}_{digest}"
+        n = 2
+        while True:
+            yield f"{stem}_{digest}_{n}"
+            n += 1
+
+    def claim(
+        self,
+        source: Path,
+        stem: str,
+        authors: dict | None = None,
+        date: dict | None = None,
+        suffix: str = ".pdf",
+        directory: Path | None = None,
+    ) -> Path:
+        """Return a collision-free destination for source and reserve it.
+
+        The source's own name is always available to itself, and it is released
+        once the source is planned to move, so later files may claim it.
+
+        :param source: Path of the file being renamed
+        :param stem: Filesystem-safe stem derived from the title
+        :param authors: authors dict from likely_title(), used for disambiguation
+        :param date: date dict from likely_title(), used for disambiguation
+        :param suffix: File extension of the destination
+        :param directory: Target directory (default: the source's directory)
+        :return: Destination path
+        :rtype: Path
+        """
+        directory = directory or source.parent
+        same_directory = directory == source.parent
+        source_key = self._key(source.name)
+        for i, candidate in enumerate(self.candidates(source, stem, authors, date)):
+            destination = directory / (candidate + suffix)
+            key = self._key(destination.name)
+            keeps_name = same_directory and key == source_key
+            if keeps_name or not self.is_taken(destination):
+                break
+        if i > 0 and not keeps_name:
+            self.collisions += 1
+            logging.warning(f"Destination {stem + suffix} already claimed; using {destination.name} for {source.name}")
+        if not keeps_name:
+            self.release(source)
+            self.reserve(destination)
+        return destination
+
+    def move(
+        self,
+        source: Path,
+        stem: str,
+        authors: dict | None = None,
+        date: dict | None = None,
+        directory: Path | None = None,
+    ) -> Path:
+        """Claim a destination for source and rename it there without replacing any file.
+
+        A name taken on disk after its directory was listed (a file that
+        arrived since) stays reserved, counts as a collision, and the next
+        candidate is tried.
+
+        :return: The path source now has
+        """
+        while True:
+            destination = self.claim(source, stem, authors, date, directory=directory)
+            if destination == source:
+                return destination
+            try:
+                rename_no_clobber(source, destination)
+                return destination
+            except FileExistsError:
+                logging.warning(f"{destination} appeared after the directory was listed; not replacing it")
+                self.reserve(destination)
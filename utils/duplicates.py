@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+
+PARTIAL_HASH_BYTES = 64 * 1024    # leading bytes hashed to split same-size candidates cheaply
+HASH_CHUNK_BYTES = 1024 * 1024    # read size when hashing whole files
+
+
+def file_digest(path: Path, limit: int | None = None) -> str:
+    """Return the BLAKE2b hex digest of a file, or of its first limit bytes.
+
+    :param path: File to hash
+    :type path: Path
+    :param limit: Hash only this many leading bytes (None hashes the whole file)
+    :type limit: int | None
+    :return: Hex digest
+    :rtype: str
+    """
+    h = hashlib.blake2b(digest_size=20)
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            size = HASH_CHUNK_BYTES if remaining is None else min(HASH_CHUNK_BYTES, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def bytes_digest(data: bytes) -> str:
+    """Return the same digest as file_digest for a file's contents already in memory."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _split_by(paths: list[Path], key) -> list[list[Path]]:
+    """Group paths by key(path), keeping only groups with more than one member."""
+    groups: dict[object, list[Path]] = defaultdict(list)
+    for path in paths:
+        try:
+            groups[key(path)].append(path)
+        except OSError as e:
+            logging.warning(f"Could not read {path} for duplicate detection: {e}")
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_exact_duplicates(paths: list[Path], known: dict[Path, str] | None = None) -> list[list[Path]]:
+    """Find groups of byte-identical files.
+
+    Files are grouped by size first; only same-size files are hashed, first
+    over their leading PARTIAL_HASH_BYTES and then, for files that still
+    match, in full. Most non-duplicates are therefore ruled out by a stat or
+    a single small read. Files with a digest in known (e.g. unchanged files
+    in the manifest) are never read; a same-size file without one is hashed
+    in full to compare against them.
+
+    :param paths: Files to examine
+    :type paths: list[Path]
+    :param known: file_digest() of files whose content is already known
+    :type known: dict[Path, str] | None
+    :return: Groups of identical files, each sorted, with the first member
+             treated as the canonical copy
+    :rtype: list[list[Path]]
+    """
+    known = known or {}
+    candidates = _split_by(paths, lambda p: os.stat(p).st_size)
+    duplicates: list[list[Path]] = []
+    for group in candidates:
+        if any(p in known for p in group):
+            duplicates.extend(sorted(g) for g in _split_by(group, lambda p: known.get(p) or file_digest(p)))
+            continue
+        size = os.stat(group[0]).st_size
+        for partial in _split_by(group, lambda p: file_digest(p, PARTIAL_HASH_BYTES)):
+            if size <= PARTIAL_HASH_BYTES:
+                duplicates.append(sorted(partial))
+                continue
+            duplicates.extend(sorted(g) for g in _split_by(partial, file_digest))
+    duplicates.sort()
+    logging.info(
+        f"Found {sum(len(g) - 1 for g in duplicates)} duplicate copies in {len(duplicates)} groups "
+        f"among {len(paths)} files"
+    )
+    return duplicates
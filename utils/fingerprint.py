@@ -0,0 +1,142 @@
+import logging
+import random
+import re
+import threading
+import zlib
+
+SHINGLE_WORDS = 5                 # words per shingle
+NUM_PERMUTATIONS = 64             # MinHash signature length
+LSH_BANDS = 16                    # NUM_PERMUTATIONS must equal LSH_BANDS * rows per band
+NEAR_DUPLICATE_THRESHOLD = 0.85   # min estimated Jaccard similarity to reuse metadata
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Fixed seed: signatures must be comparable across runs and processes
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def shingle_hashes(lines: list[str], size: int = SHINGLE_WORDS) -> set[int]:
+    """Hash overlapping word shingles of cleaned text lines.
+
+    Text is lower-cased and reduced to alphanumeric words, so differences in
+    hyphenation, punctuation and line wrapping between versions of the same
+    paper do not affect the result.
+
+    :param lines: Cleaned text lines, as returned by clean_text()
+    :type lines: list[str]
+    :param size: Number of words per shingle
+    :type size: int
+    :return: Set of 32-bit shingle hashes
+    :rtype: set[int]
+    """
+    words = _WORD_PATTERN.findall(" ".join(lines).lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode())} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode())
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash_signature(hashes: set[int]) -> tuple[int, ...]:
+    """Return the MinHash signature of a set of shingle hashes."""
+    if not hashes:
+        return ()
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimate the Jaccard similarity of two documents from their signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """In-memory LSH index of MinHash signatures for the documents in a run.
+
+    Signatures are split into LSH_BANDS bands; two documents become candidates
+    when any band matches exactly, and a candidate is accepted when its
+    estimated similarity reaches the threshold. Accepted matches are kept so
+    near-duplicate clusters can be reported at the end of the run.
+
+    Thread-safe: extract_many and --serve query and add from several threads.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.rows = NUM_PERMUTATIONS // LSH_BANDS
+        self._buckets: dict[tuple, list[object]] = {}
+        self._signatures: dict[object, tuple[int, ...]] = {}
+        self._metadata: dict[object, dict] = {}
+        self.matches: dict[object, tuple[object, float]] = {}
+        self._lock = threading.Lock()
+
+    def _bands(self, signature: tuple[int, ...]):
+        for band in range(LSH_BANDS):
+            yield (band,) + signature[band * self.rows:(band + 1) * self.rows]
+
+    def query(self, signature: tuple[int, ...]) -> tuple[object, float, dict] | None:
+        """Return (key, similarity, metadata) of the most similar indexed document.
+
+        Only documents at or above the threshold are returned.
+        """
+        if not signature:
+            return None
+        with self._lock:
+            candidates = {key for band in self._bands(signature) for key in self._buckets.get(band, ())}
+            best = None
+            for key in candidates:
+                similarity = estimate_similarity(signature, self._signatures[key])
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity, self._metadata[key])
+            return best
+
+    def add(self, key: object, signature: tuple[int, ...], metadata: dict) -> None:
+        """Index a document signature together with the metadata to share."""
+        if not signature:
+            return
+        with self._lock:
+            self._signatures[key] = signature
+            self._metadata[key] = metadata
+            for band in self._bands(signature):
+                self._buckets.setdefault(band, []).append(key)
+
+    def record_match(self, key: object, other: object, similarity: float) -> None:
+        logging.info(f"{key} is a near-duplicate of {other} (similarity {similarity:.2f})")
+        with self._lock:
+            self.matches[key] = (other, similarity)
+
+    def match_of(self, key: object) -> tuple[object, float] | None:
+        """Return (other, similarity) if key was recorded as a near-duplicate, else None."""
+        with self._lock:
+            return self.matches.get(key)
+
+    def clusters(self) -> list[list[object]]:
+        """Group matched documents into clusters, each listed with its first-seen member first."""
+        with self._lock:
+            matches = dict(self.matches)
+            keys = list(self._signatures)
+        root: dict[object, object] = {}
+
+        def find(key):
+            while root.get(key, key) != key:
+                key = root[key]
+            return key
+
+        for key, (other, _) in matches.items():
+            root[find(key)] = find(other)
+        members = set(matches) | {other for other, _ in matches.values()}
+        groups: dict[object, list[object]] = {}
+        for key in keys:
+            if key in members:
+                groups.setdefault(find(key), []).append(key)
+        return [group for group in groups.values() if len(group) > 1]
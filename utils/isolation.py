@@ -0,0 +1,263 @@
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+
+PARSE_TIMEOUT_SECONDS = 120.0               # wall-clock limit for reading one document
+PARSE_MEMORY_LIMIT = 2 * 1024 * 1024 * 1024  # RLIMIT_AS for a parse worker (address space, bytes)
+
+# Plan entry "status" values. Entries without a status were written before
+# statuses existed and are treated as OK.
+STATUS_OK = "OK"
+STATUS_TIMEOUT = "TIMEOUT"  # parsing exceeded the wall-clock limit; the worker was killed
+STATUS_OOM = "OOM"          # parsing exceeded the memory limit
+STATUS_CRASHED = "CRASHED"  # the worker died for another reason (e.g. a crash in a C extension)
+
+
+class IsolatedParseError(RuntimeError):
+    """Raised when a parse worker times out, runs out of memory or dies."""
+
+    status = STATUS_CRASHED
+
+
+class ParseTimeout(IsolatedParseError):
+    status = STATUS_TIMEOUT
+
+
+class ParseOutOfMemory(IsolatedParseError):
+    status = STATUS_OOM
+
+
+class _ForwardHandler(logging.Handler):
+    """Re-emits records received from a worker through this process's loggers."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+_parent_conn: Connection | None = None  # set in worker processes; used by call_parent
+
+
+def call_parent(name: str, *args) -> object:
+    """From inside a worker job, run the parent's handler name(*args) and return its result.
+
+    Used for work that must not count against the parse limits, such as OCR
+    requests to the LLM host: the parent pauses the job's timeout while the
+    handler runs, and the handler runs outside the worker's memory cap.
+
+    :raises RuntimeError: not in a worker, or the handler raised
+    """
+    if _parent_conn is None:
+        raise RuntimeError("call_parent used outside a parse worker")
+    _parent_conn.send(("call", name, args))
+    kind, value = _parent_conn.recv()
+    if kind != "ok":
+        raise RuntimeError(value)
+    return value
+
+
+def _worker_main(conn: Connection, log_queue, log_level: int, memory_limit: int | None) -> None:
+    """Parse worker loop: run (func, args) jobs from conn until it is closed."""
+    global _parent_conn
+    _parent_conn = conn
+    if memory_limit:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(log_level)
+    while True:
+        try:
+            func, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = ("ok", func(*args))
+        except MemoryError:
+            reply = ("oom", "memory limit exceeded")
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except MemoryError:
+            conn.send(("oom", "memory limit exceeded while returning the result"))
+
+
+class _Worker:
+    """One supervised child process, reused across documents until it fails."""
+
+    def __init__(self, context, log_queue, memory_limit: int | None) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, log_queue, logging.getLogger().getEffectiveLevel(), memory_limit),
+            daemon=True,
+            name="pdf-parse",
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(
+        self, func: Callable, args: tuple, timeout: float | None, handlers: dict[str, Callable] | None = None
+    ) -> object:
+        try:
+            self.conn.send((func, args))
+        except OSError:
+            # Includes BrokenPipeError: the worker died while it sat idle
+            self.kill()
+            raise IsolatedParseError(f"parse worker died (exit code {self.process.exitcode})")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.conn.poll(remaining):
+                self.kill()
+                raise ParseTimeout(f"parsing took longer than {timeout:g}s")
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                self.process.join(1)
+                self.kill()
+                if self.process.exitcode == -signal.SIGKILL:
+                    # Killed from outside without a reply: the kernel OOM killer
+                    raise ParseOutOfMemory("parse worker was killed (out of memory)")
+                raise IsolatedParseError(f"parse worker died (exit code {self.process.exitcode})")
+            if message[0] != "call":
+                break
+            # A call_parent request: run the handler with the job's clock stopped
+            started = time.monotonic()
+            self._answer(handlers or {}, *message[1:])
+            if deadline is not None:
+                deadline += time.monotonic() - started
+        kind, value = message
+        if kind == "ok":
+            return value
+        if kind == "oom":
+            self.kill()
+            raise ParseOutOfMemory(value)
+        raise RuntimeError(value)
+
+    def _answer(self, handlers: dict[str, Callable], name: str, args: tuple) -> None:
+        """Run a call_parent handler and send its result (or error) back to the worker."""
+        handler = handlers.get(name)
+        try:
+            if handler is None:
+                raise KeyError(f"no handler for {name!r}")
+            reply = ("ok", handler(*args))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        except BaseException:
+            # The worker is left waiting for a reply it will never get
+            self.kill()
+            raise
+        try:
+            self.conn.send(reply)
+        except OSError:
+            pass  # the worker died meanwhile; the next recv reports it
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class IsolatedParser:
+    """Runs parsing jobs in supervised worker subprocesses.
+
+    Each job gets a wall-clock timeout and the worker runs under an RLIMIT_AS
+    memory cap, so a pathological PDF that makes the parser spin or balloon is
+    killed instead of stalling the batch. Workers are started with the spawn
+    method (safe alongside the run's threads) and reused for later documents;
+    one that is killed is replaced on the next job. Jobs must be picklable
+    module-level functions and arguments. Worker log records are forwarded to
+    this process's logging.
+
+    Safe to share between threads: each concurrent job gets its own worker.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = PARSE_TIMEOUT_SECONDS,
+        memory_limit: int | None = PARSE_MEMORY_LIMIT,
+    ) -> None:
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: queue.SimpleQueue[_Worker] = queue.SimpleQueue()
+        self._log_queue = self._context.Queue()
+        self._log_listener = logging.handlers.QueueListener(self._log_queue, _ForwardHandler())
+        self._log_listener.start()
+        self._lock = threading.Lock()
+        self.timeouts, self.out_of_memory, self.crashed = 0, 0, 0
+
+    def run(self, func: Callable, *args, handlers: dict[str, Callable] | None = None) -> object:
+        """Call func(*args) in a worker and return its result.
+
+        The job can call back into this process with call_parent(name, ...),
+        which runs handlers[name] here; time spent in handlers does not count
+        against the timeout.
+
+        :raises ParseTimeout: the job exceeded timeout; the worker was killed
+        :raises ParseOutOfMemory: the job exceeded memory_limit or the worker was OOM-killed
+        :raises IsolatedParseError: the worker died for another reason
+        :raises RuntimeError: func raised; the message names the original exception
+        """
+        worker = None
+        while worker is None:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = _Worker(self._context, self._log_queue, self.memory_limit)
+            if not worker.alive:
+                worker.kill()
+                worker = None
+        try:
+            return worker.call(func, args, self.timeout, handlers)
+        except ParseTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        except ParseOutOfMemory:
+            with self._lock:
+                self.out_of_memory += 1
+            raise
+        except IsolatedParseError:
+            with self._lock:
+                self.crashed += 1
+            raise
+        finally:
+            if worker.alive:
+                self._idle.put(worker)
+
+    def close(self) -> None:
+        """Stop idle workers and the log forwarder."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self._log_listener.stop()
+        self._log_queue.close()
+
+    def __enter__(self) -> "IsolatedParser":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,180 @@
+import importlib.util
+import re
+
+SUMMARY_MODES = ("llm", "local")
+DEFAULT_SUMMARY_MODE = "llm"
+MIN_ABSTRACT_CHARS = 200        # shorter "abstracts" are usually a heading followed by something else
+MAX_ABSTRACT_CHARS = 3000
+SUMMARY_SENTENCES = 5           # sentences TextRank keeps
+MAX_LOCAL_SUMMARY_CHARS = 1200  # about two paragraphs, like the LLM abstract
+MIN_SENTENCES = 4               # fewer usable sentences is too little text to rank
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 60         # longer "sentences" are header blocks or tables run together
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 100
+TEXTRANK_TOLERANCE = 1e-6
+
+# "Abstract", "ABSTRACT:", "Abstract—We show ...", and letter-spaced "A B S T R A C T".
+# Text on the heading line must follow a delimiter, so a title such as
+# "Abstract Interpretation of ..." is not taken for the heading.
+_ABSTRACT = re.compile(
+    r"^\s*(?:a\s?b\s?s\s?t\s?r\s?a\s?c\s?t|summary)\s*(?:[:.\-–—]+\s*(.*))?$", re.IGNORECASE
+)
+# Headings that end an abstract
+_ABSTRACT_END = re.compile(
+    r"^\s*(?:(?:\d+|[IVX]+)\.?\s*)?(?:introduction|keywords?|key\s*words|index\s+terms|ccs\s+concepts|"
+    r"acm\s+reference\s+format|general\s+terms|categories\s+and\s+subject\s+descriptors|background)\b",
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])")
+_WORD = re.compile(r"[a-z][a-z'-]*[a-z]")
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have having
+he her here hers him his how i if in into is it its itself just me more most my no nor not now of off on
+once only or other our ours out over own same she should so some such than that the their theirs them then
+there these they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours using used use based show shows shown paper propose proposed
+""".split())
+
+
+def textrank_available() -> bool:
+    """True if NumPy, which TextRank needs, is installed."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _join_lines(lines: list[str]) -> str:
+    """Join text lines into running text, undoing end-of-line hyphenation."""
+    text = ""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if text.endswith("-") and line[:1].islower():
+            text = text[:-1] + line
+        else:
+            text = f"{text} {line}" if text else line
+    return text
+
+
+def _trim_to_sentence(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, at a sentence end if there is one."""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    return cut[:end + 1] if end > 0 else cut
+
+
+def find_abstract(lines: list[str]) -> str | None:
+    """Return the document's own abstract from its cleaned lines, or None.
+
+    The abstract starts at an "Abstract" heading, alone on its line or followed
+    by a delimiter such as ":" or "—" and the first words, and runs until the next heading such as Keywords, Index Terms or
+    Introduction. It must have at least MIN_ABSTRACT_CHARS characters and is
+    cut to MAX_ABSTRACT_CHARS.
+    """
+    for start, line in enumerate(lines):
+        match = _ABSTRACT.match(line)
+        if match:
+            break
+    else:
+        return None
+    body = [match[1]] if match[1] else []
+    for line in lines[start + 1:]:
+        if _ABSTRACT_END.match(line):
+            break
+        body.append(line)
+    abstract = _join_lines(body)
+    if len(abstract) < MIN_ABSTRACT_CHARS:
+        return None
+    return _trim_to_sentence(abstract, MAX_ABSTRACT_CHARS)
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split running text into sentences, dropping fragments, header blocks and lines with URLs or e-mail."""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        if not MIN_SENTENCE_WORDS <= len(words) <= MAX_SENTENCE_WORDS:
+            continue
+        if "@" in sentence or "http" in sentence:
+            continue
+        sentences.append(sentence.strip())
+    return sentences
+
+
+def textrank(sentences: list[str]) -> list[float]:
+    """Score sentences by TextRank over their TF-IDF cosine-similarity graph.
+
+    The sentence-term matrix, the similarity matrix and every power-iteration
+    step are single NumPy operations.
+
+    :raises ImportError: NumPy is not installed
+    """
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError("The local summarizer requires 'pip install numpy'") from e
+    tokens = [[w for w in _WORD.findall(s.lower()) if w not in _STOPWORDS] for s in sentences]
+    vocabulary = {word: index for index, word in enumerate(sorted({w for words in tokens for w in words}))}
+    count = len(sentences)
+    if not vocabulary:
+        return [1.0 / count] * count
+
+    rows = np.repeat(np.arange(count), [len(words) for words in tokens])
+    columns = np.fromiter((vocabulary[w] for words in tokens for w in words), dtype=np.intp, count=len(rows))
+    tf = np.zeros((count, len(vocabulary)))
+    np.add.at(tf, (rows, columns), 1.0)
+    idf = np.log(count / np.count_nonzero(tf, axis=0)) + 1.0
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences similar to nothing link to every sentence equally
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / count), where=out_weight > 0)
+
+    scores = np.full(count, 1.0 / count)
+    teleport = (1.0 - TEXTRANK_DAMPING) / count
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = teleport + TEXTRANK_DAMPING * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < TEXTRANK_TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores.tolist()
+
+
+def textrank_summary(lines: list[str]) -> str | None:
+    """The SUMMARY_SENTENCES highest-ranked sentences in document order, or None if there are too few."""
+    sentences = split_sentences(_join_lines(lines))
+    if len(sentences) < MIN_SENTENCES:
+        return None
+    scores = textrank(sentences)
+    ranked = sorted(range(len(sentences)), key=lambda index: -scores[index])[:SUMMARY_SENTENCES]
+    chosen, length = [], 0
+    for index in ranked:
+        if length + len(sentences[index]) > MAX_LOCAL_SUMMARY_CHARS and chosen:
+            continue
+        chosen.append(index)
+        length += len(sentences[index]) + 1
+    return " ".join(sentences[index] for index in sorted(chosen))
+
+
+def local_summary(lines: list[str]) -> tuple[str, str] | None:
+    """Summarize without an LLM: the document's abstract if it has one, else a TextRank extract.
+
+    :param lines: Cleaned text lines from the start of the document
+    :return: ("abstract" or "textrank", summary text), or None if neither worked
+    :rtype: tuple[str, str] | None
+    """
+    abstract = find_abstract(lines)
+    if abstract is not None:
+        return "abstract", abstract
+    summary = textrank_summary(lines)
+    if summary is not None:
+        return "textrank", summary
+    return None
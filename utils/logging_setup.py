@@ -0,0 +1,113 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from pathlib import Path
+
+LOG_MAX_BYTES = 50 * 1024 * 1024   # rotate process.log at this size
+LOG_BACKUP_COUNT = 5               # rotated files kept (process.log.1 ... .5)
+DEBUG_BURST = 20                   # DEBUG records logged in full per call site before sampling starts
+DEBUG_SAMPLE_EVERY = 100           # after the burst, keep one DEBUG record in this many per call site
+
+
+class SampledDebugFilter(logging.Filter):
+    """Thin out repetitive DEBUG records, per call site.
+
+    The first DEBUG_BURST records from each (file, line) pass unchanged; after
+    that only every sample_every-th record passes, annotated with how many were
+    dropped. Records at INFO and above are never filtered.
+    """
+
+    def __init__(self, burst: int = DEBUG_BURST, sample_every: int = DEBUG_SAMPLE_EVERY) -> None:
+        super().__init__()
+        self.burst = burst
+        self.sample_every = sample_every
+        self.counts: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            count = self.counts.get(site, 0) + 1
+            self.counts[site] = count
+        if count <= self.burst:
+            return True
+        if (count - self.burst) % self.sample_every:
+            return False
+        record.msg = f"{record.getMessage()} [sampled: {self.sample_every - 1} similar records dropped]"
+        record.args = None
+        return True
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that remembers whether it is running, so stopping it twice is harmless."""
+
+    running = False
+
+    def start(self) -> None:
+        super().start()
+        self.running = True
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+def configure_logging(
+    log_path: Path,
+    level: int = logging.INFO,
+    log_format: str | None = None,
+    max_bytes: int = LOG_MAX_BYTES,
+    backup_count: int = LOG_BACKUP_COUNT,
+    debug_sample_every: int = DEBUG_SAMPLE_EVERY,
+) -> logging.handlers.QueueListener:
+    """Send root logging through a queue to a rotating log file.
+
+    Callers only enqueue records (QueueHandler); formatting and file writes
+    happen on the QueueListener's background thread, so logging never blocks
+    extraction on disk I/O. DEBUG records are sampled per call site before
+    they are enqueued. The listener is flushed and stopped at interpreter exit.
+
+    :param log_path: Log file; rotated copies are written alongside it
+    :type log_path: Path
+    :param level: Root logger level
+    :type level: int
+    :param log_format: logging.Formatter format string
+    :type log_format: str | None
+    :param max_bytes: Size at which the log file is rotated
+    :type max_bytes: int
+    :param backup_count: Number of rotated files kept
+    :type backup_count: int
+    :param debug_sample_every: Keep one DEBUG record in this many per call site after the initial burst
+    :type debug_sample_every: int
+    :return: The started listener (call stop() to flush early; stopping again is a no-op)
+    :rtype: logging.handlers.QueueListener
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter(log_format))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(SampledDebugFilter(sample_every=debug_sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = _Listener(records, file_handler, respect_handler_level=True)
+    listener.start()
+
+    def flush_at_exit() -> None:
+        listener.stop()
+        file_handler.close()
+
+    atexit.register(flush_at_exit)
+    return listener
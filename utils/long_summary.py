@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHARS_PER_TOKEN = 4                 # rough average for English text
+DEFAULT_SUMMARY_TOKENS = 32000      # total input tokens one long-document summary may send
+CHUNK_TOKENS = 1500                 # document text per map call
+MAX_REDUCE_TOKENS = 6000            # input per reduce call; more partial summaries are reduced in rounds
+LONG_SUMMARY_WORKERS = 4            # chunks of one document summarized concurrently
+CHUNK_CACHE_ENTRIES = 10000
+CHUNK_CACHE_VERSION = 1
+_SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def budget_chars(tokens: int) -> int:
+    """Characters of document text worth reading for a summary token budget."""
+    return tokens * CHARS_PER_TOKEN
+
+
+def chunk_text(text: str, chunk_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """Split text into chunks of about chunk_tokens at line boundaries (longer lines are cut)."""
+    limit = chunk_tokens * CHARS_PER_TOKEN
+    chunks, current, size = [], [], 0
+    for line in text.split("\n"):
+        while len(line) > limit:
+            piece, line = line[:limit], line[limit:]
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(piece)
+        if size + len(line) > limit and current:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if any(current):
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def spread(items: list, count: int) -> list:
+    """count items evenly spaced over items, the first and last included (all of them if count >= len)."""
+    if count >= len(items):
+        return list(items)
+    if count <= 1:
+        return list(items[:count])
+    step = (len(items) - 1) / (count - 1)
+    return [items[round(index * step)] for index in range(count)]
+
+
+def select_chunks(chunks: list[str], token_budget: int) -> list[str]:
+    """The chunks to summarize within token_budget, spread evenly over the document.
+
+    token_budget covers the document text sent to the map step; the reduce
+    calls are bounded separately by MAX_REDUCE_TOKENS per call. read_pdf_text
+    already reads about that much text, spread over the whole document, so
+    this only trims what overshoots: the first and last chunks and evenly
+    spaced ones in between are kept.
+    """
+    cost = sum(len(chunk) for chunk in chunks) // CHARS_PER_TOKEN
+    if cost <= token_budget:
+        return chunks
+    return spread(chunks, max(1, token_budget * len(chunks) // cost))
+
+
+def _groups(partials: list[str], max_tokens: int) -> list[list[str]]:
+    """Consecutive runs of partials whose joined text fits max_tokens (at least one each)."""
+    groups, current, size = [], [], 0
+    for partial in partials:
+        tokens = estimate_tokens(partial)
+        if current and size + tokens > max_tokens:
+            groups.append(current)
+            current, size = [], 0
+        current.append(partial)
+        size += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def map_reduce(
+    chunks: list[str],
+    summarize_chunk: Callable[[str], str],
+    combine: Callable[[str, bool], str],
+    workers: int = LONG_SUMMARY_WORKERS,
+    reduce_tokens: int = MAX_REDUCE_TOKENS,
+) -> str:
+    """Summarize chunks concurrently and reduce the partial summaries to one.
+
+    :param summarize_chunk: chunk text -> its summary ("" if none)
+    :param combine: (joined summaries in document order, final) -> combined summary;
+                    final is False for intermediate rounds, needed when the partial
+                    summaries together exceed reduce_tokens
+    :return: The final summary, or "" if no chunk could be summarized
+    """
+    if not chunks:
+        return ""
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        partials = [partial for partial in pool.map(summarize_chunk, chunks) if partial]
+        while len(partials) > 1 and estimate_tokens(_SEPARATOR.join(partials)) > reduce_tokens:
+            groups = _groups(partials, reduce_tokens)
+            if len(groups) == len(partials):
+                break   # every partial fills a reduce call on its own; grouping cannot shrink them
+            joined = [_SEPARATOR.join(group) for group in groups]
+            partials = [partial for partial in pool.map(lambda text: combine(text, False), joined) if partial]
+    if not partials:
+        return ""
+    return combine(_SEPARATOR.join(partials), True)
+
+
+class ChunkCache:
+    """Summaries of document chunks, keyed by a hash of the models, prompt and chunk text.
+
+    Near-duplicate documents (arXiv versions, reports sharing boilerplate
+    sections) and re-runs share most chunks, so their summaries are reused
+    instead of asked for again. The least recently used entries beyond
+    max_entries are dropped. With a path, the cache is loaded from and saved
+    to a JSON file. Thread-safe.
+    """
+
+    def __init__(self, path: Path | None = None, max_entries: int = CHUNK_CACHE_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.hits, self.misses = 0, 0
+        self._lock = threading.Lock()
+        if path is not None and path.exists():
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == CHUNK_CACHE_VERSION:
+                self.entries.update(data["entries"])
+            else:
+                logging.warning(f"Ignoring chunk cache {path} with unknown version {data.get('version')}")
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.blake2b("\0".join(parts).encode(), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            summary = self.entries.get(key)
+            if summary is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return summary
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self.entries[key] = summary
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write the cache to its path (atomically); a no-op without one."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {"version": CHUNK_CACHE_VERSION, "entries": dict(self.entries)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+from utils.duplicates import file_digest
+
+MANIFEST_VERSION = 1
+SAVE_EVERY = 100    # records between automatic saves, so a crash loses little work
+
+
+class Manifest:
+    """Remembers which files have been processed and what was extracted.
+
+    Each entry is keyed by path and stores size, mtime, inode, a content hash
+    and the extraction result. A file whose size, mtime and inode all match
+    is treated as unchanged after a single stat. If only the metadata differs
+    (e.g. the file was touched or copied back), the file is hashed and is
+    still treated as unchanged when the hash matches. A path with no entry of
+    its own is matched by size, mtime and inode against entries whose file is
+    gone, so a file renamed since (by --apply, a rollback or by hand) keeps
+    its entry.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.files: dict[str, dict] = {}
+        self._by_signature: dict[tuple, str] | None = None  # (size, mtime_ns, inode) -> key, built on first use
+        self.dirty = 0
+        self.hits, self.rehashed, self.misses = 0, 0, 0
+        if path.exists():
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.files = data["files"]
+            else:
+                logging.warning(f"Ignoring manifest {path} with unknown version {data.get('version')}")
+        logging.info(f"Loaded manifest {path} ({len(self.files)} files)")
+
+    def is_current(self, path: Path) -> bool:
+        """True if path has a result and its size, mtime and inode are as recorded (one stat, no counting)."""
+        return self.current_digest(path) is not None
+
+    def current_digest(self, path: Path) -> str | None:
+        """The recorded content hash of path if is_current(path), else None; never reads the file."""
+        entry = self.files.get(str(path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if entry is None:
+            key = self._renamed_from(path, st)
+            return None if key is None else self.files[key]["hash"]
+        if entry.get("result") is None or (st.st_size, st.st_mtime_ns, st.st_ino) != _signature(entry):
+            return None
+        return entry["hash"]
+
+    def lookup(self, path: Path) -> tuple | None:
+        """Return the recorded extraction result if path is unchanged, else None."""
+        entry = self.files.get(str(path))
+        if entry is None:
+            try:
+                old = self._renamed_from(path, os.stat(path))
+            except FileNotFoundError:
+                old = None
+            if old is None:
+                self.misses += 1
+                return None
+            logging.info(f"{path} was renamed from {old}; reusing manifest entry")
+            self.move(Path(old), path)
+            entry = self.files[str(path)]
+        if entry.get("result") is None:
+            self.misses += 1
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        if (st.st_size, st.st_mtime_ns, st.st_ino) == _signature(entry):
+            self.hits += 1
+            return tuple(entry["result"])
+        if st.st_size == entry["size"] and file_digest(path) == entry["hash"]:
+            logging.info(f"{path} metadata changed but content did not; reusing manifest entry")
+            entry.update(mtime_ns=st.st_mtime_ns, inode=st.st_ino)
+            self._index(str(path), entry)
+            self._touched()
+            self.rehashed += 1
+            return tuple(entry["result"])
+        self.misses += 1
+        return None
+
+    def _renamed_from(self, path: Path, st: os.stat_result) -> str | None:
+        """Key of the entry whose file now lives at path: same size, mtime and inode, old path gone."""
+        if self._by_signature is None:
+            self._by_signature = {}
+            for key, entry in self.files.items():
+                self._index(key, entry)
+        key = self._by_signature.get((st.st_size, st.st_mtime_ns, st.st_ino))
+        if key is None or key == str(path):
+            return None
+        entry = self.files.get(key)
+        if entry is None or entry.get("result") is None or _signature(entry) != (st.st_size, st.st_mtime_ns, st.st_ino):
+            return None  # stale index slot
+        if os.path.lexists(key):
+            return None
+        return key
+
+    def _index(self, key: str, entry: dict) -> None:
+        if self._by_signature is not None:
+            self._by_signature[_signature(entry)] = key
+
+    def record(self, path: Path, result: tuple, digest: str | None = None) -> None:
+        """Store the stat signature, hash and extraction result for path."""
+        st = os.stat(path)
+        self.files[str(path)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "inode": st.st_ino,
+            "hash": digest or file_digest(path),
+            "result": list(result),
+        }
+        self._index(str(path), self.files[str(path)])
+        self._touched()
+
+    def move(self, source: Path, destination: Path) -> None:
+        """Re-key an entry after its file has been renamed."""
+        entry = self.files.pop(str(source), None)
+        if entry is not None:
+            self.files[str(destination)] = entry
+            self._index(str(destination), entry)
+            self._touched()
+
+    def _touched(self) -> None:
+        self.dirty += 1
+        if self.dirty >= SAVE_EVERY:
+            self.save()
+
+    def save(self) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        if not self.dirty and self.path.exists():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f)
+        os.replace(tmp, self.path)
+        self.dirty = 0
+        logging.info(f"Saved manifest {self.path} ({len(self.files)} files)")
+
+
+def _signature(entry: dict) -> tuple:
+    return entry["size"], entry["mtime_ns"], entry["inode"]
@@ -0,0 +1,213 @@
+import gc
+import json
+import logging
+import os
+import resource
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+MEMPROFILE_FRAMES = 8           # stack depth recorded per allocation
+SNAPSHOT_EVERY = 100            # documents between allocation-site dumps
+TOP_SITES = 20                  # allocation sites listed per dump
+TOP_DOCUMENTS = 10              # highest-peak documents listed in the final summary
+GROWTH_CHECKPOINTS = 4          # consecutive dumps that must each retain more memory to flag growth
+GROWTH_MIN_BYTES = 16 * 1024 * 1024   # ...and by at least this much in total
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_active: "MemoryProfiler | None" = None
+
+
+def document(path: Path):
+    """Profile one document if a MemoryProfiler is running; otherwise a no-op context."""
+    return _active.document(path) if _active is not None else nullcontext()
+
+
+def stage(name: str):
+    """Profile one stage of the current document if a MemoryProfiler is running; otherwise a no-op."""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def report_path_for(log_path: Path) -> Path:
+    """The text report's path next to the log: process.log -> process.memprofile.txt."""
+    return log_path.with_suffix(".memprofile.txt")
+
+
+def _rss() -> int:
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class MemoryProfiler:
+    """Traces Python allocations over a run to find what makes it grow.
+
+    For every document it records the tracemalloc peak (overall and for each
+    stage: reading, summary, title/authors), the memory still held afterwards,
+    and the process RSS, one JSON line per document in <report>.jsonl. Every
+    snapshot_every documents it writes the top allocation sites to the text
+    report. If the memory retained at GROWTH_CHECKPOINTS consecutive dumps
+    keeps rising (by GROWTH_MIN_BYTES in total), growth is flagged in the log
+    and the report, with the sites that grew most. A summary of the
+    highest-peak documents and per-stage peaks ends the report.
+
+    tracemalloc sees Python allocations only (pypdf objects, image buffers,
+    responses); memory allocated inside C libraries shows in RSS alone.
+    Tracing slows a run down noticeably, and documents are expected to be
+    processed one at a time.
+    """
+
+    def __init__(
+        self, report_path: Path, snapshot_every: int = SNAPSHOT_EVERY, frames: int = MEMPROFILE_FRAMES
+    ) -> None:
+        self.report_path = report_path
+        self.records_path = report_path.with_suffix(".jsonl")
+        self.snapshot_every = snapshot_every
+        self.frames = frames
+        self.documents = 0
+        self.growth_flagged = 0
+        self.top_documents: list[tuple[int, str]] = []
+        self.stage_peaks: dict[str, list[int]] = {}     # stage -> [count, total peak, max peak]
+        self._checkpoints: deque[tuple[int, int, tracemalloc.Snapshot]] = deque(maxlen=GROWTH_CHECKPOINTS + 1)
+        self._document_peak = 0
+        self._stages: dict[str, int] | None = None
+        self._report = None
+        self._records = None
+
+    def start(self) -> None:
+        global _active
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        self._report = open(self.report_path, "w")
+        self._records = open(self.records_path, "w")
+        self._report.write(f"Memory profile started {time.strftime('%Y-%m-%d %H:%M:%S')}, RSS {_mb(_rss())}\n")
+        tracemalloc.start(self.frames)
+        _active = self
+        logging.info(f"Memory profiling to {self.report_path} (every {self.snapshot_every} documents)")
+
+    def stop(self) -> None:
+        global _active
+        if _active is not self:
+            return
+        _active = None
+        self._checkpoint(final=True)
+        self._write_summary()
+        tracemalloc.stop()
+        self._report.close()
+        self._records.close()
+
+    def __enter__(self) -> "MemoryProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @contextmanager
+    def document(self, path: Path):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._document_peak = 0
+        self._stages = {}
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._document_peak)
+            record = {
+                "document": str(path),
+                "peak": peak - before,
+                "retained": current - before,
+                "traced": current,
+                "rss": _rss(),
+                "stages": self._stages,
+            }
+            self._stages = None
+            self._records.write(json.dumps(record) + "\n")
+            self._records.flush()
+            self.documents += 1
+            self.top_documents = sorted(
+                self.top_documents + [(record["peak"], str(path))], reverse=True
+            )[:TOP_DOCUMENTS]
+            if self.documents % self.snapshot_every == 0:
+                self._checkpoint()
+
+    @contextmanager
+    def stage(self, name: str):
+        # Each stage resets the peak, so fold the peak so far into the document's first
+        self._document_peak = max(self._document_peak, tracemalloc.get_traced_memory()[1])
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._document_peak = max(self._document_peak, peak)
+            stage_peak = peak - before
+            if self._stages is not None:
+                self._stages[name] = max(self._stages.get(name, 0), stage_peak)
+            stats = self.stage_peaks.setdefault(name, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += stage_peak
+            stats[2] = max(stats[2], stage_peak)
+
+    def _checkpoint(self, final: bool = False) -> None:
+        """Dump the top allocation sites and check retained memory for steady growth."""
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        traced = tracemalloc.get_traced_memory()[0]
+        label = "final" if final else f"after {self.documents} documents"
+        self._report.write(f"\n== Top allocation sites {label}: traced {_mb(traced)}, RSS {_mb(_rss())}\n")
+        for statistic in snapshot.statistics("lineno")[:TOP_SITES]:
+            self._report.write(f"  {statistic}\n")
+
+        if not final:
+            self._checkpoints.append((self.documents, traced, snapshot))
+            self._check_growth()
+        self._report.flush()
+
+    def _check_growth(self) -> None:
+        if len(self._checkpoints) <= GROWTH_CHECKPOINTS:
+            return
+        retained = [traced for _, traced, _ in self._checkpoints]
+        growth = retained[-1] - retained[0]
+        if not all(b > a for a, b in zip(retained, retained[1:])) or growth < GROWTH_MIN_BYTES:
+            return
+        self.growth_flagged += 1
+        first_documents, _, first_snapshot = self._checkpoints[0]
+        message = (
+            f"Memory retained between documents grew at each of the last {GROWTH_CHECKPOINTS} checkpoints: "
+            f"+{_mb(growth)} from document {first_documents} to {self.documents}"
+        )
+        logging.warning(message)
+        self._report.write(f"\n!! GROWTH: {message}. Largest increases:\n")
+        for statistic in self._checkpoints[-1][2].compare_to(first_snapshot, "lineno")[:TOP_SITES]:
+            self._report.write(f"  {statistic}\n")
+
+    def _write_summary(self) -> None:
+        report = self._report
+        report.write(f"\n== Summary: {self.documents} documents\n")
+        report.write("Highest peaks:\n")
+        for peak, path in self.top_documents:
+            report.write(f"  {_mb(peak):>10}  {path}\n")
+        report.write("Stages (mean / max peak):\n")
+        for name, (count, total, largest) in self.stage_peaks.items():
+            report.write(f"  {name:<14} {_mb(total // max(count, 1)):>10} / {_mb(largest):>10}  ({count} calls)\n")
+        if self.growth_flagged:
+            report.write(f"Steady growth flagged at {self.growth_flagged} checkpoint(s); see GROWTH sections above.\n")
+        else:
+            report.write("No steady growth in retained memory detected.\n")
@@ -0,0 +1,129 @@
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+COMMIT_BATCH_SIZE = 500    # records written per transaction
+SEARCH_LIMIT = 20
+# bm25() column weights for (title, authors, summary): title hits rank highest
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    destination TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL DEFAULT '',
+    authors TEXT NOT NULL DEFAULT '',
+    date TEXT,
+    summary TEXT NOT NULL DEFAULT '',
+    record TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, authors, summary, content='papers', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts(rowid, title, authors, summary)
+    VALUES (new.id, new.title, new.authors, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, authors, summary)
+    VALUES ('delete', old.id, old.title, old.authors, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts(papers_fts, rowid, title, authors, summary)
+    VALUES ('delete', old.id, old.title, old.authors, old.summary);
+    INSERT INTO papers_fts(rowid, title, authors, summary)
+    VALUES (new.id, new.title, new.authors, new.summary);
+END;
+"""
+
+
+def _fts_query(query: str) -> str:
+    """Quote each search term so user input cannot trip FTS5 query syntax."""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class MetadataStore:
+    """Single-file SQLite store of extracted metadata with an FTS5 index.
+
+    An alternative to writing one JSON file per PDF: every record lands in
+    one database, writes are grouped into transactions of COMMIT_BATCH_SIZE
+    records, and title/authors/summary are full-text searchable.
+    """
+
+    def __init__(self, db_path: Path, batch_size: int = COMMIT_BATCH_SIZE) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.pending = 0
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        logging.info(f"Opened metadata store {db_path}")
+
+    def __enter__(self) -> "MetadataStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, record: dict) -> None:
+        """Insert or replace the record for a destination.
+
+        :param record: Dict with "title", "authors", "date", "summary" (as returned
+                       by extract_from_pdf), "source" and "destination"
+        :type record: dict
+        """
+        title = (record.get("title") or {}).get("title", "")
+        authors = (record.get("authors") or {}).get("authors", "")
+        date = (record.get("date") or {}).get("date")
+        summary = (record.get("summary") or {}).get("summary", "")
+        self.conn.execute(
+            "INSERT INTO papers (source, destination, title, authors, date, summary, record) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(destination) DO UPDATE SET source=excluded.source, title=excluded.title, "
+            "authors=excluded.authors, date=excluded.date, summary=excluded.summary, record=excluded.record",
+            (record["source"], record["destination"], title, authors, date, summary, json.dumps(record)),
+        )
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self) -> None:
+        if self.pending:
+            self.conn.commit()
+            logging.info(f"Committed {self.pending} records to {self.db_path}")
+            self.pending = 0
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+        """Return records matching all query terms, best match first.
+
+        :param query: Whitespace-separated search terms
+        :type query: str
+        :param limit: Maximum number of results
+        :type limit: int
+        :return: Stored records, each with an added "rank" (lower is better)
+        :rtype: list[dict]
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        rows = self.conn.execute(
+            "SELECT papers.record, bm25(papers_fts, ?, ?, ?) AS rank "
+            "FROM papers_fts JOIN papers ON papers.id = papers_fts.rowid "
+            "WHERE papers_fts MATCH ? ORDER BY rank LIMIT ?",
+            (*BM25_WEIGHTS, fts_query, limit),
+        ).fetchall()
+        results = []
+        for record, rank in rows:
+            result = json.loads(record)
+            result["rank"] = rank
+            results.append(result)
+        return results
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
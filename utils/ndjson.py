@@ -0,0 +1,37 @@
+import json
+import logging
+import threading
+from typing import TextIO
+
+EMIT_FORMATS = ("text", "ndjson")
+
+
+class NdjsonWriter:
+    """Writes one JSON object per line to a stream, flushed after each.
+
+    Records reach a downstream reader (`pdf-renamer --emit ndjson | ingest`)
+    as soon as each document is done instead of when the run ends. If the
+    reader goes away (broken pipe), further records are dropped with one
+    warning and the run carries on, so renames are not left half-done.
+    Thread-safe.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.written = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def write(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self.stream.write(line)
+                self.stream.flush()
+            except BrokenPipeError:
+                self.closed = True
+                logging.warning("NDJSON reader closed the pipe; no further records are emitted")
+                return
+            self.written += 1
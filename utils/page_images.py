@@ -0,0 +1,305 @@
+import io
+import logging
+import math
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from PIL import Image
+from pypdf import PageObject
+from pypdf.filters import decode_stream_data
+from pypdf.generic import DecodedStreamObject, StreamObject
+
+MAX_IMAGE_BYTES = 16 * 1024 * 1024          # decoded pixel bytes per image; larger images are downsampled
+MAX_DOCUMENT_IMAGE_BYTES = 48 * 1024 * 1024  # encoded bytes sent to OCR per document; later images are skipped
+DOWNSAMPLED_JPEG_QUALITY = 85
+INFLATE_CHUNK_BYTES = 1024 * 1024            # decompressed bytes produced per step when streaming a Flate image
+
+_COMPONENTS = {"/DeviceGray": 1, "/CalGray": 1, "/DeviceRGB": 3, "/CalRGB": 3, "/Lab": 3, "/DeviceCMYK": 4}
+
+
+@dataclass(slots=True)
+class OcrImage:
+    """Encoded image bytes ready for the OCR model (same .data interface as pypdf's ImageFile)."""
+
+    name: str
+    data: bytes
+
+
+class ImageBudget:
+    """Running total of image bytes handed to OCR for one document."""
+
+    def __init__(self, max_bytes: int = MAX_DOCUMENT_IMAGE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.skipped = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.max_bytes - self.used
+
+    def take(self, size: int, name: object = "image") -> bool:
+        """Reserve size bytes; return False (and count a skip) if that would exceed the cap."""
+        if self.used + size > self.max_bytes:
+            self.skip(name)
+            return False
+        self.used += size
+        return True
+
+    def skip(self, name: object = "image") -> None:
+        """Count an image left out because the cap was reached."""
+        self.skipped += 1
+        logging.warning(f"Skipping image {name}: document OCR image budget of {self.max_bytes} bytes reached")
+
+
+def _target_size(width: int, height: int, components: int, max_bytes: int) -> tuple[int, int]:
+    """Largest size with the same aspect ratio whose decoded pixels fit in max_bytes."""
+    scale = math.sqrt(max_bytes / max(1, width * height * components))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _downsample_jpeg(data: bytes, size: tuple[int, int]) -> bytes:
+    """Re-encode a JPEG at reduced size without decoding it at full resolution.
+
+    Image.draft() makes libjpeg decode at 1/2, 1/4 or 1/8 scale directly from
+    the DCT coefficients, so the full-size bitmap is never allocated.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("RGB" if image.mode not in ("L", "1") else "L", size)
+        image.thumbnail(size)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=DOWNSAMPLED_JPEG_QUALITY)
+        return out.getvalue()
+
+
+def _encode(image: Image.Image, max_bytes: int) -> bytes:
+    """Downsample a decoded image to fit max_bytes if needed and encode it as PNG."""
+    components = len(image.getbands())
+    width, height = image.size
+    if width * height * components > max_bytes:
+        image.thumbnail(_target_size(width, height, components, max_bytes), reducing_gap=2.0)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _stream_downsample_flate(stream, width: int, height: int, mode: str, max_bytes: int) -> bytes:
+    """Downsample an unpredicted FlateDecode image while inflating it.
+
+    The stream is decompressed INFLATE_CHUNK_BYTES at a time; every step-th row
+    is kept and immediately shrunk horizontally by the same factor, so memory
+    holds one chunk plus the downsampled result, never the full bitmap.
+    """
+    bits = {"1": 1, "L": 8, "RGB": 24}[mode]
+    row_bytes = (width * bits + 7) // 8
+    step = max(1, math.ceil(math.sqrt(row_bytes * height / max_bytes)))
+    out_width = max(1, width // step)
+    resample = Image.Resampling.NEAREST if mode == "1" else Image.Resampling.BOX
+    inflater = zlib.decompressobj()
+    # The base class returns the stored, still compressed bytes; the stream's own
+    # get_data() would inflate the whole bitmap at once
+    compressed = StreamObject.get_data(stream)
+    pending = b""
+    kept = bytearray()
+    row = 0
+    while row < height:
+        chunk = inflater.decompress(compressed, INFLATE_CHUNK_BYTES)
+        compressed = inflater.unconsumed_tail
+        if not chunk:
+            break
+        pending += chunk
+        usable = min(len(pending) // row_bytes, height - row) * row_bytes
+        band = b"".join(
+            pending[offset:offset + row_bytes]
+            for index, offset in enumerate(range(0, usable, row_bytes))
+            if (row + index) % step == 0
+        )
+        if band:
+            rows = len(band) // row_bytes
+            kept += Image.frombytes(mode, (width, rows), band).resize((out_width, rows), resample).tobytes()
+        row += usable // row_bytes
+        pending = pending[usable:]
+    out_row_bytes = (out_width * bits + 7) // 8
+    image = Image.frombytes(mode, (out_width, max(1, len(kept) // out_row_bytes)), kept)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _image_xobjects(resources, seen: set) -> Iterator[tuple[str, object]]:
+    """Yield (name, stream) for image XObjects in resources, descending into form XObjects."""
+    if not resources or "/XObject" not in resources:
+        return
+    for name, reference in resources["/XObject"].get_object().items():
+        stream = reference.get_object()
+        key = id(stream)
+        if key in seen:
+            continue
+        seen.add(key)
+        subtype = stream.get("/Subtype")
+        if subtype == "/Image":
+            yield name, stream
+        elif subtype == "/Form":
+            yield from _image_xobjects(stream.get("/Resources"), seen)
+
+
+def _filters(stream) -> list[str]:
+    value = stream.get("/Filter")
+    if value is None:
+        return []
+    value = value.get_object()
+    return [str(f) for f in value] if isinstance(value, list) else [str(value)]
+
+
+def _streamable_flate(stream, colorspace: object) -> bool:
+    """True for Flate images _stream_downsample_flate can handle (no predictor, 8-bit gray/RGB or 1-bit gray)."""
+    if _filters(stream) != ["/FlateDecode"] or stream.get("/DecodeParms") or stream.get("/SMask") is not None:
+        return False
+    bits = stream.get("/BitsPerComponent")
+    return (colorspace, bits) in (("/DeviceGray", 8), ("/DeviceRGB", 8), ("/DeviceGray", 1))
+
+
+def _decoded_copy(stream) -> DecodedStreamObject:
+    """A copy of an image stream holding its decoded data.
+
+    Decoding through the stream itself (get_data, decode_as_image) caches the
+    decoded bytes on it for as long as the reader lives; the copy is dropped
+    with the image instead.
+    """
+    copy = DecodedStreamObject()
+    copy.update(stream)
+    copy.set_data(decode_stream_data(stream))
+    return copy
+
+
+def _estimated_size(stream, decoded_bytes: int, max_image_bytes: int) -> int:
+    """Rough size of an image once prepared for OCR: its stored length, scaled down if it will be downsampled.
+
+    Exact for JPEGs passed through; close for other encodings, which are
+    re-encoded with a compression of the same kind.
+    """
+    stored = len(StreamObject.get_data(stream))
+    if decoded_bytes > max_image_bytes:
+        return stored * max_image_bytes // decoded_bytes
+    return stored
+
+
+def _inline_images(page: PageObject, max_image_bytes: int, budget: ImageBudget | None) -> Iterator[object]:
+    """Yield a pypdf page's inline (BI ... ID ... EI) images, which live in the content stream, not in /XObject.
+
+    pypdf decodes them while parsing the content stream; inline images are
+    small by definition, so they are only downsampled if oversized.
+    """
+    images = page.images
+    try:
+        keys = images.keys()    # parses the content stream
+    except Exception as e:
+        logging.warning(f"Could not look for inline images: {e}")
+        return
+    for key in keys:
+        if not (isinstance(key, str) and key.startswith("~") and key.endswith("~")):
+            continue    # an XObject, already handled by _pypdf_images
+        try:
+            image = images[key]
+        except Exception as e:
+            logging.warning(f"Skipping unreadable inline image {key}: {e}")
+            continue
+        if budget is not None and len(image.data) > budget.remaining:
+            budget.skip(key)
+            continue
+        yield _downsample_encoded(image, max_image_bytes)
+
+
+def _pypdf_images(page: PageObject, max_image_bytes: int, budget: ImageBudget | None = None) -> Iterator[object]:
+    """Yield a pypdf page's images one at a time, downsampling oversized ones.
+
+    Images are sized from their XObject dictionary before anything is decoded,
+    and an image whose estimated size no longer fits the budget is skipped
+    without being decoded. JPEG (DCTDecode) images are passed through untouched
+    when small enough and otherwise decoded at reduced scale. Other encodings
+    are decoded one image at a time into a throwaway copy of the stream (see
+    _decoded_copy), so the reader does not keep every bitmap alive for the
+    rest of the document. Inline images follow the XObjects.
+    """
+    for name, stream in _image_xobjects(page.get("/Resources"), set()):
+        width, height = int(stream.get("/Width", 0)), int(stream.get("/Height", 0))
+        colorspace = stream.get("/ColorSpace")
+        colorspace = colorspace.get_object() if colorspace is not None else None
+        components = _COMPONENTS.get(colorspace if isinstance(colorspace, str) else None, 3)
+        decoded_bytes = width * height * components
+        if budget is not None and _estimated_size(stream, decoded_bytes, max_image_bytes) > budget.remaining:
+            budget.skip(name)
+            continue
+        try:
+            if _filters(stream) == ["/DCTDecode"]:
+                data = decode_stream_data(stream)  # DCTDecode passes the JPEG file bytes through
+                if decoded_bytes > max_image_bytes:
+                    logging.info(f"Downsampling {width}x{height} JPEG image {name} for OCR")
+                    data = _downsample_jpeg(data, _target_size(width, height, components, max_image_bytes))
+            elif decoded_bytes > max_image_bytes and _streamable_flate(stream, colorspace):
+                logging.info(f"Downsampling {width}x{height} image {name} for OCR while inflating it")
+                mode = "1" if stream.get("/BitsPerComponent") == 1 else ("L" if components == 1 else "RGB")
+                data = _stream_downsample_flate(stream, width, height, mode, max_image_bytes)
+            else:
+                if decoded_bytes > max_image_bytes:
+                    logging.info(f"Downsampling {width}x{height} image {name} for OCR")
+                data = _encode(_decoded_copy(stream).decode_as_image(), max_image_bytes)
+        except Exception as e:
+            logging.warning(f"Skipping unreadable image {name}: {e}")
+            continue
+        yield OcrImage(str(name), data)
+    yield from _inline_images(page, max_image_bytes, budget)
+
+
+def _downsample_encoded(image: object, max_image_bytes: int) -> object:
+    """Downsample an already-encoded image (anything with .data) if it exceeds the cap."""
+    try:
+        with Image.open(io.BytesIO(image.data)) as decoded:
+            width, height = decoded.size
+            components = len(decoded.getbands())
+            if width * height * components <= max_image_bytes:
+                return image
+            size = _target_size(width, height, components, max_image_bytes)
+            if decoded.format == "JPEG":
+                return OcrImage(getattr(image, "name", "image"), _downsample_jpeg(image.data, size))
+            return OcrImage(getattr(image, "name", "image"), _encode(decoded, max_image_bytes))
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # UnidentifiedImageError and truncated data are OSErrors
+        logging.warning(f"Could not downsample image {getattr(image, 'name', 'image')}: {e}; sending it as is")
+        return image
+
+
+def iter_page_images(
+    page: object,
+    budget: ImageBudget | None = None,
+    max_image_bytes: int = MAX_IMAGE_BYTES,
+) -> Iterator[object]:
+    """Lazily yield a page's images for OCR within per-image and per-document byte caps.
+
+    Images that cannot fit in what is left of the budget are skipped before
+    they are decoded or downsampled where their size can be told in advance.
+
+    :param page: pypdf PageObject, or any page whose .images items expose .data bytes
+    :param budget: Per-document ImageBudget; images past its cap are skipped
+    :param max_image_bytes: Decoded-size cap above which an image is downsampled
+    :return: Iterator of objects with a .data attribute holding encoded image bytes
+    """
+    if isinstance(page, PageObject):
+        images = _pypdf_images(page, max_image_bytes, budget)
+    else:
+        images = _generic_images(page, max_image_bytes, budget)
+    for image in images:
+        if budget is not None and not budget.take(len(image.data), getattr(image, "name", "image")):
+            continue
+        yield image
+
+
+def _generic_images(page: object, max_image_bytes: int, budget: ImageBudget | None) -> Iterator[object]:
+    """Yield the .images of a page that is not a pypdf PageObject, none once the budget is spent."""
+    for image in page.images:
+        if budget is not None and budget.remaining <= 0:
+            budget.skip(getattr(image, "name", "image"))
+            continue
+        yield _downsample_encoded(image, max_image_bytes)
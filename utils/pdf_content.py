@@ -1,64 +1,313 @@
+import copy
+import io
+import itertools
 import logging
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
 from dateparser.search import search_dates
 from pathlib import Path
 from pypdf import PdfReader
 from llms.extractors import OllamaExtractors
+from utils.fingerprint import NearDuplicateIndex, minhash_signature, shingle_hashes
+from utils import memprofile
+from utils.isolation import IsolatedParser, call_parent
+from utils.long_summary import budget_chars, spread
+from utils.page_images import ImageBudget, OcrImage, iter_page_images
 
 MIN_LINE_CHAR_THRESHOLD = 2    # min chars for a line to be kept
-MIN_CONTENT_LINES = 66 * 8    # target line count before stopping page reads
-MAX_PAGES_TO_READ = 3         # hard cap on pages read regardless of line count
+MAX_PAGES_TO_READ = 3         # hard cap on pages read when the text budget is not met sooner
 MAX_LINES_FOR_TITLE_AND_AUTHORS = 30
 MAX_SUMMARY_CHARS = 4000      # max chars sent to the summary LLM (~1k tokens)
 MIN_OCR_TRIGGER_CHARS = 50    # if PyPDF extracts fewer chars from a page, try OCR
+ALL_FIELDS = frozenset({"title", "authors", "date", "summary"})
+DEFAULT_TEXT_BACKEND = "pypdf"
+
+# Run-wide totals, reported once at the end instead of logging every dropped line or page
+clean_text_counters: Counter = Counter()
+page_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+
+# Text backends
+#
+# A backend opens a PDF and returns a document with a .pages sequence. Each page
+# has extract_text() -> str and an .images list whose items expose the encoded
+# image bytes as .data (what OllamaExtractors.ocr_page_images sends to the OCR
+# model). pypdf is always available; the others are optional installs that are
+# imported only when selected. They only replace text extraction: embedded
+# images for the OCR fallback are still read with pypdf, and only when a page
+# has too little text. A document can be opened from bytes already in memory
+# (see utils.prefetch) instead of from its path. Close documents with
+# close_document once read.
+
+
+class _PypdfImages:
+    """Opens the PDF with pypdf on first access, for reading embedded images."""
+
+    def __init__(self, pdf_path: Path, data: bytes | None = None) -> None:
+        self.pdf_path = pdf_path
+        self.data = data
+        self._reader = None
+
+    def page(self, index: int):
+        if self._reader is None:
+            self._reader = _open_pypdf(self.pdf_path, self.data)
+        return self._reader.pages[index]
+
+
+class _BackendPage:
+    def __init__(self, extract: Callable[[], str], images: _PypdfImages, index: int) -> None:
+        self._extract = extract
+        self._images = images
+        self._index = index
+
+    def extract_text(self) -> str:
+        return self._extract()
+
+    @property
+    def pypdf_page(self):
+        return self._images.page(self._index)
+
+    @property
+    def images(self) -> list:
+        return self.pypdf_page.images
+
+
+class _BackendDocument:
+    def __init__(self, pages: list[_BackendPage], close: Callable[[], None] | None = None) -> None:
+        self.pages = pages
+        self._close = close
+
+    def close(self) -> None:
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+
+def _open_pypdf(pdf_path: Path, data: bytes | None = None) -> PdfReader:
+    return PdfReader(io.BytesIO(data) if data is not None else str(pdf_path))
+
+
+# PDFium is not thread-safe, and extract_many reads documents from several threads
+_pdfium_lock = threading.Lock()
+
+
+def _open_pypdfium2(pdf_path: Path, data: bytes | None = None) -> _BackendDocument:
+    try:
+        import pypdfium2
+    except ImportError as e:
+        raise ImportError("The pypdfium2 text backend requires 'pip install pypdfium2'") from e
+    with _pdfium_lock:
+        document = pypdfium2.PdfDocument(data if data is not None else str(pdf_path))
+        page_count = len(document)
+    images = _PypdfImages(pdf_path, data)
+
+    def extract(index: int) -> str:
+        with _pdfium_lock:
+            page = document[index]
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range().replace("\r\n", "\n")
+            finally:
+                text_page.close()
+                page.close()
+
+    def close() -> None:
+        with _pdfium_lock:
+            document.close()
+
+    return _BackendDocument(
+        [_BackendPage(lambda index=index: extract(index), images, index) for index in range(page_count)], close
+    )
+
+
+def _open_pdfminer(pdf_path: Path, data: bytes | None = None) -> _BackendDocument:
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTTextContainer
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdftypes import resolve1
+    except ImportError as e:
+        raise ImportError("The pdfminer text backend requires 'pip install pdfminer.six'") from e
+    def source():
+        return io.BytesIO(data) if data is not None else open(pdf_path, "rb")
+
+    with source() as f:
+        page_count = resolve1(PDFDocument(PDFParser(f)).catalog["Pages"])["Count"]
+    images = _PypdfImages(pdf_path, data)
+
+    def extract(index: int) -> str:
+        # Layout analysis groups characters into lines in reading order
+        with source() as f:
+            layouts = list(extract_pages(f, page_numbers=[index], laparams=LAParams()))
+        for layout in layouts:
+            return "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+        return ""
+
+    return _BackendDocument([
+        _BackendPage(lambda index=index: extract(index), images, index) for index in range(page_count)
+    ])
+
+
+TEXT_BACKENDS: dict[str, Callable[[Path, bytes | None], object]] = {
+    "pypdf": _open_pypdf,           # pure Python, always installed
+    "pypdfium2": _open_pypdfium2,   # PDFium (C++); much faster on dense pages
+    "pdfminer": _open_pdfminer,     # pdfminer.six layout analysis; slowest, best reading order
+}
+
+
+def available_text_backends() -> list[str]:
+    """Return the names of text backends whose libraries are installed."""
+    modules = {"pypdf": "pypdf", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer"}
+    available = []
+    for name, module in modules.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        available.append(name)
+    return available
+
+
+def open_document(pdf_path: Path, backend: str | None = None, data: bytes | None = None) -> object:
+    """Open pdf_path with the named text backend.
+
+    :param pdf_path: Path to the PDF file
+    :type pdf_path: Path
+    :param backend: One of TEXT_BACKENDS (default: DEFAULT_TEXT_BACKEND)
+    :type backend: str | None
+    :param data: The file's contents, if already read; pdf_path is then not opened
+    :type data: bytes | None
+    :return: Document with a .pages sequence of pages supporting extract_text() and .images
+    :raises ValueError: If backend is not a known backend name
+    :raises ImportError: If the backend's library is not installed
+    """
+    backend = backend or DEFAULT_TEXT_BACKEND
+    try:
+        opener = TEXT_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown text backend {backend!r}; choose from {', '.join(TEXT_BACKENDS)}") from None
+    return opener(pdf_path, data)
+
+
+def close_document(document: object) -> None:
+    """Release what open_document holds for document (file handles, native memory)."""
+    close = getattr(document, "close", None)
+    if close is not None:
+        close()
 
 
 def clean_text(raw_text_from_pdf: str) -> list[str]:
     """Clean and filter text extracted from PDF.
 
     Splits raw PDF text into lines, strips whitespace, and filters out lines
-    below the minimum character threshold.
+    below the minimum character threshold. Kept and dropped lines are added to
+    clean_text_counters rather than logged one by one.
 
     :param raw_text_from_pdf: The raw text string extracted from a PDF document
     :type raw_text_from_pdf: str
     :return: List of cleaned text lines meeting the minimum character threshold
     :rtype: list[str]
     """
-    logging.info("Cleaning text...")
     result = []
+    skipped = 0
     for row in raw_text_from_pdf.split("\n"):
         tmp = row.strip()
         if len(tmp) > MIN_LINE_CHAR_THRESHOLD:
             result.append(tmp)
         else:
-            logging.info(f"Skipping line-too short {len(tmp)} < {MIN_LINE_CHAR_THRESHOLD} chars")
+            skipped += 1
+    with _counters_lock:
+        clean_text_counters.update(calls=1, lines_kept=len(result), lines_skipped=skipped)
+    logging.debug(f"Cleaned text: kept {len(result)} lines, skipped {skipped} short lines")
     return result
 
 
-def _extract_page_text(page: object, extractor: OllamaExtractors) -> str:
+def _extract_page_text(
+    page: object,
+    extractor: OllamaExtractors,
+    stats: dict | None = None,
+    image_budget: ImageBudget | None = None,
+) -> str:
     """Extract text from a single PDF page, falling back to OCR if needed.
 
-    Tries PyPDF text extraction first. If the result is below MIN_OCR_TRIGGER_CHARS
-    and the page contains embedded images, delegates to the OCR model.
+    Tries the page's text layer first. If the result is below MIN_OCR_TRIGGER_CHARS
+    and the page contains embedded images, delegates to the OCR model. Images are
+    streamed to the model one at a time (see iter_page_images), so a scanned page
+    never has all of its bitmaps decoded at once.
 
-    :param page: A pypdf PageObject
+    :param page: A page from open_document (a pypdf PageObject with the default backend)
     :param extractor: Configured OllamaExtractors instance
+    :param stats: Optional dict whose "ocr_pages" count is incremented when OCR runs
+    :param image_budget: Per-document cap on image bytes sent to OCR
     :return: Extracted text string (may be empty if all methods fail)
     :rtype: str
     """
     text = page.extract_text() or ""
     if len(text.strip()) < MIN_OCR_TRIGGER_CHARS:
-        page_images = list(page.images)
-        if page_images:
+        if isinstance(page, _BackendPage):
+            page = page.pypdf_page
+        images = iter_page_images(page, image_budget)
+        first = next(images, None)
+        if first is not None:
             logging.warning(
                 f"Page has minimal extracted text ({len(text.strip())} chars); "
                 "attempting OCR fallback..."
             )
-            text = extractor.ocr_page_images(page_images)
+            text = extractor.ocr_page_images(itertools.chain([first], images))
+            if stats is not None:
+                stats["ocr_pages"] = stats.get("ocr_pages", 0) + 1
     return text
 
 
+def _text_budget_met(
+    lines: list[str], chars: int, need_summary: bool, summary_chars: int = MAX_SUMMARY_CHARS
+) -> bool:
+    """Return True once the text read covers everything downstream consumers use.
+
+    Title, authors and date use the first MAX_LINES_FOR_TITLE_AND_AUTHORS lines;
+    the summary uses the first summary_chars characters.
+    """
+    if len(lines) < MAX_LINES_FOR_TITLE_AND_AUTHORS:
+        return False
+    return not need_summary or chars >= summary_chars
+
+
+def log_extraction_summary() -> None:
+    """Log the run's clean_text and page-reading totals."""
+    with _counters_lock:
+        lines, pages = dict(clean_text_counters), dict(page_counters)
+    if lines:
+        logging.info(
+            f"clean_text: {lines.get('calls', 0)} pages, {lines.get('lines_kept', 0)} lines kept, "
+            f"{lines.get('lines_skipped', 0)} short lines skipped"
+        )
+    if pages:
+        logging.info(
+            f"Page reading: {pages.get('documents', 0)} documents, {pages.get('pages', 0)} pages read, "
+            f"{pages.get('pages_skipped', 0)} skipped once the text budget was met, "
+            f"{pages.get('ocr_pages', 0)} pages OCR'd, ~{pages.get('ocr_calls_avoided', 0)} OCR calls avoided, "
+            f"{pages.get('images_skipped', 0)} images skipped over the per-document byte cap"
+        )
+
+
+def find_date(lines: list[str]) -> dict | None:
+    """Return the first date found in lines as {"date": ..., "date_line": ...}, or None."""
+    for text_line in lines:
+        dates = search_dates(text_line.strip())
+        if dates is not None and len(dates) > 0:
+            return {"date": str(dates[0]), "date_line": text_line.strip()}
+    return None
+
+
 def likely_title(
-    raw_text_fragment_from_pdf: list[str], extractor: OllamaExtractors
+    raw_text_fragment_from_pdf: list[str],
+    extractor: OllamaExtractors,
+    fields: frozenset[str] = ALL_FIELDS,
 ) -> tuple:
     """Extract title, authors, and date from the opening lines of a PDF.
 
@@ -70,59 +319,253 @@ def likely_title(
     :type raw_text_fragment_from_pdf: list[str]
     :param extractor: Configured OllamaExtractors instance
     :type extractor: OllamaExtractors
+    :param fields: Which of "title", "authors" and "date" to extract; the others are None
+    :type fields: frozenset[str]
     :return: Tuple of (title_dict, authors_dict, date_dict or None)
     :rtype: tuple
     """
     logging.info("Starting extraction...")
-    date = None
     title_lines = list(raw_text_fragment_from_pdf[:MAX_LINES_FOR_TITLE_AND_AUTHORS])
 
     # Date scan is independent — does not gate which lines go to the LLM
-    for text_line in title_lines:
-        dates = search_dates(text_line.strip())
-        if dates is not None and len(dates) > 0:
-            date = {"date": str(dates[0]), "date_line": text_line.strip()}
-            break
+    date = find_date(title_lines) if "date" in fields else None
 
-    title = extractor.llm_title(title_lines)
-    authors = extractor.llm_authors(title_lines)
+    title = extractor.llm_title(title_lines) if "title" in fields else None
+    authors = extractor.llm_authors(title_lines) if "authors" in fields else None
     return title, authors, date
 
 
-def extract_from_pdf(pdf_path: Path) -> tuple:
+def read_pdf_text(
+    pdf_path: Path,
+    extractor: OllamaExtractors,
+    need_summary: bool = True,
+    text_backend: str | None = None,
+    data: bytes | None = None,
+    summary_chars: int = MAX_SUMMARY_CHARS,
+) -> tuple[list[str], dict]:
+    """Read and clean the text of the pages metadata extraction needs.
+
+    Pages are read only until the text covers what the LLM calls consume
+    (MAX_LINES_FOR_TITLE_AND_AUTHORS lines and, with need_summary,
+    summary_chars characters), up to MAX_PAGES_TO_READ; without a summary
+    only the first page is read. A summary_chars above MAX_SUMMARY_CHARS (a
+    long-document summary) lifts the page cap: after the title lines, pages
+    are read in batches spread evenly over the whole document (the last page
+    included), each sized from the characters per page seen so far, and the
+    text is returned in page order. Falls back to OCR for image-based pages.
+
+    :param pdf_path: Path to the PDF file
+    :param extractor: OllamaExtractors used for the OCR fallback
+    :param need_summary: Whether the text will also be summarized
+    :param text_backend: Name of the TEXT_BACKENDS entry used to read page text
+    :param data: The file's contents, if already read into memory
+    :param summary_chars: Characters of text the summary will use
+    :return: Tuple of (cleaned lines, {"pages", "pages_skipped", "ocr_pages", "ocr_calls_avoided"})
+    :rtype: tuple[list[str], dict]
+    """
+    reader = open_document(pdf_path, text_backend, data)
+    try:
+        total = len(reader.pages)
+        long_summary = need_summary and summary_chars > MAX_SUMMARY_CHARS
+
+        # The title block is on the first page; only the summary can use more
+        page_limit = min(total, (total if long_summary else MAX_PAGES_TO_READ) if need_summary else 1)
+        page_stats = {"ocr_pages": 0}
+        image_budget = ImageBudget()
+        pages: dict[int, list[str]] = {}
+        pdf_text: list[str] = []
+        text_chars = 0
+
+        def read_page(index: int) -> None:
+            nonlocal text_chars
+            lines = clean_text(_extract_page_text(reader.pages[index], extractor, page_stats, image_budget))
+            pages[index] = lines
+            pdf_text.extend(lines)
+            text_chars += sum(len(line) + 1 for line in lines)
+
+        # Leading pages in order, until the title lines (and, for a normal summary, its text) are covered
+        leading_chars = 0 if long_summary else summary_chars
+        while len(pages) < page_limit and not _text_budget_met(pdf_text, text_chars, need_summary, leading_chars):
+            if pages:
+                logging.info(
+                    f"First {len(pages)} page(s) give {len(pdf_text)} lines, {text_chars} chars; "
+                    f"reading page {len(pages) + 1}"
+                )
+            read_page(len(pages))
+
+        # A long summary then samples the rest of the document rather than its next pages
+        while long_summary and text_chars < summary_chars and len(pages) < total:
+            per_page = text_chars / len(pages)
+            wanted = math.ceil((summary_chars - text_chars) / per_page) if per_page else total
+            batch = [index for index in spread(range(total), len(pages) + wanted) if index not in pages]
+            batch = batch or [next(index for index in range(total) if index not in pages)]
+            logging.info(f"{len(pages)} page(s) give {text_chars} chars; reading {len(batch)} more across the document")
+            for index in batch:
+                read_page(index)
+        if long_summary:
+            pdf_text = [line for index in sorted(pages) for line in pages[index]]
+    finally:
+        close_document(reader)
+    page_index = len(pages)
+
+    # Compared with always reading up to MAX_PAGES_TO_READ. Skipped pages of a
+    # document that needed OCR are counted as OCR calls avoided (an estimate:
+    # they were never opened).
+    pages_skipped = max(0, min(total, MAX_PAGES_TO_READ) - page_index)
+    ocr_calls_avoided = pages_skipped if page_stats["ocr_pages"] else 0
+    with _counters_lock:
+        page_counters.update(
+            documents=1, pages=page_index, pages_skipped=pages_skipped,
+            ocr_pages=page_stats["ocr_pages"], ocr_calls_avoided=ocr_calls_avoided,
+            images_skipped=image_budget.skipped,
+        )
+    logging.info(
+        f"Read {page_index} of {total} page(s) ({len(pdf_text)} lines, {text_chars} chars, "
+        f"{page_stats['ocr_pages']} OCR'd)"
+    )
+    return pdf_text, {
+        "pages": page_index, "pages_skipped": pages_skipped,
+        "ocr_pages": page_stats["ocr_pages"], "ocr_calls_avoided": ocr_calls_avoided,
+    }
+
+
+class _ParentOcr:
+    """Stands in for OllamaExtractors inside a parse worker.
+
+    OCR is the one LLM call made while reading, and a scanned document can need
+    many of them. Running them in the worker would count the model's latency
+    against the parse timeout, so each image is handed to the parent instead
+    (call_parent), which runs OCR with its own extractor while the timeout is paused.
+    """
+
+    def ocr_page_images(self, images: Iterable) -> str:
+        text_parts = [call_parent("ocr", image.data) for image in images]
+        return "\n".join(text for text in text_parts if text)
+
+
+def _read_pdf_text_in_worker(
+    pdf_path: Path,
+    need_summary: bool,
+    text_backend: str | None,
+    data: bytes | None = None,
+    summary_chars: int = MAX_SUMMARY_CHARS,
+) -> tuple[list[str], dict, dict, dict]:
+    """read_pdf_text for an IsolatedParser worker.
+
+    OCR is sent back to the parent (see _ParentOcr). Returns the counters this
+    call added so the parent can merge them into its run totals.
+    """
+    with _counters_lock:
+        clean_text_counters.clear()
+        page_counters.clear()
+    lines, read_stats = read_pdf_text(pdf_path, _ParentOcr(), need_summary, text_backend, data, summary_chars)
+    with _counters_lock:
+        return lines, read_stats, dict(clean_text_counters), dict(page_counters)
+
+
+def extract_from_pdf(
+    pdf_path: Path,
+    near_duplicates: NearDuplicateIndex | None = None,
+    extractor: OllamaExtractors | None = None,
+    fields: frozenset[str] = ALL_FIELDS,
+    stats: dict | None = None,
+    text_backend: str | None = None,
+    isolation: IsolatedParser | None = None,
+    data: bytes | None = None,
+    summary_tokens: int | None = None,
+) -> tuple:
     """Extract metadata and summary from a PDF file.
 
     Reads the PDF, cleans the text, and calls LLMs to extract title, authors,
-    date, and a summary. Reads additional pages if the first page has too little
-    content. Falls back to OCR for image-based pages.
+    date, and a summary. Pages are read only until the text covers what the LLM
+    calls consume (see read_pdf_text). Falls back to OCR for image-based pages.
+    With an IsolatedParser, reading happens in a supervised worker process and
+    a malformed file raises ParseTimeout or ParseOutOfMemory instead of hanging
+    or exhausting this process's memory; the LLM calls stay in this process.
+
+    When a near-duplicate index is given, the cleaned text is fingerprinted and
+    looked up first; if a previously processed document is similar enough, its
+    title and authors are reused and only the summary is generated.
 
     :param pdf_path: Path to the PDF file
     :type pdf_path: Path
+    :param near_duplicates: Optional index shared across the run
+    :type near_duplicates: NearDuplicateIndex | None
+    :param extractor: Long-lived OllamaExtractors to reuse (a new one is created if omitted)
+    :type extractor: OllamaExtractors | None
+    :param fields: Subset of ALL_FIELDS to extract; LLM calls for the others are
+                   skipped and their slots in the result are None
+    :type fields: frozenset[str]
+    :param stats: Optional dict filled with "pages", "pages_skipped", "ocr_pages",
+                  "ocr_calls_avoided", "read_seconds" and "llm_seconds"
+    :type stats: dict | None
+    :param text_backend: Name of the TEXT_BACKENDS entry used to read page text
+                         (default: DEFAULT_TEXT_BACKEND)
+    :type text_backend: str | None
+    :param isolation: Optional IsolatedParser that runs the PDF reading step
+    :type isolation: IsolatedParser | None
+    :param data: The file's contents, if already in memory (e.g. from a Prefetcher); the
+                 file is then parsed from these bytes instead of being read from pdf_path
+    :type data: bytes | None
+    :param summary_tokens: Summarize long documents by map-reduce (see
+                           OllamaExtractors.summarize_long), reading about this many
+                           estimated tokens of text from pages spread over the whole
+                           document instead of the first MAX_SUMMARY_CHARS characters
+    :type summary_tokens: int | None
     :return: Tuple of (title_dict, authors_dict, date_dict or None, summary_dict)
     :rtype: tuple
     """
     logging.info(f"Extracting from pdf {pdf_path}...")
-    pdf_text: list[str] = []
-    reader = PdfReader(str(pdf_path))
-    extractor = OllamaExtractors()
-
-    page_text = _extract_page_text(reader.pages[0], extractor)
-    pdf_text.extend(clean_text(page_text))
-
-    page_index = 1
-    while (
-        len(pdf_text) < MIN_CONTENT_LINES
-        and page_index < len(reader.pages)
-        and page_index < MAX_PAGES_TO_READ
-    ):
-        logging.warning(
-            f"First {page_index + 1} page(s) of text too short ({len(pdf_text)} lines), adding page"
-        )
-        page_text = _extract_page_text(reader.pages[page_index], extractor)
-        pdf_text.extend(clean_text(page_text))
-        page_index += 1
+    started = time.perf_counter()
+    extractor = extractor or OllamaExtractors()
+    need_summary = "summary" in fields
+    summary_chars = budget_chars(summary_tokens) if summary_tokens else MAX_SUMMARY_CHARS
+    with memprofile.stage("read"):
+        if isolation is not None:
+            pdf_text, read_stats, line_counts, page_counts = isolation.run(
+                _read_pdf_text_in_worker, pdf_path, need_summary, text_backend, data, summary_chars,
+                handlers={"ocr": lambda data: extractor.ocr_page_images([OcrImage("image", data)])},
+            )
+            with _counters_lock:
+                clean_text_counters.update(line_counts)
+                page_counters.update(page_counts)
+        else:
+            pdf_text, read_stats = read_pdf_text(
+                pdf_path, extractor, need_summary, text_backend, data, summary_chars
+            )
+    read_done = time.perf_counter()
+    if stats is not None:
+        stats.update(read_stats, read_seconds=read_done - started)
+
+    if "summary" in fields:
+        cont_pdf_text = "\n".join(pdf_text)
+        with memprofile.stage("summary"):
+            if summary_tokens and len(cont_pdf_text) > MAX_SUMMARY_CHARS:
+                # Not cut here: the pages were spread over the document, so the tail matters
+                summary = extractor.summarize_long(cont_pdf_text, summary_tokens)
+            else:
+                summary = extractor.summarize_text(cont_pdf_text[:MAX_SUMMARY_CHARS])
+    else:
+        summary = None
+
+    if near_duplicates is None:
+        with memprofile.stage("title_authors"):
+            title, authors, date = likely_title(pdf_text, extractor, fields)
+        if stats is not None:
+            stats["llm_seconds"] = time.perf_counter() - read_done
+        return title, authors, date, summary
 
-    cont_pdf_text = "\n".join(pdf_text)[:MAX_SUMMARY_CHARS]
-    summary = extractor.summarize_text(cont_pdf_text)
-    title, authors, date = likely_title(pdf_text, extractor)
+    signature = minhash_signature(shingle_hashes(pdf_text))
+    match = near_duplicates.query(signature)
+    if match is not None:
+        other, similarity, shared = match
+        near_duplicates.record_match(pdf_path, other, similarity)
+        title, authors = copy.deepcopy(shared["title"]), copy.deepcopy(shared["authors"])
+        date = find_date(pdf_text[:MAX_LINES_FOR_TITLE_AND_AUTHORS]) if "date" in fields else None
+    else:
+        with memprofile.stage("title_authors"):
+            title, authors, date = likely_title(pdf_text, extractor, fields)
+    near_duplicates.add(pdf_path, signature, {"title": copy.deepcopy(title), "authors": copy.deepcopy(authors)})
+    if stats is not None:
+        stats["llm_seconds"] = time.perf_counter() - read_done
     return title, authors, date, summary
@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+PREFETCH_FILES = 4                      # upcoming files read ahead of the one being processed
+PREFETCH_BYTES = 256 * 1024 * 1024      # total size of read-ahead buffers held at once
+
+
+def _read(path: Path) -> bytes:
+    """Read a whole file, telling the kernel to read ahead aggressively."""
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return f.read()
+
+
+def _hint(path: Path) -> None:
+    """Ask the kernel to start loading path into the page cache, without waiting for it."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+class Prefetcher:
+    """Reads the next PDFs of a batch into memory while the current one is processed.
+
+    A background thread follows the batch order and keeps up to max_files
+    files, and at most max_bytes, read ahead. take() hands a file's bytes to
+    extract_from_pdf, so opening it does not stall on cold reads from slow
+    storage (network mounts) while the LLM host sits idle. A file larger than
+    max_bytes is not buffered; the kernel is asked to load it into the page
+    cache instead (posix_fadvise WILLNEED). Files for which skip(path) is true
+    (unchanged in the manifest, byte-identical copies) are not read at all,
+    and buffers of files the batch has moved past are dropped.
+
+    Counters: hits (take() found the bytes), misses (it did not, so the file
+    is read the usual way), waits and wait_seconds (take() blocked on a read
+    in progress), and saved_seconds (read time of hits not spent waiting).
+    """
+
+    def __init__(self, max_files: int = PREFETCH_FILES, max_bytes: int = PREFETCH_BYTES) -> None:
+        if max_files < 1:
+            raise ValueError("max_files must be at least 1")
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.prefetched, self.hinted, self.hits, self.misses, self.waits = 0, 0, 0, 0, 0
+        self.read_seconds, self.wait_seconds, self.saved_seconds = 0.0, 0.0, 0.0
+        self._paths: list[Path] = []
+        self._index: dict[Path, int] = {}
+        self._skip: Callable[[Path], bool] | None = None
+        self._next = 0              # index of the next path to read ahead
+        self._consumed = 0          # paths before this index have been passed by the batch
+        self._buffers: dict[Path, tuple[bytes, float]] = {}     # path -> (data, seconds to read)
+        self._held = 0
+        self._reading: Path | None = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def start(self, paths: list[Path], skip: Callable[[Path], bool] | None = None) -> None:
+        """Begin reading ahead through paths, in the order they will be processed."""
+        self._paths = list(paths)
+        self._index = {path: index for index, path in enumerate(self._paths)}
+        self._skip = skip
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def _ahead(self) -> int:
+        return len(self._buffers) + (self._reading is not None)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._next < len(self._paths) and self._ahead() >= self.max_files:
+                    self._cond.wait()
+                if self._closed or self._next >= len(self._paths):
+                    return
+                self._next = max(self._next, self._consumed)
+                if self._next >= len(self._paths):
+                    return
+                path = self._paths[self._next]
+                self._next += 1
+            try:
+                if self._skip is not None and self._skip(path):
+                    continue
+                size = os.stat(path).st_size
+                if size > self.max_bytes:
+                    _hint(path)
+                    with self._cond:
+                        self.hinted += 1
+                    continue
+                with self._cond:
+                    while not self._closed and self._held and self._held + size > self.max_bytes:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    if self._index[path] < self._consumed:
+                        continue
+                    self._reading = path
+                    self._held += size
+                started = time.perf_counter()
+                data = _read(path)
+                elapsed = time.perf_counter() - started
+            except OSError as e:
+                logging.debug(f"Could not read ahead {path}: {e}")
+                with self._cond:
+                    if self._reading == path:
+                        self._held -= size
+                        self._reading = None
+                    self._cond.notify_all()
+                continue
+            with self._cond:
+                self._reading = None
+                self._held += len(data) - size
+                self.prefetched += 1
+                self.read_seconds += elapsed
+                if self._index[path] < self._consumed or self._closed:
+                    self._held -= len(data)
+                else:
+                    self._buffers[path] = (data, elapsed)
+                self._cond.notify_all()
+
+    def take(self, path: Path) -> bytes | None:
+        """Return path's bytes if they were read ahead (waiting for a read in progress), else None."""
+        with self._cond:
+            index = self._index.get(path)
+            if index is None:
+                self.misses += 1
+                return None
+            self._consumed = max(self._consumed, index)
+            waited = 0.0
+            if self._reading == path:
+                started = time.perf_counter()
+                while self._reading == path:
+                    self._cond.wait()
+                waited = time.perf_counter() - started
+                self.waits += 1
+                self.wait_seconds += waited
+            self._consumed = max(self._consumed, index + 1)
+            buffered = self._buffers.pop(path, None)
+            for stale in [p for p in self._buffers if self._index[p] < index]:
+                self._held -= len(self._buffers.pop(stale)[0])
+            if buffered is None:
+                self.misses += 1
+                self._cond.notify_all()
+                return None
+            data, elapsed = buffered
+            self._held -= len(data)
+            self.hits += 1
+            self.saved_seconds += max(0.0, elapsed - waited)
+            self._cond.notify_all()
+            return data
+
+    def close(self) -> None:
+        """Stop reading ahead and drop the buffers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._buffers.clear()
+        self._held = 0
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "prefetched": self.prefetched,
+                "hinted": self.hinted,
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "read_seconds": round(self.read_seconds, 3),
+                "wait_seconds": round(self.wait_seconds, 3),
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
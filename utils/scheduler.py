@@ -0,0 +1,225 @@
+import json
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+CHECKPOINT_VERSION = 1
+ORDERS = ("name", "cheapest", "newest")
+TIMING_SMOOTHING = 0.3      # weight of each new observation in the learned per-stage timings
+BYTES_PER_PAGE_GUESS = 100 * 1024   # page count estimate when page objects are hidden in object streams
+PROBE_BYTES = 256 * 1024            # bytes read from each end of a file when probing it
+
+# Cheap structural signals read straight from the file bytes, without parsing.
+# Page and font dictionaries inside compressed object streams are not visible
+# this way; such files fall back to the size-based page estimate.
+_PAGE = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+_PAGE_TREE = re.compile(rb"<<[^<>]*/Type\s*/Pages(?![A-Za-z])[^<>]*>>")
+_COUNT = re.compile(rb"/Count\s+(\d+)")
+_FONT = re.compile(rb"/Font(?![A-Za-z])")
+_IMAGE = re.compile(rb"/Subtype\s*/Image(?![A-Za-z])")
+
+
+@dataclass(slots=True)
+class Job:
+    """One file to process, with the signals its cost estimate is based on."""
+
+    path: Path
+    size: int
+    mtime: float
+    pages: int
+    has_text: bool
+    cost: float = 0.0   # estimated seconds
+
+
+def stat_job(path: Path) -> Job:
+    """A Job from os.stat alone: page count from the size, text layer assumed."""
+    st = os.stat(path)
+    return Job(path, st.st_size, st.st_mtime, max(1, st.st_size // BYTES_PER_PAGE_GUESS), True)
+
+
+def probe(path: Path) -> Job:
+    """Gather size, page count and text-layer presence for path from its first and last PROBE_BYTES.
+
+    The page tree's /Count (near the start of linearized files and usually near
+    the end of others) gives the page count. Failing that, the page objects in
+    the bytes read are counted and scaled up to the file size.
+    """
+    st = os.stat(path)
+    pages, has_font, has_image = 0, False, False
+    if st.st_size:
+        with open(path, "rb") as f:
+            data = f.read(PROBE_BYTES)
+            if st.st_size > 2 * PROBE_BYTES:
+                f.seek(-PROBE_BYTES, os.SEEK_END)
+                data += f.read(PROBE_BYTES)
+            else:
+                data += f.read()
+        counts = [int(m.group(1)) for tree in _PAGE_TREE.finditer(data) for m in _COUNT.finditer(tree.group(0))]
+        if counts:
+            pages = max(counts)
+        else:
+            pages = sum(1 for _ in _PAGE.finditer(data)) * st.st_size // max(1, len(data))
+        has_font = _FONT.search(data) is not None
+        has_image = _IMAGE.search(data) is not None
+    if not pages:
+        pages = max(1, st.st_size // BYTES_PER_PAGE_GUESS)
+    # A file with images and no visible fonts is taken to be a scan that needs OCR
+    return Job(path, st.st_size, st.st_mtime, pages, has_text=has_font or not has_image)
+
+
+class CostModel:
+    """Estimates per-file processing time from probe signals and learned stage timings.
+
+    A document costs a fixed LLM time plus, for each page read, either the
+    text-layer or the OCR time per page, plus a small per-megabyte parsing
+    cost. Only the first few pages are read (see read_pdf_text), so the number
+    of pages read is learned too. Every observed document updates the timings
+    with an exponential moving average.
+    """
+
+    DEFAULTS = {
+        "llm_seconds": 6.0,         # title, authors and summary calls
+        "text_page_seconds": 0.1,   # reading one page from the text layer
+        "ocr_page_seconds": 15.0,   # OCR of one scanned page
+        "megabyte_seconds": 0.02,   # opening and parsing, per MB of file
+        "pages_read": 2.0,          # pages read per document before the text budget is met
+    }
+
+    def __init__(self, timings: dict | None = None) -> None:
+        self.timings = {**self.DEFAULTS, **(timings or {})}
+        self.observed = 0
+
+    def estimate(self, job: Job) -> float:
+        t = self.timings
+        page_seconds = t["text_page_seconds"] if job.has_text else t["ocr_page_seconds"]
+        pages = min(job.pages, t["pages_read"])
+        return t["llm_seconds"] + pages * page_seconds + job.size / 1e6 * t["megabyte_seconds"]
+
+    def _learn(self, name: str, value: float) -> None:
+        self.timings[name] += TIMING_SMOOTHING * (value - self.timings[name])
+
+    def observe(self, job: Job, stats: dict) -> None:
+        """Update the timings from extract_from_pdf's stats for job (ignored if empty, e.g. a cache hit)."""
+        if not stats.get("pages"):
+            return
+        self.observed += 1
+        self._learn("pages_read", stats["pages"])
+        if "llm_seconds" in stats:
+            self._learn("llm_seconds", stats["llm_seconds"])
+        read = max(0.0, stats.get("read_seconds", 0.0) - job.size / 1e6 * self.timings["megabyte_seconds"])
+        if stats.get("ocr_pages"):
+            self._learn("ocr_page_seconds", read / stats["ocr_pages"])
+        else:
+            self._learn("text_page_seconds", read / stats["pages"])
+
+
+class Scheduler:
+    """Orders a batch by estimated cost and enforces an optional time budget.
+
+    Orders: "name" (sorted paths, the default), "cheapest" (least estimated
+    work first, which completes the most files in a limited time) and
+    "newest" (most recently modified first). Byte-identical copies are kept
+    directly after the file whose metadata they reuse.
+    """
+
+    def __init__(self, order: str = "name", time_budget: float | None = None, model: CostModel | None = None) -> None:
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order {order!r}; choose from {', '.join(ORDERS)}")
+        self.order = order
+        self.time_budget = time_budget
+        self.model = model or CostModel()
+        self.started = time.monotonic()
+
+    def plan(
+        self,
+        paths: list[Path],
+        duplicate_of: dict[Path, Path] | None = None,
+        skip: Callable[[Path], bool] | None = None,
+    ) -> list[Job]:
+        """Estimate every path and return the jobs in processing order.
+
+        Files are only probed when the order or the time budget uses the
+        estimates; otherwise a stat is enough for the progress bar. Files for
+        which skip(path) is true (e.g. unchanged since the manifest was written)
+        are not read at all and cost nothing.
+        """
+        self.started = time.monotonic()
+        duplicate_of = duplicate_of or {}
+        probing = self.order != "name" or self.time_budget is not None
+        jobs = []
+        for path in paths:
+            skipped = skip is not None and skip(path)
+            try:
+                job = probe(path) if probing and not skipped else stat_job(path)
+            except OSError as e:
+                logging.warning(f"Could not probe {path}: {e}")
+                job = Job(path, 0, 0.0, 1, True)
+            job.cost = 0.0 if skipped else self.model.estimate(job)
+            jobs.append(job)
+
+        copies: dict[Path, list[Job]] = {}
+        for job in sorted((job for job in jobs if job.path in duplicate_of), key=lambda job: str(job.path)):
+            copies.setdefault(duplicate_of[job.path], []).append(job)
+        ordered = []
+        for job in sorted((job for job in jobs if job.path not in duplicate_of), key=self._sort_key):
+            ordered.append(job)
+            ordered.extend(copies.pop(job.path, []))
+        for orphans in copies.values():
+            ordered.extend(orphans)
+        logging.info(
+            f"Scheduled {len(ordered)} files (order: {self.order}), estimated {sum(j.cost for j in ordered):.0f}s"
+        )
+        return ordered
+
+    def _sort_key(self, job: Job) -> tuple:
+        if self.order == "cheapest":
+            return job.cost, str(job.path)
+        if self.order == "newest":
+            return -job.mtime, str(job.path)
+        return (str(job.path),)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def fits(self, job: Job) -> bool:
+        """Return False once starting job would overrun the time budget."""
+        return self.time_budget is None or self.elapsed + job.cost <= self.time_budget
+
+    def observe(self, job: Job, stats: dict) -> None:
+        self.model.observe(job, stats)
+
+
+def save_checkpoint(path: Path, mode: str, pdf_root: Path, pending: list[Path], model: CostModel) -> None:
+    """Record the files a budget-limited run did not reach, and the learned timings."""
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "mode": mode,
+        "pdf_root": str(pdf_root),
+        "pending": [str(p) for p in pending],
+        "timings": model.timings,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: Path, mode: str, pdf_root: Path) -> dict:
+    """Read a checkpoint written by save_checkpoint, checking it belongs to this mode and directory.
+
+    :raises ValueError: the checkpoint is from another version, mode or --pdf-root
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"checkpoint {path} has unknown version {data.get('version')}")
+    if data["mode"] != mode or Path(data["pdf_root"]) != pdf_root:
+        raise ValueError(f"checkpoint {path} is for a {data['mode']} run over {data['pdf_root']}")
+    data["pending"] = [Path(p) for p in data["pending"]]
+    return data
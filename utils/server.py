@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from utils.api import DEFAULT_WORKERS, ExtractionResult, extract_one
+from utils.concurrency import limiters
+
+if TYPE_CHECKING:
+    from llms.extractors import OllamaExtractors
+
+DEFAULT_BIND = "127.0.0.1"     # local tools only; put a proxy in front to expose it further
+DEFAULT_PORT = 8765
+MAX_PENDING = 16               # admitted requests (running + queued) before new ones get 503
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+MAX_JSON_BYTES = 64 * 1024     # a {"path": ...} request body
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # bytes read from the socket and written to the temp file per step
+RETRY_AFTER_SECONDS = 5
+
+
+class Busy(Exception):
+    """Raised when the admission limit is reached."""
+
+
+class ExtractionService:
+    """Shared worker pool and warm OllamaExtractors behind the HTTP endpoint.
+
+    At most max_pending documents are admitted at once (running on one of the
+    workers or waiting for one); further submissions are rejected immediately
+    rather than queued without bound, so a burst of uploads cannot exhaust
+    memory or disk.
+    """
+
+    def __init__(
+        self,
+        extractor: OllamaExtractors | None = None,
+        workers: int = DEFAULT_WORKERS,
+        max_pending: int = MAX_PENDING,
+        fields: frozenset[str] | None = None,
+        text_backend: str | None = None,
+        summary_tokens: int | None = None,
+    ) -> None:
+        if extractor is None:
+            from llms.extractors import OllamaExtractors
+
+            extractor = OllamaExtractors()
+        self.extractor = extractor
+        self.workers = workers
+        self.max_pending = max_pending
+        self.fields = fields
+        self.text_backend = text_backend
+        self.summary_tokens = summary_tokens
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="serve")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed, self.rejected = 0, 0
+
+    def admit(self) -> None:
+        """Take an admission slot for a request that will be submitted, or raise Busy.
+
+        Lets a caller check the limit before doing expensive work (e.g. receiving
+        an upload); pass admitted=True to submit, or call release() to give it back.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise Busy(f"{self.max_pending} requests already pending")
+        with self._lock:
+            self.pending += 1
+
+    def submit(self, path: Path, cleanup: bool = False, admitted: bool = False) -> Future[ExtractionResult]:
+        """Queue path for extraction, or raise Busy if the admission limit is reached.
+
+        :param path: PDF to extract
+        :param cleanup: Delete path once extraction finishes (for uploaded temp files)
+        :param admitted: The caller already holds a slot from admit()
+        """
+        if not admitted:
+            self.admit()
+        try:
+            return self.pool.submit(self._run, path, cleanup)
+        except BaseException:
+            self.release()
+            raise
+
+    def _run(self, path: Path, cleanup: bool) -> ExtractionResult:
+        try:
+            return extract_one(
+                path, self.fields, self.extractor, text_backend=self.text_backend, summary_tokens=self.summary_tokens
+            )
+        finally:
+            if cleanup:
+                path.unlink(missing_ok=True)
+            with self._lock:
+                self.completed += 1
+            self.release()
+
+    def release(self) -> None:
+        """Give back a slot taken by admit() that was not passed to submit."""
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "status": "ok",
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "llm_concurrency": {host: limiter.snapshot() for host, limiter in limiters().items()},
+            }
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def result_to_json(result: ExtractionResult) -> dict:
+    data = dataclasses.asdict(result)
+    data["path"] = str(result.path)
+    data["authors"] = list(result.authors)
+    return data
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    """HTTP front end for an ExtractionService.
+
+    POST /extract with Content-Type application/pdf uploads a document;
+    with application/json and {"path": "..."} extracts a file already on this
+    host. GET /health reports pool and queue state and each Ollama host's
+    adaptive concurrency limit.
+    """
+
+    service: ExtractionService    # set on the subclass created by make_server
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: HTTPStatus, body: dict, headers: dict | None = None) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: HTTPStatus, message: str, headers: dict | None = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, self.service.status())
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"no such endpoint: {self.path}")
+
+    def _content_length(self) -> int | None:
+        """The request's Content-Length, or None after answering 400 for a malformed one."""
+        value = (self.headers.get("Content-Length") or "0").strip()
+        if not (value.isascii() and value.isdigit()):
+            self.close_connection = True
+            self._error(HTTPStatus.BAD_REQUEST, f"invalid Content-Length: {value!r}")
+            return None
+        return int(value)
+
+    def _receive_upload(self, length: int) -> Path | None:
+        """Stream the request body to a temp file, or return None if the client hung up first."""
+        fd, name = tempfile.mkstemp(prefix="pdf-renamer-", suffix=".pdf")
+        remaining = length
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_BYTES))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            Path(name).unlink(missing_ok=True)
+            raise
+        if remaining:
+            logging.warning(f"{self.address_string()} disconnected after {length - remaining} of {length} bytes")
+            self.close_connection = True
+            Path(name).unlink(missing_ok=True)
+            return None
+        return Path(name)
+
+    def do_POST(self) -> None:
+        # Every response sent before the body is read closes the connection,
+        # since the unread body would otherwise be parsed as the next request.
+        if self.path != "/extract":
+            self.close_connection = True
+            self._error(HTTPStatus.NOT_FOUND, f"no such endpoint: {self.path}")
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        limit = {"application/pdf": MAX_UPLOAD_BYTES, "application/json": MAX_JSON_BYTES}.get(content_type)
+        if limit is None:
+            self.close_connection = True
+            self._error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "send application/pdf or application/json")
+            return
+        if length > limit:
+            self.close_connection = True
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"{content_type} body exceeds {limit} bytes")
+            return
+        # Admit before receiving anything, so rejected uploads cost neither memory nor disk
+        try:
+            self.service.admit()
+        except Busy as e:
+            self.close_connection = True
+            self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {"Retry-After": str(RETRY_AFTER_SECONDS)})
+            return
+
+        submitted = False
+        try:
+            cleanup = content_type == "application/pdf"
+            if cleanup:
+                path = self._receive_upload(length)
+                if path is None:
+                    return
+            else:
+                try:
+                    path = Path(json.loads(self.rfile.read(length))["path"])
+                except (ValueError, KeyError, TypeError):
+                    self._error(HTTPStatus.BAD_REQUEST, 'expected a JSON body {"path": "..."}')
+                    return
+                if not path.is_file():
+                    self._error(HTTPStatus.BAD_REQUEST, f"not a file: {path}")
+                    return
+            try:
+                future = self.service.submit(path, cleanup=cleanup, admitted=True)
+            except BaseException:
+                if cleanup:
+                    path.unlink(missing_ok=True)
+                raise
+            submitted = True
+        finally:
+            if not submitted:
+                self.service.release()
+        result = future.result()
+        if cleanup:
+            result.path = Path(self.headers.get("X-Filename") or "upload.pdf")
+        status = HTTPStatus.OK if result.ok else HTTPStatus.UNPROCESSABLE_ENTITY
+        self._send_json(status, result_to_json(result))
+
+
+def make_server(service: ExtractionService, bind: str = DEFAULT_BIND, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Create (but do not start) an HTTP server in front of service; port 0 picks a free port."""
+    handler = type("BoundExtractionHandler", (ExtractionHandler,), {"service": service})
+    server = ThreadingHTTPServer((bind, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(service: ExtractionService, bind: str = DEFAULT_BIND, port: int = DEFAULT_PORT) -> None:
+    """Serve extraction requests until interrupted."""
+    server = make_server(service, bind, port)
+    host, port = server.server_address[:2]
+    logging.info(f"Serving PDF extraction on http://{host}:{port}")
+    print(f"Serving PDF extraction on http://{host}:{port}  (POST /extract, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
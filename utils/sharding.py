@@ -0,0 +1,92 @@
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+
+from utils.destinations import DestinationIndex
+from utils.duplicates import PARTIAL_HASH_BYTES, file_digest
+from utils.file_name import make_filename_safe
+
+_SHARD = re.compile(r"^(\d+)/(\d+)$")
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """Parse "i/N" (1 <= i <= N) into (i, N).
+
+    :raises ValueError: text is not of that form
+    """
+    match = _SHARD.match(text.strip())
+    if not match:
+        raise ValueError(f"expected i/N, got {text!r}")
+    index, count = int(match[1]), int(match[2])
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is not between 1 and {count}")
+    return index, count
+
+
+def shard_key(path: Path) -> int:
+    """Stable 64-bit key for assigning path to a shard.
+
+    Derived from the file's size and a hash of its leading bytes, so it is the
+    same on every machine and for every copy of the file: byte-identical copies
+    land on the same shard, where duplicate detection still finds them. Falls
+    back to the file name if the file cannot be read.
+    """
+    try:
+        signature = f"{os.stat(path).st_size}:{file_digest(path, PARTIAL_HASH_BYTES)}"
+    except OSError as e:
+        logging.warning(f"Could not read {path} for sharding, using its name: {e}")
+        signature = path.name
+    return int.from_bytes(hashlib.blake2b(signature.encode(), digest_size=8).digest(), "big")
+
+
+def select_shard(paths: list[Path], index: int, count: int) -> list[Path]:
+    """Return the paths belonging to shard index of count (1-based), in their original order."""
+    selected = [path for path in paths if shard_key(path) % count == index - 1]
+    logging.info(f"Shard {index}/{count}: {len(selected)} of {len(paths)} files")
+    return selected
+
+
+def shard_path(path: Path, index: int, count: int) -> Path:
+    """Per-shard variant of a state file: plan.json -> plan.shard-2-of-4.json."""
+    return path.with_name(f"{path.stem}.shard-{index}-of-{count}{path.suffix}")
+
+
+def merge_plans(plans: list[list[dict]]) -> list[dict]:
+    """Combine shard plans into one plan with unique destinations.
+
+    Entries are ordered by source path, and every destination is claimed
+    again from the entry's title. That is the same procedure a single dry run
+    over the whole directory uses, so shards that chose the same name are
+    disambiguated exactly as one run would have done. Entries with a failure
+    status are kept as they are. If a source appears in more than one plan,
+    only its first entry is kept.
+
+    :param plans: Plans written by --dry-run --shard, in any order
+    :return: Merged plan
+    :rtype: list[dict]
+    """
+    entries: dict[str, dict] = {}
+    for plan in plans:
+        for entry in plan:
+            if entry["source"] in entries:
+                logging.warning(f"{entry['source']} appears in more than one plan; keeping the first entry")
+                continue
+            entries[entry["source"]] = entry
+
+    index = DestinationIndex()
+    merged = []
+    for source, entry in sorted(entries.items(), key=lambda item: Path(item[0])):
+        if entry.get("status", "OK") == "OK":
+            planned = Path(entry["destination"])
+            destination = index.claim(
+                Path(source), make_filename_safe(entry["title"]["title"]), entry["authors"], entry["date"],
+                directory=planned.parent,
+            )
+            if destination != planned:
+                logging.info(f"Merged plan moves {Path(source).name} to {destination.name} (was {planned.name})")
+            entry = {**entry, "destination": str(destination)}
+        merged.append(entry)
+    logging.info(f"Merged {len(plans)} plans: {len(merged)} entries, {index.collisions} renamed to avoid collisions")
+    return merged
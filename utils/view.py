@@ -0,0 +1,133 @@
+import errno
+import json
+import logging
+import os
+from pathlib import Path
+
+from utils.destinations import DestinationIndex, _first_author_surname, _year_from_date
+
+VIEW_INDEX_NAME = ".pdf-renamer-view.json"
+VIEW_INDEX_VERSION = 1
+VIEW_LAYOUTS = ("flat", "year", "author", "year-author")
+LINK_KINDS = ("symbolic", "hard")
+UNKNOWN_YEAR = "unknown-year"
+UNKNOWN_AUTHOR = "unknown-author"
+
+
+class View:
+    """A directory of links to the PDFs under their clean names; the originals are never touched.
+
+    Links are symbolic (absolute paths; not followed by sync clients) or hard
+    (same filesystem only). With a "year", "author" or "year-author" layout,
+    links are grouped in subdirectories by the extracted year and first-author
+    surname. An index file in the view root records which link belongs to
+    which source, so later runs only create, move or remove the links that
+    changed: a source whose title and layout directory are unchanged and
+    whose link still points at it is left alone.
+    """
+
+    def __init__(self, root: Path, layout: str = "flat", link: str = "symbolic") -> None:
+        if layout not in VIEW_LAYOUTS:
+            raise ValueError(f"Unknown view layout {layout!r}; choose from {', '.join(VIEW_LAYOUTS)}")
+        if link not in LINK_KINDS:
+            raise ValueError(f"Unknown link kind {link!r}; choose from {', '.join(LINK_KINDS)}")
+        self.root = root
+        self.layout = layout
+        self.link = link
+        self.index_path = root / VIEW_INDEX_NAME
+        self.entries: dict[str, dict] = {}    # absolute source path -> {"link": relative path, "stem": ...}
+        self.names = DestinationIndex()
+        self.linked, self.unchanged, self.removed = 0, 0, 0
+        root.mkdir(parents=True, exist_ok=True)
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                data = json.load(f)
+            if data.get("version") == VIEW_INDEX_VERSION:
+                self.entries = data["entries"]
+            else:
+                logging.warning(f"Ignoring {self.index_path} with unknown version {data.get('version')}")
+
+    def directory(self, authors: dict | None, date: dict | None) -> Path:
+        """Subdirectory of the view a document with this metadata belongs in."""
+        year = _year_from_date(date) or UNKNOWN_YEAR
+        author = _first_author_surname(authors) or UNKNOWN_AUTHOR
+        parts = {"flat": (), "year": (year,), "author": (author,), "year-author": (year, author)}[self.layout]
+        return self.root.joinpath(*parts)
+
+    def _points_to(self, link: Path, source: str) -> bool:
+        try:
+            if self.link == "symbolic":
+                return link.is_symlink() and os.readlink(link) == source
+            return not link.is_symlink() and os.path.samefile(link, source)
+        except OSError:
+            return False
+
+    def _remove(self, link: Path) -> None:
+        try:
+            link.unlink()
+        except FileNotFoundError:
+            pass
+        self.names.release(link)
+        directory = link.parent
+        while directory != self.root:
+            try:
+                directory.rmdir()   # only succeeds once the layout directory is empty
+            except OSError:
+                break
+            directory = directory.parent
+
+    def place(
+        self, source: Path, stem: str, authors: dict | None = None, date: dict | None = None
+    ) -> tuple[Path, bool]:
+        """Make sure the view has a link to source named after stem, and return (link, changed).
+
+        :param source: Original PDF
+        :param stem: Filesystem-safe stem derived from the title
+        :param authors: authors dict, for the layout and name disambiguation
+        :param date: date dict, for the layout and name disambiguation
+        :return: The link's path and whether it was created or moved (False if already in place)
+        """
+        key = os.path.abspath(source)
+        directory = self.directory(authors, date)
+        entry = self.entries.get(key)
+        if entry is not None:
+            current = self.root / entry["link"]
+            if entry["stem"] == stem and current.parent == directory and self._points_to(current, key):
+                self.unchanged += 1
+                return current, False
+            self._remove(current)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        link = self.names.claim(source, stem, authors, date, directory=directory)
+        if self.link == "symbolic":
+            os.symlink(key, link)
+        else:
+            try:
+                os.link(key, link)
+            except OSError as e:
+                if e.errno == errno.EXDEV:
+                    raise OSError(
+                        e.errno, f"{source} is on another filesystem than the view; use symbolic links"
+                    ) from e
+                raise
+        self.entries[key] = {"link": os.fspath(link.relative_to(self.root)), "stem": stem}
+        self.linked += 1
+        return link, True
+
+    def prune(self, sources: list[Path]) -> int:
+        """Remove the links of indexed sources not in sources (deleted or moved away); return how many."""
+        keep = {os.path.abspath(source) for source in sources}
+        stale = [key for key in self.entries if key not in keep]
+        for key in stale:
+            self._remove(self.root / self.entries.pop(key)["link"])
+            logging.info(f"Removed view link for {key}")
+        self.removed += len(stale)
+        return len(stale)
+
+    def save(self) -> None:
+        """Write the link index (atomically)."""
+        data = {"version": VIEW_INDEX_VERSION, "layout": self.layout, "link": self.link, "entries": self.entries}
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.index_path)
@@ -0,0 +1,214 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+SETTLE_SECONDS = 2.0          # size/mtime must be unchanged this long before a file is processed
+POLL_INTERVAL_SECONDS = 1.0   # directory scan interval for the polling fallback
+MISSING_EOF_GRACE = 10        # settle periods to wait for a %%EOF trailer before processing anyway
+EOF_SCAN_BYTES = 2048         # tail bytes searched for the %%EOF marker
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Sync clients and browsers write to temporary names before the final rename
+_TEMP_PREFIXES = (".", "~$")
+_TEMP_SUFFIXES = (".part", ".crdownload", ".tmp", "~")
+
+
+def is_candidate(path: Path) -> bool:
+    """Return True for finished-looking PDF names (not sync/download temp files)."""
+    name = path.name
+    if name.startswith(_TEMP_PREFIXES) or name.endswith(_TEMP_SUFFIXES):
+        return False
+    return path.suffix == ".pdf"
+
+
+def _has_eof_marker(path: Path) -> bool:
+    """Return True if the file ends with a PDF %%EOF trailer (i.e. looks fully written)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - EOF_SCAN_BYTES))
+            return b"%%EOF" in f.read()
+    except FileNotFoundError:
+        return False
+
+
+class Debouncer:
+    """Holds back files until they stop changing.
+
+    A file is released once its size and mtime have been stable for
+    settle_seconds and it carries a %%EOF trailer. A file that settles without
+    a trailer is released after MISSING_EOF_GRACE settle periods so a damaged
+    PDF still gets processed (and reported) instead of waiting forever.
+    """
+
+    def __init__(self, settle_seconds: float = SETTLE_SECONDS) -> None:
+        self.settle_seconds = settle_seconds
+        self.pending: dict[Path, tuple[tuple[int, int], float]] = {}
+
+    def touch(self, path: Path, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.pending.pop(path, None)
+            return
+        signature = (st.st_size, st.st_mtime_ns)
+        previous = self.pending.get(path)
+        if previous is None or previous[0] != signature:
+            self.pending[path] = (signature, now)
+
+    def ready(self, now: float | None = None) -> list[Path]:
+        """Return (and forget) the files that have settled."""
+        now = time.monotonic() if now is None else now
+        released = []
+        for path in list(self.pending):
+            self.touch(path, now)
+            if path not in self.pending:
+                continue
+            _, stable_since = self.pending[path]
+            stable_for = now - stable_since
+            if stable_for < self.settle_seconds:
+                continue
+            if _has_eof_marker(path) or stable_for >= self.settle_seconds * MISSING_EOF_GRACE:
+                del self.pending[path]
+                released.append(path)
+        return sorted(released)
+
+
+def _load_inotify():
+    """Return libc with inotify symbols, or None where inotify is unavailable."""
+    name = ctypes.util.find_library("c")
+    if not name:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifySource:
+    """Yields paths named in inotify events for one directory."""
+
+    def __init__(self, directory: Path, libc) -> None:
+        self.directory = directory
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def poll(self, timeout: float) -> list[Path]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                paths.append(self.directory / os.fsdecode(name))
+        return paths
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _PollingSource:
+    """Yields new or changed paths by rescanning the directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.seen = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        found = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()
+                        found[entry.name] = (st.st_size, st.st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+        return found
+
+    def poll(self, timeout: float) -> list[Path]:
+        time.sleep(timeout)
+        current = self._scan()
+        changed = [self.directory / name for name, sig in current.items() if self.seen.get(name) != sig]
+        self.seen = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def watch_directory(
+    directory: Path,
+    on_ready: Callable[[Path], None],
+    settle_seconds: float = SETTLE_SECONDS,
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+    stop: threading.Event | None = None,
+    use_inotify: bool = True,
+) -> None:
+    """Call on_ready for each PDF that lands in directory, once it has settled.
+
+    Uses inotify where available and falls back to periodic rescans. Files
+    already present when watching starts are not reported. Runs until stop is
+    set (or forever).
+
+    :param directory: Directory to watch (not recursive)
+    :param on_ready: Callback receiving each settled PDF path
+    :param settle_seconds: Quiet period required before a file is released
+    :param poll_interval: Maximum time between checks for settled files
+    :param stop: Event that ends the loop when set
+    :param use_inotify: Set False to force the polling fallback
+    """
+    stop = stop or threading.Event()
+    libc = _load_inotify() if use_inotify else None
+    source = None
+    if libc is not None:
+        try:
+            source = _InotifySource(directory, libc)
+            logging.info(f"Watching {directory} with inotify")
+        except OSError as e:
+            logging.warning(f"inotify unavailable ({e}); falling back to polling")
+    if source is None:
+        source = _PollingSource(directory)
+        logging.info(f"Watching {directory} by polling every {poll_interval}s")
+
+    debouncer = Debouncer(settle_seconds)
+    try:
+        while not stop.is_set():
+            for path in source.poll(min(poll_interval, settle_seconds)):
+                if is_candidate(path):
+                    debouncer.touch(path)
+            for path in debouncer.ready():
+                on_ready(path)
+    finally:
+        source.close()